@@ -3,13 +3,55 @@
 import { prisma } from '@/lib/prisma';
 import { revalidatePath } from 'next/cache';
 
+// Same checks as refresh_therapist_stats() (scraper migration 0006)
+const isInvalidZip = (zip: string | null) => zip === null || zip.length !== 4;
+const isInvalidCanton = (canton: string | null) => canton === null || canton.length !== 2;
+
 export async function updateTherapistField(id: string, field: string, value: string) {
     try {
-        await prisma.therapist.update({
-            where: { id },
-            data: { [field]: value }
+        await prisma.$transaction(async (tx) => {
+            const before = await tx.therapist.findUniqueOrThrow({
+                where: { id },
+                select: { zip: true, canton: true }
+            });
+            await tx.therapist.update({
+                where: { id },
+                data: { [field]: value }
+            });
+            if (field !== 'zip' && field !== 'canton') {
+                return;
+            }
+
+            // Adjust the cached dashboard counters for this row only; the scraper's throttled refresh
+            // recomputes the whole snapshot (one scan of "Therapist") on its next write
+            const [{ cached }] = await tx.$queryRaw<{ cached: boolean }[]>`
+                SELECT to_regclass('"TherapistStats"') IS NOT NULL AS cached
+            `;
+            if (!cached) {
+                return;
+            }
+            const after = {
+                zip: field === 'zip' ? value : before.zip,
+                canton: field === 'canton' ? value : before.canton
+            };
+            const zipDelta = Number(isInvalidZip(after.zip)) - Number(isInvalidZip(before.zip));
+            const cantonDelta = Number(isInvalidCanton(after.canton)) - Number(isInvalidCanton(before.canton));
+            const oldCanton = before.canton ?? 'Unknown';
+            const newCanton = after.canton ?? 'Unknown';
+            await tx.$executeRaw`
+                UPDATE "TherapistStats" SET
+                    "invalidZipCount" = "invalidZipCount" + ${zipDelta},
+                    "invalidCantonCount" = "invalidCantonCount" + ${cantonDelta},
+                    "byCanton" = CASE WHEN ${oldCanton}::text = ${newCanton}::text THEN "byCanton" ELSE jsonb_set(
+                        "byCanton" || jsonb_build_object(${oldCanton}::text,
+                            GREATEST(COALESCE(("byCanton" ->> ${oldCanton}::text)::int, 0) - 1, 0)),
+                        ARRAY[${newCanton}::text],
+                        to_jsonb(COALESCE(("byCanton" ->> ${newCanton}::text)::int, 0) + 1)) END
+                WHERE id = 'current'
+            `;
         });
         revalidatePath('/maintenance');
+        revalidatePath('/');
         return { success: true };
     } catch (e) {
         console.error(e);
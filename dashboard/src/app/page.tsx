@@ -1,21 +1,40 @@
 import { prisma } from '@/lib/prisma';
 import Link from 'next/link';
 
+type StatsSnapshot = {
+  totalCount: number;
+  invalidZipCount: number;
+  invalidCantonCount: number;
+  refreshedAt: Date;
+};
+
+// Cached counters maintained by the scraper (scraper/migrations/0006_therapist_stats.sql)
+async function getStatsSnapshot() {
+  try {
+    const rows = await prisma.$queryRaw<StatsSnapshot[]>`
+      SELECT "totalCount", "invalidZipCount", "invalidCantonCount", "refreshedAt"
+      FROM "TherapistStats" WHERE id = 'current'
+    `;
+    return rows[0] ?? null;
+  } catch {
+    // Table not created yet - the scraper has not run its migrations against this database
+    return null;
+  }
+}
+
 // Simple approx validations for stats
 async function getStats() {
-  const total = await prisma.therapist.count();
+  const snapshot = await getStatsSnapshot();
+  if (snapshot) {
+    return {
+      total: snapshot.totalCount,
+      invalidZip: snapshot.invalidZipCount,
+      invalidCanton: snapshot.invalidCantonCount,
+      refreshedAt: snapshot.refreshedAt,
+    };
+  }
 
-  // Approximate SQL checks
-  const invalidZip = await prisma.therapist.count({
-    where: {
-      OR: [
-        { zip: null },
-        { zip: { equals: '' } } // Prisma doesn't do length check easily without raw, but let's assume raw or just simple approximation for now.
-        // Actually, let's just stick to null/empty or check logic in a specific tool for "Deep Scan".
-        // For dashboard, we might want to run a raw query for speed if we want validation counts.
-      ]
-    }
-  });
+  const total = await prisma.therapist.count();
 
   // Let's us Raw query for "Rows with Invalid Zip" (not 4 chars)
   const invalidZipExact = await prisma.$queryRaw<{ count: bigint }[]>`
@@ -31,6 +50,7 @@ async function getStats() {
     total,
     invalidZip: Number(invalidZipExact[0].count),
     invalidCanton: Number(invalidCanton[0].count),
+    refreshedAt: null,
   };
 }
 
@@ -40,6 +60,11 @@ export default async function Home() {
   return (
     <div className="container">
       <h1 className="landing-header">Dashboard</h1>
+      {stats.refreshedAt && (
+        <p style={{ color: '#a1a1aa', marginBottom: '1rem' }}>
+          Statistics as of {stats.refreshedAt.toLocaleString()}
+        </p>
+      )}
 
       <div className="grid-cols-3" style={{ marginBottom: '2rem' }}>
         <div className="glass-panel" style={{ padding: '1.5rem' }}>
@@ -0,0 +1,680 @@
+"""Benchmarks for the scraper's hot paths.
+
+Usage:
+    python benchmarks.py db-writers [--records N] [--batch-size N]
+    python benchmarks.py db-sinks [--records N] [--batch-size N] [--rtt-ms MS]
+    python benchmarks.py mapper [--records N] [--batch-size N]
+    python benchmarks.py metrics-overhead [--pages N]
+    python benchmarks.py logging [--lines N] [--flush-us US] [--format text|json]
+    python benchmarks.py startup [--runs N] [--budget-ms MS]
+    python benchmarks.py e2e [--records N] [--paths replace,merge,incremental] [--sink psycopg2|pipeline]
+                             [--latency-ms MS] [--jitter-ms MS] [--error-rate P] [--rate-429 P]
+
+Database benchmarks write synthetic rows (psychologie_ch_id 'bench-*') to the
+configured database and delete them afterwards. They refuse to run against a
+non-local host unless --allow-remote is given. db-sinks routes its
+connections through a local TCP proxy that adds --rtt-ms of round-trip latency,
+standing in for the remote Railway host.
+
+e2e runs the real scrape paths against standin_server.py, each in a fresh
+process (so peak RSS is per path), from a synthetic snapshot in a temporary
+directory. replace and incremental start from a table without bench rows;
+merge runs after replace and records DataMerge rows for the profiles it wrote.
+
+startup spawns fresh interpreters: `python -X importtime -c "import scraper"`,
+then `python scraper.py analyze` and `python -m scraper analyze` in an empty
+directory (the script form recompiles scraper.py on every start, -m uses the
+cached bytecode). It fails (exit 1) when the median import time exceeds
+--budget-ms or when importing scraper pulls in one of the dependencies that
+only the scrape and database commands need.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+import queue as queue_module
+from queue import Queue
+from unittest import mock
+
+import requests
+
+import scraper
+import standin_server
+
+LOCAL_DB_HOSTS = ('localhost', '127.0.0.1', '::1')
+BENCH_ID_PREFIX = 'bench-'
+
+def make_synthetic_therapists(count, seed=0):
+    """Build scraped-looking therapist records without touching the network"""
+    rng = random.Random(seed)
+    cities = ['Zürich', 'Bern', 'Basel', 'Luzern', 'Lausanne', 'Genève', 'St. Gallen', 'Lugano']
+    offers = ['Depression', 'Anxiety', 'Burnout', 'Stress', 'Panic attacks', 'Bereavement', 'Self-esteem']
+    therapists = []
+    for i in range(count):
+        firstname = rng.choice(['Anna', 'Lukas', 'Léa', 'Marco', 'Sophie', 'Noah'])
+        lastname = f"Bench{i}"
+        therapists.append({
+            'id': f"{BENCH_ID_PREFIX}{i}",
+            'user_id': f"{BENCH_ID_PREFIX}user-{i}",
+            'firstname': firstname,
+            'lastname': lastname,
+            'url_slug': scraper.build_url_slug(firstname, lastname),
+            'url': f"https://bench.invalid/psyfinder/{i}",
+            'address': f"Bahnhofstrasse {rng.randint(1, 200)}",
+            'zip': str(rng.randint(1000, 9658)),
+            'city': rng.choice(cities),
+            'canton_id': rng.randint(1, 26),
+            'latitude': str(46 + rng.random()),
+            'longitude': str(7 + rng.random()),
+            'phone': f"+4144{rng.randint(1000000, 9999999)}",
+            'email': f"bench{i}@example.invalid",
+            'languages': rng.sample(['German', 'French', 'Italian', 'English'], 2),
+            'offer': rng.sample(offers, 4),
+            'target_groups': ['Adults'],
+            'billing': ['Covered by basic insurance'],
+            'about_me': 'I trained as a psychologist and worked in clinics. ' * 5,
+            'online_sessions': rng.choice(['available', 'unavailable']),
+            'scraped_at': time.time(),
+        })
+    return therapists
+
+def require_local_db(allow_remote):
+    """Refuse to write benchmark rows to a remote (production) database"""
+    host = scraper.SETTINGS['DB_CONFIG'].get('host')
+    if host not in LOCAL_DB_HOSTS and not allow_remote:
+        raise SystemExit(f"[ERROR] Refusing to benchmark against {host}. "
+                         f"Point DB_CONFIG at a local Postgres or pass --allow-remote.")
+
+def delete_bench_rows():
+    """Remove the synthetic rows written by a benchmark"""
+    with scraper.db_session() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM "Therapist" WHERE psychologie_ch_id LIKE %s', (f"{BENCH_ID_PREFIX}%",))
+        cursor.close()
+
+def bench_db_writers(records, batch_size):
+    """Compare rows/sec of insert_therapist_to_db against bulk_upsert_therapists (both on the shared pool)"""
+    therapists = make_synthetic_therapists(records)
+    results = {}
+
+    delete_bench_rows()
+    start = time.perf_counter()
+    for therapist in therapists:
+        scraper.insert_therapist_to_db(therapist)
+    results['per_record'] = records / (time.perf_counter() - start)
+    delete_bench_rows()
+
+    start = time.perf_counter()
+    counts, failures = scraper.bulk_upsert_therapists(therapists, batch_size=batch_size)
+    results['bulk_upsert'] = records / (time.perf_counter() - start)
+
+    # Second pass: identical content, every row is filtered by the hash check
+    start = time.perf_counter()
+    scraper.bulk_upsert_therapists(therapists, batch_size=batch_size)
+    results['bulk_upsert_unchanged'] = records / (time.perf_counter() - start)
+    delete_bench_rows()
+
+    print(f"[BENCH] {records} records, batch size {batch_size} ({counts}, {len(failures)} failures)")
+    for name, rate in results.items():
+        print(f"  {name:<24} {rate:>10.1f} rows/sec")
+    print(f"  speedup (bulk vs per-record): {results['bulk_upsert'] / results['per_record']:.1f}x")
+    return results
+
+class LatencyProxy:
+    """Local TCP proxy that delays every chunk by half the round-trip time in each direction.
+
+    Chunks are queued with a due time rather than sleeping in the reader, so
+    the proxy adds latency without limiting throughput (like a long link).
+    """
+
+    def __init__(self, target_host, target_port, rtt_ms):
+        self.target = (target_host, int(target_port))
+        self.delay = rtt_ms / 2000
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            for src, dst in ((client, upstream), (upstream, client)):
+                chunks = Queue()
+                threading.Thread(target=self._read, args=(src, chunks), daemon=True).start()
+                threading.Thread(target=self._send, args=(dst, chunks), daemon=True).start()
+
+    def _read(self, src, chunks):
+        try:
+            while True:
+                data = src.recv(65536)
+                if not data:
+                    break
+                chunks.put((time.monotonic() + self.delay, data))
+        except OSError:
+            pass
+        chunks.put((0, None))
+
+    def _send(self, dst, chunks):
+        while True:
+            due, data = chunks.get()
+            if data is None:
+                break
+            time.sleep(max(0.0, due - time.monotonic()))
+            try:
+                dst.sendall(data)
+            except OSError:
+                break
+        try:
+            dst.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    def close(self):
+        self.listener.close()
+
+def bench_db_sinks(records, batch_size, rtt_ms):
+    """Compare the psycopg2 and the psycopg 3 pipeline write sinks behind an injected network latency"""
+    therapists = make_synthetic_therapists(records)
+    db_config = dict(scraper.SETTINGS['DB_CONFIG'])
+    proxy = LatencyProxy(db_config['host'], db_config.get('port') or 5432, rtt_ms)
+    scraper.SETTINGS['DB_CONFIG'] = dict(db_config, host='127.0.0.1', port=str(proxy.port))
+    scraper.close_db_pool()
+    # Refreshes would add the same extra round trips to both sinks
+    scraper.SETTINGS['STATS_REFRESH_INTERVAL_SECONDS'] = float('inf')
+    results = {}
+
+    try:
+        for kind in ('psycopg2', 'pipeline'):
+            delete_bench_rows()
+            sink = scraper.get_write_sink(kind)
+            if sink.name != kind:
+                print(f"[BENCH] Skipping {kind} sink (not available)")
+                continue
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'error': 0}
+
+            def on_batch(batch, outcome):
+                for key in counts:
+                    counts[key] += outcome.get('counts', {}).get(key, 0)
+
+            start = time.perf_counter()
+            blocked = 0.0
+            for offset in range(0, records, batch_size):
+                submitted = time.perf_counter()
+                sink.submit(therapists[offset:offset + batch_size], {}, on_batch)
+                blocked += time.perf_counter() - submitted
+            sink.close()
+            elapsed = time.perf_counter() - start
+            results[kind] = {'rows_per_sec': records / elapsed, 'caller_blocked_s': blocked, 'counts': counts}
+    finally:
+        delete_bench_rows()
+        scraper.close_db_pool()
+        scraper.SETTINGS['DB_CONFIG'] = db_config
+        proxy.close()
+
+    print(f"[BENCH] {records} records, batch size {batch_size}, injected RTT {rtt_ms} ms")
+    for kind, result in results.items():
+        print(f"  {kind:<10} {result['rows_per_sec']:>10.1f} rows/sec | scrape loop blocked "
+              f"{result['caller_blocked_s']:.2f}s | {result['counts']}")
+    if len(results) == 2:
+        print(f"  speedup (pipeline vs psycopg2): "
+              f"{results['pipeline']['rows_per_sec'] / results['psycopg2']['rows_per_sec']:.1f}x")
+    return results
+
+def mapper_edge_cases():
+    """Records exercising every branch of map_therapist_to_db"""
+    base = make_synthetic_therapists(1, seed=1)[0]
+    return [
+        dict(base, canton_id=None, latitude='not a number', longitude='', fsp_titles=['Psychotherapist FSP']),
+        dict(base, canton_id=99, fsp_titles=['Psychotherapist FSP', 'Coach FSP'], online_sessions='available'),
+        {key: value for key, value in base.items() if key not in ('firstname', 'languages', 'offer', 'scraped_at', 'url')},
+        dict(base, firstname='', user={'firstname': 'Nested'}, practice_name='Praxis Bern', name='Ignored'),
+        dict(base, languages=[], billing=[], phone=None, mobile_phone='+41790000000'),
+    ]
+
+def bench_mapper(records, batch_size):
+    """Compare map_therapist_to_db + db_record_to_row with the batch mapper and check they agree"""
+    therapists = make_synthetic_therapists(records) + mapper_edge_cases()
+    # IDs and timestamps are generated per call - everything else must be identical
+    volatile = {scraper.THERAPIST_COLUMN_INDEX[column] for column in ('id', 'createdAt', 'updatedAt')}
+
+    start = time.perf_counter()
+    expected = [scraper.db_record_to_row(scraper.map_therapist_to_db(therapist)) for therapist in therapists]
+    per_record = len(therapists) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    rows = []
+    for offset in range(0, len(therapists), batch_size):
+        rows.extend(scraper.map_therapists_to_rows(therapists[offset:offset + batch_size]))
+    batched = len(therapists) / (time.perf_counter() - start)
+
+    mismatches = [
+        (index, column)
+        for index, (old, new) in enumerate(zip(expected, rows))
+        for position, column in enumerate(scraper.THERAPIST_COLUMNS)
+        if position not in volatile and old[position] != new[position]
+    ]
+    ids = [row[scraper.THERAPIST_COLUMN_INDEX['id']] for row in rows]
+
+    print(f"[BENCH] {len(therapists)} records, batch size {batch_size}")
+    print(f"  {'map_therapist_to_db':<24} {per_record:>10.1f} records/sec")
+    print(f"  {'map_therapists_to_rows':<24} {batched:>10.1f} records/sec")
+    print(f"  speedup: {batched / per_record:.1f}x | mismatched values: {len(mismatches)} | "
+          f"duplicate ids: {len(ids) - len(set(ids))}")
+    for index, column in mismatches[:10]:
+        print(f"  [MISMATCH] record {index} column {column}")
+    return {'per_record': per_record, 'batched': batched, 'mismatches': mismatches}
+
+# Shaped like a psyfinder profile: navigation chrome plus the sections scrape_profile_page looks for
+CANNED_PROFILE_HTML = """<!DOCTYPE html>
+<html><head><title>Anna Muster - psyfinder</title><script>var config = {"page": "profile"};</script></head>
+<body>
+<nav><ul>{nav}</ul></nav>
+<main>
+<h1>Dr. phil. Anna Muster</h1>
+<h2>Praxis am Bahnhof Bern</h2>
+<div class="address"><p>Bahnhofstrasse 12, 3011 Bern</p></div>
+<p>Telephone +41 31 123 45 67</p>
+<a href="mailto:anna.muster@example.ch">anna.muster@example.ch</a>
+<a href="https://www.praxis-muster.ch">Website</a>
+<div class="online"><strong>Online sessions</strong><span>Available</span></div>
+<img class="profile-image" src="https://www.psychologie.ch/sites/default/files/profile/anna.jpg" alt="Anna Muster">
+<ul class="titles"><li>Psychotherapist FSP</li><li>Child and Adolescent Psychologist FSP</li></ul>
+<h3>Specialisations</h3>
+<ul><li>Cognitive behavioural therapy</li><li>Trauma therapy</li><li>Systemic therapy</li></ul>
+<h3>About me</h3>
+<p>I studied psychology at the University of Bern and trained as a psychotherapist. I have worked in a clinic
+and in my own practice for more than fifteen years, with a focus on anxiety, depression and burnout.</p>
+<h3>Offer</h3>
+<ul><li>Depression</li><li>Anxiety</li><li>Burnout</li><li>Panic attacks</li><li>Relationship problems</li></ul>
+<h3>Target groups</h3>
+<ul><li>Adults</li><li>Adolescents</li><li>Couples</li></ul>
+<h3>Languages</h3>
+<ul><li>German</li><li>English</li><li>French</li></ul>
+<h3>Billing</h3>
+<ul><li>Basic insurance (delegated/ordered)</li><li>Supplementary insurance</li><li>Self-payers</li></ul>
+</main>
+<footer>{footer}</footer>
+</body></html>
+""".replace('{nav}', ''.join(f'<li><a href="/en/page-{i}">Navigation entry {i}</a></li>' for i in range(120))) \
+   .replace('{footer}', ''.join(f'<p>Footer paragraph {i} with legal and contact notes.</p>' for i in range(40)))
+
+def canned_profile_response(*args, **kwargs):
+    response = requests.models.Response()
+    response.status_code = 200
+    response._content = CANNED_PROFILE_HTML.encode('utf-8')
+    response.elapsed = timedelta(milliseconds=50)
+    return response
+
+def bench_metrics_overhead(pages, rounds=5):
+    """Parse a canned profile page with the metrics registry enabled and disabled (no network needed).
+
+    Pages alternate between the two modes so drift (GC, CPU frequency) hits
+    both equally. The per-page cost is also derived from the number of
+    metric updates times the measured cost of one update, which is far less
+    noisy than the difference of two ~40ms timings.
+    """
+    timings = {True: [], False: []}
+    with mock.patch.object(requests.Session, 'get', canned_profile_response), \
+            mock.patch('builtins.print'):
+        for index in range(pages * rounds):
+            for enabled in ((True, False) if index % 2 else (False, True)):
+                scraper.METRICS.enabled = enabled
+                start = time.perf_counter()
+                scraper.scrape_profile_page(index, index, 'Anna', 'Muster', 'anna-muster')
+                timings[enabled].append(time.perf_counter() - start)
+    scraper.METRICS.enabled = True
+
+    summary = scraper.METRICS.summary()
+    # Every observation lands in a histogram; each page also bumps the three page/response counters
+    updates = sum(histogram['count'] for histogram in summary['histograms'].values()) / (pages * rounds) + 3
+    stopwatch = scraper.Stopwatch('scraper_bench_seconds', 'extractor')
+    start = time.perf_counter()
+    for _ in range(100000):
+        stopwatch.mark('bench')
+    update_cost = (time.perf_counter() - start) / 100000
+
+    enabled = statistics.median(timings[True])
+    disabled = statistics.median(timings[False])
+    print(f"[BENCH] {pages * rounds} pages per mode, {len(CANNED_PROFILE_HTML) // 1024} KB page")
+    print(f"  {'metrics disabled':<18} {disabled * 1000:>8.2f} ms/page (median)")
+    print(f"  {'metrics enabled':<18} {enabled * 1000:>8.2f} ms/page (median)")
+    print(f"  measured difference: {(enabled - disabled) / disabled * 100:+.2f}%")
+    print(f"  {updates:.0f} metric updates/page x {update_cost * 1e6:.2f} us = "
+          f"{updates * update_cost * 1e6:.0f} us/page = {updates * update_cost / disabled * 100:.2f}% (budget 1%)")
+    for name, histogram in summary['histograms'].items():
+        if name.startswith('scraper_extractor_seconds'):
+            print(f"  {name:<55} p50 {histogram['p50'] * 1000:>7.3f} ms | p99 {histogram['p99'] * 1000:>7.3f} ms")
+    return {'enabled': enabled, 'disabled': disabled, 'overhead_pct': updates * update_cost / disabled * 100}
+
+class SlowStream(io.TextIOBase):
+    """stdout stand-in whose every flush costs flush_us, like a terminal or a container log driver"""
+
+    def __init__(self, flush_us):
+        self.delay = flush_us / 1e6
+        self.lines = 0
+
+    def write(self, text):
+        self.lines += text.count('\n')
+        return len(text)
+
+    def flush(self):
+        time.sleep(self.delay)
+
+def bench_logging(lines, flush_us, log_format):
+    """Per-line cost on the scraping thread: print(flush=True) vs the queued 'scraper' logger.
+
+    Each line is one "Processing ..." progress line plus one DEBUG trace call
+    for a record that is not the traced one (dropped by RecordTraceFilter).
+    """
+    stream = SlowStream(flush_us)
+    with contextlib.redirect_stdout(stream):
+        start = time.perf_counter()
+        for index in range(lines):
+            print(f"Processing {index + 1}/{lines}: Anna Muster", flush=True)
+        print_seconds = time.perf_counter() - start
+
+        scraper.SETTINGS.update(LOG_FORMAT=log_format, LOG_LEVEL='INFO', DEBUG_MODE=True, DEBUG_RECORD_ID=-1)
+        scraper.setup_logging()
+        start = time.perf_counter()
+        for index in range(lines):
+            scraper.log.info("Processing %d/%d: %s %s", index + 1, lines, 'Anna', 'Muster', extra={'record_id': index})
+            scraper.log.debug("DEBUG: About to scrape URL: %s%s", scraper.SETTINGS['BASE_URL'], 'anna-muster',
+                              extra={'record_id': index})
+        log_seconds = time.perf_counter() - start
+        scraper.flush_logging()
+        drained_seconds = time.perf_counter() - start
+        scraper.stop_logging()
+
+    print(f"[BENCH] {lines} lines, {flush_us:.0f} us per stdout flush, {log_format} log format")
+    print(f"  {'print(flush=True)':<20} {print_seconds / lines * 1e6:>8.1f} us/line on the scraping thread")
+    print(f"  {'queued logger':<20} {log_seconds / lines * 1e6:>8.1f} us/line on the scraping thread "
+          f"(listener drained after {drained_seconds:.2f}s)")
+    print(f"  {stream.lines} lines written ({2 * lines} expected)")
+    return {'print_us': print_seconds / lines * 1e6, 'log_us': log_seconds / lines * 1e6}
+
+def make_synthetic_snapshot(count, seed=0):
+    """A psychologie.ch snapshot (display-markers dispatch) of bench markers"""
+    rng = random.Random(seed)
+    markers = []
+    for i in range(count):
+        markers.append({
+            'id': f"{BENCH_ID_PREFIX}{i}",
+            'user': {'id': f"{BENCH_ID_PREFIX}user-{i}",
+                     'firstname': rng.choice(['Anna', 'Lukas', 'Léa', 'Marco', 'Sophie', 'Noah']),
+                     'lastname': f"Bench{i}"},
+            'address': f"Bahnhofstrasse {rng.randint(1, 200)}",
+            'zip': str(rng.randint(1000, 9658)),
+            'city': rng.choice(['Zürich', 'Bern', 'Basel', 'Lausanne', 'Lugano']),
+            'canton_id': rng.randint(1, 26),
+            'latitude': str(46 + rng.random()),
+            'longitude': str(7 + rng.random()),
+            'phone': f"+4144{rng.randint(1000000, 9999999)}",
+            'updated_at': '2025-01-01T00:00:00.000000Z',
+        })
+    return {'components': [{'effects': {'dispatches': [{'name': 'display-markers', 'params': [markers]}]}}]}
+
+# Seconds between checks that an e2e child process is still alive while waiting for its result
+E2E_POLL_SECONDS = 5
+
+E2E_PATHS = {
+    'replace': lambda: scraper.scrape_and_overwrite_database(),
+    'merge': lambda: scraper.scrape_and_merge_in_place(),
+    'incremental': lambda: scraper.run_incremental_refresh(),
+}
+
+def run_e2e_path(path, settings_dir, workdir, base_url, sink, results):
+    """Child process: run one scrape path against the stand-in server and report its numbers (or its error)"""
+    try:
+        results.put(measure_e2e_path(path, settings_dir, workdir, base_url, sink))
+    except BaseException as e:
+        import traceback
+        traceback.print_exc()
+        results.put({'path': path, 'error': f"{type(e).__name__}: {e}"})
+
+def measure_e2e_path(path, settings_dir, workdir, base_url, sink):
+    """Run one scrape path in this process and return its numbers"""
+    os.chdir(settings_dir)
+    scraper.load_settings()
+    os.chdir(workdir)
+    scraper.SETTINGS.update(BASE_URL=base_url, RATE_LIMIT_SECONDS=0, MAX_PROFILES_TO_SCRAPE=None,
+                            DEBUG_MODE=False, DB_WRITE_SINK=sink, METRICS_TEXTFILE=None)
+    # Log lines are formatted and written as in a real run, just not shown
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        scraper.setup_logging()
+    if path != 'merge':
+        delete_bench_rows()
+
+    # The interactive paths ask for confirmation
+    scraper.ASSUME_YES = True
+    start = time.perf_counter()
+    with mock.patch('builtins.print'):
+        E2E_PATHS[path]()
+    seconds = time.perf_counter() - start
+
+    summary = scraper.METRICS.summary()
+    def total(prefix, labels=()):
+        return sum(value for name, value in summary['counters'].items()
+                   if name.startswith(prefix) and (not labels or any(label in name for label in labels)))
+    db_seconds = sum(histogram['sum'] for name, histogram in summary['histograms'].items()
+                     if name.startswith('scraper_batch_seconds{stage=db_'))
+    rows = total('scraper_db_rows_total', ('result=inserted', 'result=updated', 'result=merged'))
+    return {
+        'path': path,
+        'seconds': seconds,
+        'pages': total('scraper_pages_total', ('result=ok',)),
+        'failed': total('scraper_pages_total', ('result=request_error', 'result=error')),
+        'statuses': {name.split('status=')[1].rstrip('}'): value for name, value in summary['counters'].items()
+                     if name.startswith('scraper_http_responses_total')},
+        'db_rows': rows,
+        'db_seconds': db_seconds,
+        'peak_rss_mb': scraper.get_rss_mb()[1],
+    }
+
+SCRAPER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imported only by the commands that fetch, parse or write - never by `import scraper`
+LAZY_DEPENDENCIES = ('requests', 'bs4', 'psycopg2', 'psycopg', 'pyarrow')
+
+def parse_import_times(stderr, module='scraper'):
+    """Parse -X importtime output into (cumulative us of module, [(self us, name)] of everything it imported)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()))
+    # Output is post-order: the modules a module imported are the deeper-indented lines right above it
+    for position, (_, cumulative_us, name) in enumerate(entries):
+        if name.strip() == module:
+            depth = len(name) - len(name.lstrip())
+            imported = []
+            for self_us, _, child in reversed(entries[:position]):
+                if len(child) - len(child.lstrip()) <= depth:
+                    break
+                imported.append((self_us, child.strip()))
+            return cumulative_us, imported
+    raise ValueError(f"{module} not found in the -X importtime output")
+
+def spawn_seconds(args, cwd):
+    """Wall time of one fresh interpreter running args (with scraper importable)"""
+    env = dict(os.environ, PYTHONPATH=SCRAPER_DIR)
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   check=True)
+    return time.perf_counter() - start
+
+def bench_startup(runs, budget_ms):
+    """Import time of scraper and wall time of a lightweight command, each in a fresh interpreter"""
+    import_times = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import scraper'], cwd=SCRAPER_DIR,
+                                   capture_output=True, text=True, check=True)
+        cumulative_us, imported = parse_import_times(completed.stderr)
+        import_times.append(cumulative_us / 1000)
+    heavy = sorted({name.split('.')[0] for _, name in imported if name.split('.')[0] in LAZY_DEPENDENCIES})
+
+    workdir = tempfile.mkdtemp(prefix='scraper-startup-')
+    try:
+        commands = {
+            'python -c pass': ['-c', 'pass'],
+            'scraper.py analyze': [os.path.join(SCRAPER_DIR, 'scraper.py'), 'analyze'],
+            '-m scraper analyze': ['-m', 'scraper', 'analyze'],
+        }
+        wall_ms = {label: statistics.median(spawn_seconds(args, workdir) * 1000 for _ in range(runs))
+                   for label, args in commands.items()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import_ms = statistics.median(import_times)
+    print(f"[BENCH] startup, median of {runs} fresh interpreters")
+    print(f"  {'import scraper':<22} {import_ms:>8.1f} ms (budget {budget_ms:.0f} ms)")
+    for label, milliseconds in wall_ms.items():
+        print(f"  {label:<22} {milliseconds:>8.1f} ms wall")
+    print("  slowest modules imported by scraper (self time of the last run):")
+    for self_us, name in sorted(imported, reverse=True)[:10]:
+        print(f"    {self_us / 1000:>7.2f} ms  {name}")
+
+    failures = []
+    if import_ms > budget_ms:
+        failures.append(f"import scraper took {import_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    if heavy:
+        failures.append(f"import scraper imported {', '.join(heavy)} - import them inside the functions that use them")
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    return {'import_ms': import_ms, 'wall_ms': wall_ms, 'heavy_imports': heavy, 'ok': not failures}
+
+def wait_for_e2e_result(process, results, path):
+    """The result a run_e2e_path child put on the queue, or an error result if it died without one"""
+    while True:
+        try:
+            return results.get(timeout=E2E_POLL_SECONDS)
+        except queue_module.Empty:
+            if process.is_alive():
+                continue
+        # The child exited: its result may have been flushed just before
+        try:
+            return results.get(timeout=E2E_POLL_SECONDS)
+        except queue_module.Empty:
+            return {'path': path, 'error': f"child process exited with code {process.exitcode} without a result"}
+
+def bench_e2e(records, paths, sink, latency_ms, jitter_ms, error_rate, rate_429):
+    """Run the scrape paths end to end against a local stand-in server and the configured (local) database"""
+    server = standin_server.start_standin_server(latency_ms=latency_ms, jitter_ms=jitter_ms,
+                                                 error_rate=error_rate, rate_429=rate_429)
+    workdir = tempfile.mkdtemp(prefix='scraper-e2e-')
+    os.makedirs(os.path.join(workdir, 'data'))
+    # spawn: every path starts from a fresh interpreter, so peak RSS is its own
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"[BENCH] {records} profiles per path from {server.base_url} ({latency_ms:.0f}+/-{jitter_ms:.0f} ms, "
+          f"{error_rate:.1%} 500s, {rate_429:.1%} 429s), sink {sink}")
+    try:
+        for path in paths:
+            with open(os.path.join(workdir, 'data', 'psychologie.ch.json'), 'w', encoding='utf-8') as f:
+                json.dump(make_synthetic_snapshot(records), f)
+            queue = context.Queue()
+            process = context.Process(target=run_e2e_path,
+                                      args=(path, os.getcwd(), workdir, server.base_url, sink, queue))
+            process.start()
+            result = wait_for_e2e_result(process, queue, path)
+            process.join()
+            results.append(result)
+            if 'error' in result:
+                print(f"  {path:<12} [FAIL] {result['error']}")
+                continue
+            db_rate = result['db_rows'] / result['db_seconds'] if result['db_seconds'] else 0
+            print(f"  {path:<12} {result['pages'] / result['seconds'] * 60:>8.0f} profiles/min | "
+                  f"peak RSS {result['peak_rss_mb']:>6.1f} MB | {result['db_rows']:>6} DB rows at {db_rate:>7.0f} rows/sec | "
+                  f"{result['failed']} failed pages | HTTP {result['statuses']}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+        delete_bench_rows()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    db_writers = subparsers.add_parser('db-writers', help='per-record insert vs batched upsert')
+    db_writers.add_argument('--records', type=int, default=1000)
+    db_writers.add_argument('--batch-size', type=int, default=scraper.SETTINGS['DB_BATCH_SIZE'])
+    db_writers.add_argument('--allow-remote', action='store_true')
+
+    db_sinks = subparsers.add_parser('db-sinks', help='psycopg2 sink vs psycopg 3 pipeline sink behind injected latency')
+    db_sinks.add_argument('--records', type=int, default=2000)
+    db_sinks.add_argument('--batch-size', type=int, default=scraper.SETTINGS['DB_BATCH_SIZE'])
+    db_sinks.add_argument('--rtt-ms', type=float, default=40)
+    db_sinks.add_argument('--allow-remote', action='store_true')
+
+    mapper = subparsers.add_parser('mapper', help='map_therapist_to_db vs the batch mapper (no database needed)')
+    mapper.add_argument('--records', type=int, default=20000)
+    mapper.add_argument('--batch-size', type=int, default=scraper.SETTINGS['DB_BATCH_SIZE'])
+
+    metrics_overhead = subparsers.add_parser('metrics-overhead', help='per-page cost of the metrics registry (no network needed)')
+    metrics_overhead.add_argument('--pages', type=int, default=200)
+
+    logging_bench = subparsers.add_parser('logging', help='print(flush=True) vs the queued logger behind a slow stdout')
+    logging_bench.add_argument('--lines', type=int, default=20000)
+    logging_bench.add_argument('--flush-us', type=float, default=200)
+    logging_bench.add_argument('--format', choices=('text', 'json'), default='json')
+
+    startup = subparsers.add_parser('startup', help='import time of scraper against a budget (fresh interpreters)')
+    startup.add_argument('--runs', type=int, default=10)
+    startup.add_argument('--budget-ms', type=float, default=50)
+
+    e2e = subparsers.add_parser('e2e', help='scrape paths end to end against standin_server.py')
+    e2e.add_argument('--records', type=int, default=300)
+    e2e.add_argument('--paths', default='replace,merge,incremental')
+    e2e.add_argument('--sink', choices=('psycopg2', 'pipeline'), default='psycopg2')
+    e2e.add_argument('--latency-ms', type=float, default=80)
+    e2e.add_argument('--jitter-ms', type=float, default=20)
+    e2e.add_argument('--error-rate', type=float, default=0.01)
+    e2e.add_argument('--rate-429', type=float, default=0.01)
+    e2e.add_argument('--allow-remote', action='store_true')
+
+    args = parser.parse_args()
+    scraper.load_settings()
+
+    if args.benchmark == 'db-writers':
+        require_local_db(args.allow_remote)
+        bench_db_writers(args.records, args.batch_size)
+    elif args.benchmark == 'mapper':
+        bench_mapper(args.records, args.batch_size)
+    elif args.benchmark == 'db-sinks':
+        require_local_db(args.allow_remote)
+        bench_db_sinks(args.records, args.batch_size, args.rtt_ms)
+    elif args.benchmark == 'e2e':
+        require_local_db(args.allow_remote)
+        paths = args.paths.split(',')
+        unknown = [path for path in paths if path not in E2E_PATHS]
+        if unknown:
+            parser.error(f"unknown path(s) {', '.join(unknown)} (choose from {', '.join(E2E_PATHS)})")
+        bench_e2e(args.records, paths, args.sink, args.latency_ms, args.jitter_ms, args.error_rate, args.rate_429)
+    elif args.benchmark == 'metrics-overhead':
+        bench_metrics_overhead(args.pages)
+    elif args.benchmark == 'logging':
+        bench_logging(args.lines, args.flush_us, args.format)
+    elif args.benchmark == 'startup':
+        if not bench_startup(args.runs, args.budget_ms)['ok']:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Duplicate detection across all therapist sources (psychologie.ch, doc24, wepractice, manual).
+
+Usage:
+    python dedup.py [--full] [--threshold 0.7] [--state-file data/dedup_state.json]
+
+Comparing every pair of ~100k therapists is not feasible, so candidate pairs
+come from blocks only:
+  * name         - normalized full name (titles dropped, token order ignored)
+  * zip_surname  - zip code + first letters of the last name
+  * phone        - national part of the phone / mobile number
+  * lsh          - MinHash/LSH band over name, address and practice tokens
+
+Only pairs sharing at least one block are scored. By default the job is
+incremental: it only scores pairs that involve a row created or updated since
+the last run (watermark in the state file). Pairs scoring at or above the
+threshold are bulk-inserted into "DuplicateCandidate" with their reasons;
+pairs that already exist are left alone.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from difflib import SequenceMatcher
+
+from psycopg2.extras import execute_values
+
+import scraper
+
+DEDUP_STATE_FILE = 'data/dedup_state.json'
+DEFAULT_THRESHOLD = 0.7
+
+# MinHash: 64 permutations in 16 bands of 4 rows -> pairs with token Jaccard ~0.5+ share a band
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Blocks this large are mostly noise (a common surname in a big city) and would dominate the runtime
+MAX_BLOCK_SIZE = 300
+
+NAME_TITLES = frozenset((
+    'dr', 'prof', 'med', 'phil', 'lic', 'msc', 'bsc', 'ma', 'mas', 'dipl', 'psych', 'psychologin', 'psychologe',
+    'fsp', 'mag', 'phd', 'rer', 'nat', 'pd', 'und', 'et',
+))
+ADDRESS_STOPWORDS = frozenset(('strasse', 'str', 'weg', 'gasse', 'platz', 'rue', 'route', 'chemin', 'avenue', 'av', 'via'))
+PRACTICE_STOPWORDS = frozenset(('praxis', 'practice', 'cabinet', 'studio', 'fur', 'fuer', 'de', 'der', 'die', 'das',
+                                'psychotherapie', 'psychologie', 'psychotherapy', 'und', 'et', 'and', 'the'))
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+THERAPIST_QUERY = '''
+    SELECT id, "firstName", "lastName", street, zip, phone, mobile, email, "practiceName", "dataSource",
+           GREATEST("createdAt", "updatedAt") AS touched_at
+    FROM "Therapist"
+    WHERE deleted_at IS NULL
+'''
+
+INSERT_CANDIDATES_SQL = '''
+    INSERT INTO "DuplicateCandidate" (id, "therapist1Id", "therapist2Id", "similarityScore", "matchReasons")
+    VALUES %s
+    ON CONFLICT ("therapist1Id", "therapist2Id") DO NOTHING
+'''
+
+def _permutation_parameters():
+    """Deterministic (a, b) pairs of the universal hash family (stable across runs)"""
+    params = []
+    for i in range(MINHASH_PERMUTATIONS):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'big') % (MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], 'big') % MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+PERMUTATIONS = _permutation_parameters()
+_token_hash_cache = {}
+
+def _token_hashes(token):
+    """All permutation values of one token (cached - tokens repeat a lot across records)"""
+    values = _token_hash_cache.get(token)
+    if values is None:
+        x = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+        values = tuple(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for a, b in PERMUTATIONS)
+        _token_hash_cache[token] = values
+    return values
+
+def minhash_signature(tokens):
+    """MinHash signature of a token set (None for an empty set)"""
+    if not tokens:
+        return None
+    return tuple(min(column) for column in zip(*(_token_hashes(token) for token in tokens)))
+
+def lsh_bands(signature):
+    """Band keys of a signature; records sharing any band key are compared"""
+    return [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+
+def normalize_text(text):
+    """Lowercase ASCII form used for every token (umlauts/accents folded like the URL slugs)"""
+    return (text or '').lower().translate(scraper.URL_SLUG_TRANSLATION)
+
+def tokenize(text, stopwords=frozenset()):
+    return [token for token in TOKEN_PATTERN.findall(normalize_text(text)) if token not in stopwords and len(token) > 1]
+
+def normalize_phone(number):
+    """National significant number of a Swiss phone number ('+41 44 123 45 67' -> '441234567')"""
+    digits = re.sub(r'\D', '', number or '')
+    return digits[-9:] if len(digits) >= 9 else None
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+class DedupRecord:
+    """Normalized comparison features of one therapist row"""
+    __slots__ = ('id', 'source', 'name_tokens', 'name_key', 'surname', 'zip', 'phones', 'email',
+                 'address_tokens', 'practice_tokens', 'signature', 'is_new')
+
+    def __init__(self, row, is_new):
+        therapist_id, first, last, street, zip_code, phone, mobile, email, practice, source, _ = row
+        self.id = therapist_id
+        self.source = source
+        name_tokens = [token for token in tokenize(f"{first} {last}") if token not in NAME_TITLES]
+        self.name_tokens = frozenset(name_tokens)
+        self.name_key = ' '.join(sorted(name_tokens))
+        surname = [token for token in tokenize(last) if token not in NAME_TITLES]
+        self.surname = surname[-1] if surname else ''
+        self.zip = (zip_code or '').strip()
+        self.phones = frozenset(filter(None, (normalize_phone(phone), normalize_phone(mobile))))
+        self.email = (email or '').strip().lower() or None
+        self.address_tokens = frozenset(tokenize(street, ADDRESS_STOPWORDS))
+        self.practice_tokens = frozenset(tokenize(practice, PRACTICE_STOPWORDS))
+        tokens = ({f"n:{token}" for token in self.name_tokens} | {f"a:{token}" for token in self.address_tokens}
+                  | {f"p:{token}" for token in self.practice_tokens})
+        if self.zip:
+            tokens.add(f"z:{self.zip}")
+        self.signature = minhash_signature(tokens)
+        self.is_new = is_new
+
+    def block_keys(self):
+        """All blocks this record belongs to"""
+        keys = []
+        if self.name_key:
+            keys.append(('name', self.name_key))
+        if self.zip and self.surname:
+            keys.append(('zip_surname', f"{self.zip}:{self.surname[:4]}"))
+        for phone in self.phones:
+            keys.append(('phone', phone))
+        if self.signature:
+            keys.extend(('lsh', band) for band in lsh_bands(self.signature))
+        return keys
+
+def score_pair(first, second):
+    """Similarity score in [0, 1] and the reasons that contributed"""
+    reasons = []
+    if first.name_key and first.name_key == second.name_key:
+        name_similarity = 1.0
+        reasons.append('same_name')
+    else:
+        name_similarity = SequenceMatcher(None, first.name_key, second.name_key).ratio()
+        if name_similarity >= 0.85:
+            reasons.append(f'similar_name:{name_similarity:.2f}')
+
+    score = 0.45 * name_similarity
+    if first.phones & second.phones:
+        score += 0.2
+        reasons.append('same_phone')
+    if first.zip and first.zip == second.zip:
+        score += 0.1
+        reasons.append('same_zip')
+    address_similarity = jaccard(first.address_tokens, second.address_tokens)
+    if address_similarity:
+        score += 0.15 * address_similarity
+        if address_similarity >= 0.5:
+            reasons.append(f'similar_address:{address_similarity:.2f}')
+    practice_similarity = jaccard(first.practice_tokens, second.practice_tokens)
+    if practice_similarity:
+        score += 0.1 * practice_similarity
+        if practice_similarity >= 0.5:
+            reasons.append(f'similar_practice:{practice_similarity:.2f}')
+    if first.email and first.email == second.email:
+        # A shared personal email address is close to proof
+        score = max(score, 0.9)
+        reasons.append('same_email')
+    if first.source != second.source:
+        reasons.append(f'cross_source:{min(first.source, second.source)}/{max(first.source, second.source)}')
+    return min(score, 1.0), reasons
+
+def load_state(state_file=DEDUP_STATE_FILE):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_state(state, state_file=DEDUP_STATE_FILE):
+    """Persist the watermark atomically"""
+    os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, state_file)
+
+def load_records(watermark=None):
+    """Stream every active therapist into DedupRecords; returns (records, newest touched_at)"""
+    records = []
+    newest = watermark
+    with scraper.db_session() as conn:
+        # THERAPIST_QUERY reads deleted_at (migration 0002): dedup may be the first command on a database
+        scraper.ensure_migrations(conn)
+        cursor = conn.cursor(name='dedup_therapists')
+        cursor.itersize = 5000
+        cursor.execute(THERAPIST_QUERY)
+        for row in cursor:
+            touched_at = row[-1].isoformat() if row[-1] else None
+            is_new = watermark is None or (touched_at is not None and touched_at > watermark)
+            records.append(DedupRecord(row, is_new))
+            if touched_at and (newest is None or touched_at > newest):
+                newest = touched_at
+        cursor.close()
+    return records, newest
+
+def candidate_pairs(records):
+    """Pairs of record indexes sharing a block, with at least one new record in each pair"""
+    blocks = {}
+    for index, record in enumerate(records):
+        for key in record.block_keys():
+            blocks.setdefault(key, []).append(index)
+
+    pairs = set()
+    oversized = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_BLOCK_SIZE:
+            oversized += 1
+            continue
+        new_members = [index for index in members if records[index].is_new]
+        for first in new_members:
+            for second in members:
+                if first != second:
+                    pairs.add((first, second) if first < second else (second, first))
+    return pairs, len(blocks), oversized
+
+def insert_candidates(candidates, batch_size=None):
+    """Bulk-insert (therapist1Id, therapist2Id, score, reasons); returns the number of new rows"""
+    batch_size = batch_size or scraper.SETTINGS['DB_BATCH_SIZE']
+    inserted = 0
+    for start in range(0, len(candidates), batch_size):
+        rows = [(scraper.generate_therapist_id(),) + candidate for candidate in candidates[start:start + batch_size]]
+
+        def write_batch(conn):
+            scraper.ensure_migrations(conn)
+            cursor = conn.cursor()
+            execute_values(cursor, INSERT_CANDIDATES_SQL, rows, page_size=len(rows))
+            count = cursor.rowcount
+            cursor.close()
+            return count
+
+        inserted += scraper.run_in_db_session(write_batch)
+    return inserted
+
+def run_dedup(full=False, threshold=DEFAULT_THRESHOLD, state_file=DEDUP_STATE_FILE):
+    """Find duplicate candidates among rows touched since the last run (or all rows with full=True)"""
+    state = {} if full else load_state(state_file)
+    watermark = state.get('watermark')
+    started = time.perf_counter()
+
+    print(f"\n[DEDUP] {'Full' if watermark is None else f'Incremental (since {watermark})'} duplicate detection")
+    records, newest = load_records(watermark)
+    new_count = sum(1 for record in records if record.is_new)
+    print(f"[+] Loaded {len(records)} therapists ({new_count} new or updated) in {time.perf_counter() - started:.1f}s")
+
+    pairs, block_count, oversized = candidate_pairs(records)
+    print(f"[+] {block_count} blocks, {len(pairs)} in-block pairs to score"
+          + (f" ({oversized} blocks over {MAX_BLOCK_SIZE} members skipped)" if oversized else ""))
+
+    candidates = []
+    for first_index, second_index in pairs:
+        first, second = records[first_index], records[second_index]
+        score, reasons = score_pair(first, second)
+        if score >= threshold:
+            therapist1_id, therapist2_id = sorted((first.id, second.id))
+            candidates.append((therapist1_id, therapist2_id, round(score, 4), reasons))
+
+    inserted = insert_candidates(candidates) if candidates else 0
+    save_state({'watermark': newest, 'last_run': time.strftime('%Y-%m-%dT%H:%M:%S')}, state_file)
+
+    print(f"[OK] {len(candidates)} pairs scored >= {threshold}, {inserted} new DuplicateCandidate rows "
+          f"in {time.perf_counter() - started:.1f}s")
+    return {'records': len(records), 'new_records': new_count, 'pairs_scored': len(pairs),
+            'candidates': len(candidates), 'inserted': inserted}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--full', action='store_true', help='ignore the watermark and score every row')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--state-file', default=DEDUP_STATE_FILE)
+    args = parser.parse_args()
+
+    scraper.load_settings()
+    run_dedup(full=args.full, threshold=args.threshold, state_file=args.state_file)
+
+if __name__ == "__main__":
+    main()
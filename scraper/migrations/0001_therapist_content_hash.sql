@@ -0,0 +1,3 @@
+-- Stable hash of the extracted psychologie.ch fields.
+-- Compared before mapping so unchanged profiles skip all database writes.
+ALTER TABLE "Therapist" ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
@@ -0,0 +1,2 @@
+-- Soft-delete marker for psychologie.ch profiles that disappeared from the snapshot.
+ALTER TABLE "Therapist" ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP(6);
@@ -0,0 +1,22 @@
+-- Unique key for the bulk upsert path (INSERT ... ON CONFLICT (psychologie_ch_id)).
+-- Older runs could leave several rows per psychologie.ch profile. This migration
+-- never removes them itself: it refuses to run until `scraper.py dedup-ids` has
+-- soft-deleted the older duplicates.
+DO $$
+DECLARE
+    duplicate_ids INTEGER;
+    duplicate_rows INTEGER;
+BEGIN
+    SELECT COUNT(*), COALESCE(SUM(row_count - 1), 0) INTO duplicate_ids, duplicate_rows
+    FROM (
+        SELECT COUNT(*) AS row_count FROM "Therapist"
+        WHERE psychologie_ch_id IS NOT NULL
+        GROUP BY psychologie_ch_id HAVING COUNT(*) > 1
+    ) duplicates;
+    IF duplicate_ids > 0 THEN
+        RAISE EXCEPTION '% psychologie_ch_id values have more than one Therapist row (% older rows)', duplicate_ids, duplicate_rows
+            USING HINT = 'Review them with `python -m scraper dedup-ids --dry-run`, then run `python -m scraper dedup-ids`.';
+    END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS "Therapist_psychologie_ch_id_key" ON "Therapist" (psychologie_ch_id);
@@ -0,0 +1,21 @@
+-- Per-run throughput / latency metrics next to the run's SyncLog row
+CREATE TABLE IF NOT EXISTS "SyncRunMetrics" (
+    id TEXT PRIMARY KEY,
+    "syncLogId" TEXT NOT NULL REFERENCES "SyncLog"(id) ON DELETE CASCADE,
+    mode TEXT NOT NULL,
+    "durationSeconds" DOUBLE PRECISION NOT NULL,
+    "pagesFetched" INTEGER NOT NULL DEFAULT 0,
+    "pagesPerSecond" DOUBLE PRECISION,
+    "fetchP50Ms" DOUBLE PRECISION,
+    "fetchP95Ms" DOUBLE PRECISION,
+    "parseP50Ms" DOUBLE PRECISION,
+    "parseP95Ms" DOUBLE PRECISION,
+    "dbRowsWritten" INTEGER NOT NULL DEFAULT 0,
+    "dbRowsPerSecond" DOUBLE PRECISION,
+    "cacheHitRatio" DOUBLE PRECISION,
+    errors INTEGER NOT NULL DEFAULT 0,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS "SyncRunMetrics_syncLogId_key" ON "SyncRunMetrics" ("syncLogId");
+CREATE INDEX IF NOT EXISTS "SyncRunMetrics_createdAt_idx" ON "SyncRunMetrics" ("createdAt");
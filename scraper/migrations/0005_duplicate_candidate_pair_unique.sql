@@ -0,0 +1,14 @@
+-- One DuplicateCandidate per unordered therapist pair, so the dedup job can
+-- insert with ON CONFLICT DO NOTHING. Pairs are stored with therapist1Id < therapist2Id.
+UPDATE "DuplicateCandidate"
+SET "therapist1Id" = "therapist2Id", "therapist2Id" = "therapist1Id"
+WHERE "therapist1Id" > "therapist2Id";
+
+DELETE FROM "DuplicateCandidate" d
+USING "DuplicateCandidate" older
+WHERE d."therapist1Id" = older."therapist1Id"
+  AND d."therapist2Id" = older."therapist2Id"
+  AND (d."createdAt", d.id) > (older."createdAt", older.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS "DuplicateCandidate_therapist1Id_therapist2Id_key"
+    ON "DuplicateCandidate" ("therapist1Id", "therapist2Id");
@@ -0,0 +1,57 @@
+-- Cached "Therapist" statistics read by show_database_info and the dashboard home page
+CREATE TABLE IF NOT EXISTS "TherapistStats" (
+    id TEXT PRIMARY KEY,
+    "totalCount" INTEGER NOT NULL DEFAULT 0,
+    "psychologieChCount" INTEGER NOT NULL DEFAULT 0,
+    "deletedCount" INTEGER NOT NULL DEFAULT 0,
+    "recentlyUpdatedCount" INTEGER NOT NULL DEFAULT 0,
+    "invalidZipCount" INTEGER NOT NULL DEFAULT 0,
+    "invalidCantonCount" INTEGER NOT NULL DEFAULT 0,
+    "bySource" JSONB NOT NULL DEFAULT '{}',
+    "byCanton" JSONB NOT NULL DEFAULT '{}',
+    "byQuality" JSONB NOT NULL DEFAULT '{}',
+    "databaseSizeBytes" BIGINT NOT NULL DEFAULT 0,
+    "refreshedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recompute the single 'current' row with one scan of "Therapist" (GROUPING SETS instead of one query per breakdown).
+-- GROUPING() bits are set for the columns left out of a set: 3 = by source, 5 = by canton, 6 = by quality, 7 = totals.
+CREATE OR REPLACE FUNCTION refresh_therapist_stats() RETURNS void LANGUAGE sql AS $$
+    WITH grouped AS (
+        SELECT GROUPING("dataSource", canton, "dataQualityScore") AS level,
+               "dataSource"::text AS source, canton, "dataQualityScore"::text AS quality,
+               COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE psychologie_ch_id IS NOT NULL) AS psychologie_ch,
+               COUNT(*) FILTER (WHERE deleted_at IS NOT NULL) AS deleted,
+               COUNT(*) FILTER (WHERE "updatedAt" > NOW() - INTERVAL '24 hours') AS recently_updated,
+               COUNT(*) FILTER (WHERE zip IS NULL OR length(zip) != 4) AS invalid_zip,
+               COUNT(*) FILTER (WHERE canton IS NULL OR length(canton) != 2) AS invalid_canton
+        FROM "Therapist"
+        GROUP BY GROUPING SETS (("dataSource"), (canton), ("dataQualityScore"), ())
+    )
+    INSERT INTO "TherapistStats" (
+        id, "totalCount", "psychologieChCount", "deletedCount", "recentlyUpdatedCount",
+        "invalidZipCount", "invalidCantonCount", "bySource", "byCanton", "byQuality",
+        "databaseSizeBytes", "refreshedAt"
+    )
+    SELECT 'current', total, psychologie_ch, deleted, recently_updated, invalid_zip, invalid_canton,
+           COALESCE((SELECT jsonb_object_agg(COALESCE(source, 'Unknown'), total) FROM grouped WHERE level = 3), '{}'),
+           COALESCE((SELECT jsonb_object_agg(COALESCE(canton, 'Unknown'), total) FROM grouped WHERE level = 5), '{}'),
+           COALESCE((SELECT jsonb_object_agg(COALESCE(quality, 'Unknown'), total) FROM grouped WHERE level = 6), '{}'),
+           pg_database_size(current_database()), NOW()
+    FROM grouped WHERE level = 7
+    ON CONFLICT (id) DO UPDATE SET
+        "totalCount" = EXCLUDED."totalCount",
+        "psychologieChCount" = EXCLUDED."psychologieChCount",
+        "deletedCount" = EXCLUDED."deletedCount",
+        "recentlyUpdatedCount" = EXCLUDED."recentlyUpdatedCount",
+        "invalidZipCount" = EXCLUDED."invalidZipCount",
+        "invalidCantonCount" = EXCLUDED."invalidCantonCount",
+        "bySource" = EXCLUDED."bySource",
+        "byCanton" = EXCLUDED."byCanton",
+        "byQuality" = EXCLUDED."byQuality",
+        "databaseSizeBytes" = EXCLUDED."databaseSizeBytes",
+        "refreshedAt" = EXCLUDED."refreshedAt";
+$$;
+
+SELECT refresh_therapist_stats();
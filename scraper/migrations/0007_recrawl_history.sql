@@ -0,0 +1,13 @@
+-- Revisit history per profile for the recrawl scheduler: every visit and whether it found a change.
+-- kind 'profile' is a full page scrape keyed by psychologie_ch_id, kind 'availability' an
+-- availabilityText-only visit keyed by "Therapist".id. A key's first visit only sets the baseline.
+CREATE TABLE IF NOT EXISTS "RecrawlHistory" (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    visits INTEGER NOT NULL DEFAULT 1,
+    changes INTEGER NOT NULL DEFAULT 0,
+    "firstVisitAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lastVisitAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lastChangeAt" TIMESTAMP(3),
+    PRIMARY KEY (kind, key)
+);
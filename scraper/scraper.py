@@ -1,14 +1,27 @@
 import json
-import requests
-from bs4 import BeautifulSoup
 import time
 import re
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import sys
+import argparse
+import threading
+import contextlib
+from contextlib import contextmanager
 from datetime import datetime
 import string
 import random
+import zlib
+import io
+import math
+import functools
+import itertools
+import atexit
+import logging
+from queue import Queue
+
+# requests, bs4, psycopg2 (and hashlib, csv) are imported inside the functions that use them, so
+# commands that need none of them (analyze, --help, worker spawns) start in
+# milliseconds. `python benchmarks.py startup` holds the import time to a budget.
 
 # =============================================================================
 # DEFAULT CONFIGURATION SETTINGS
@@ -23,9 +36,48 @@ DEFAULT_SETTINGS = {
     # Scraping behavior
     'SAVE_INTERVAL': 10,  # Save progress every N profiles
     'RATE_LIMIT_SECONDS': 1,  # Seconds to wait between requests (be respectful)
+    'BASE_URL': 'https://www.psychologie.ch/en/psyfinder/',  # Profile pages are BASE_URL + slug (point at standin_server.py for benchmarks)
+    'HTTP_429_RETRIES': 2,  # Retries of a profile fetch answered with 429 Too Many Requests (honours Retry-After)
+
+    # Run selection (scrape, replace and incremental runs)
+    'CANTONS': None,  # Only scrape markers of these cantons, e.g. ['ZH', 'BE']; None for all
+    'SHARD': None,  # 'I/N': only scrape the I-th (0-based) of N disjoint id shards, for parallel runs
+    'SKIP_UNCHANGED_CONTENT': True,  # Content-hash cache: skip the writes of profiles whose content is unchanged
+
+    # Recrawl scheduling (revisits picked by estimated change rate, see plan_recrawl)
+    'RECRAWL_BUDGET': None,  # Revisit requests per run on top of the snapshot diff; None: incremental revisits nothing, availability visits every record
+    'RECRAWL_HORIZON_DAYS': 1,  # Days until the next scheduled run (1 for nightly runs)
+    'RECRAWL_PRIOR_CHANGE_DAYS': {'profile': 180, 'availability': 7},  # Assumed days between changes before a key has history
+
+    # Database writes
+    'DB_BATCH_SIZE': 200,  # Rows per batched upsert statement / replace transaction
+    'DB_FLUSH_INTERVAL_SECONDS': 60,  # Write a partial batch after this long
+    'REFRESH_MIN_SNAPSHOT_RATIO': 0.5,  # Full refresh refuses snapshots smaller than this share of active rows
+    'STATS_REFRESH_INTERVAL_SECONDS': 120,  # Recompute the TherapistStats snapshot at most this often during a run
+    'DB_POOL_SIZE': 4,  # Pooled connections - match the number of concurrent writers
+    'DB_STATEMENT_TIMEOUT_MS': 60000,  # Abort statements running longer than this
+    'DB_CONNECT_TIMEOUT_SECONDS': 10,
+    'DB_HEALTH_CHECK_SECONDS': 30,  # Ping connections idle longer than this before reuse
+    'DB_RECONNECT_ATTEMPTS': 3,  # Retries of a batch after a dropped connection
+    'DB_WRITE_SINK': 'psycopg2',  # 'pipeline' streams incremental batches over psycopg 3 pipeline mode (pip install 'psycopg[binary]')
+    'PIPELINE_MAX_IN_FLIGHT': 8,  # Batches sent before the pipeline sink waits for their results
+
+    # Metrics
+    'METRICS_TEXTFILE': 'data/metrics/scraper.prom',  # Prometheus textfile (node_exporter collector); None disables export
+    'METRICS_SUMMARY_FILE': 'data/metrics/summary.json',  # Counters and latency percentiles, written at exit
+    'METRICS_EXPORT_SECONDS': 15,  # Rewrite the textfile this often during a run
+
+    # Profiling
+    'PAGE_ARCHIVE_DIR': 'data/page_archive',  # Fetched profile pages kept for offline profiling
+    'PROFILE_OUTPUT_DIR': 'data/profile',  # One timestamped directory of reports per profile run
+
+    # Logging
+    'LOG_LEVEL': 'INFO',  # DEBUG, INFO, WARNING or ERROR
+    'LOG_FORMAT': 'text',  # 'text' (plain console lines) or 'json' (one object per line, for log collectors)
+    'LOG_FILE': None,  # Optional path that also receives every record as JSON
 
     # Debug settings
-    'DEBUG_MODE': True,  # Set to True for detailed logging
+    'DEBUG_MODE': True,  # Trace the record below with DEBUG log lines
     'DEBUG_RECORD_ID': 570737,  # Specific record to debug
 
     # Error handling
@@ -44,12 +96,7 @@ DEFAULT_SETTINGS = {
 # Current settings (will be loaded from file or use defaults)
 SETTINGS = DEFAULT_SETTINGS.copy()
 
-# Database configuration
-DB_CONFIG = SETTINGS['DB_CONFIG']
-
 # =============================================================================
-from urllib.parse import urljoin, urlparse
-
 # =============================================================================
 # SETTINGS MANAGEMENT
 # =============================================================================
@@ -65,6 +112,8 @@ def load_settings():
                 loaded_settings = json.load(f)
                 # Merge loaded settings with defaults (preserves new default settings)
                 SETTINGS.update(loaded_settings)
+                # Reconnect with the loaded DB settings on next use
+                close_db_pool()
                 print(f"[OK] Settings loaded from {settings_file}")
         else:
             print("[INFO] No settings file found, using defaults")
@@ -152,10 +201,1061 @@ def edit_setting():
     else:
         print("[ERROR] Invalid choice")
 
+# =============================================================================
+# DATABASE CONNECTION POOL
+# =============================================================================
+
+def db_disconnect_errors():
+    """Errors after which a connection can no longer be trusted"""
+    import psycopg2
+    return (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+_db_pool = None
+_db_pool_slots = None
+_db_pool_lock = threading.Lock()
+_db_last_used = {}
+
+def get_db_pool():
+    """Return the shared threaded connection pool, creating it on first use"""
+    global _db_pool, _db_pool_slots
+    with _db_pool_lock:
+        if _db_pool is None or _db_pool.closed:
+            from psycopg2.pool import ThreadedConnectionPool
+            pool_size = max(1, SETTINGS['DB_POOL_SIZE'])
+            _db_pool = ThreadedConnectionPool(
+                1, pool_size,
+                connect_timeout=SETTINGS['DB_CONNECT_TIMEOUT_SECONDS'],
+                options=f"-c statement_timeout={SETTINGS['DB_STATEMENT_TIMEOUT_MS']}",
+                # Detect connections silently dropped by the Railway proxy
+                keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+                **SETTINGS['DB_CONFIG']
+            )
+            # getconn() raises instead of waiting when the pool is exhausted - block on a semaphore instead
+            _db_pool_slots = threading.BoundedSemaphore(pool_size)
+            _db_last_used.clear()
+        return _db_pool
+
+def close_db_pool():
+    """Close every pooled connection (settings changes take effect on next use)"""
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is not None and not _db_pool.closed:
+            _db_pool.closeall()
+        _db_pool = None
+        _db_last_used.clear()
+
+def _connection_is_healthy(conn):
+    """Cheap liveness check, only run for connections idle longer than the health check interval"""
+    if conn.closed:
+        return False
+    last_used = _db_last_used.get(id(conn))
+    if last_used is not None and time.time() - last_used < SETTINGS['DB_HEALTH_CHECK_SECONDS']:
+        return True
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+        conn.rollback()
+        return True
+    except db_disconnect_errors():
+        return False
+
+def _checkout_connection(pool):
+    """Get a healthy connection from the pool, replacing dead ones transparently"""
+    for _ in range(pool.maxconn + 1):
+        conn = pool.getconn()
+        if _connection_is_healthy(conn):
+            return conn
+        _db_last_used.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+    import psycopg2
+    raise psycopg2.OperationalError("Could not obtain a healthy database connection")
+
+@contextmanager
+def db_session():
+    """Borrow a pooled connection: commits on success, rolls back on error, drops broken connections"""
+    pool = get_db_pool()
+    slots = _db_pool_slots
+    slots.acquire()
+    conn = None
+    broken = False
+    try:
+        conn = _checkout_connection(pool)
+        yield conn
+        conn.commit()
+    except BaseException as e:
+        broken = isinstance(e, db_disconnect_errors()) and conn is not None and conn.closed != 0
+        if conn is not None and not conn.closed:
+            try:
+                conn.rollback()
+            except db_disconnect_errors():
+                broken = True
+        raise
+    finally:
+        if conn is not None:
+            if broken or conn.closed:
+                _db_last_used.pop(id(conn), None)
+                pool.putconn(conn, close=True)
+            else:
+                _db_last_used[id(conn)] = time.time()
+                pool.putconn(conn)
+        slots.release()
+
+def run_in_db_session(operation, attempts=None):
+    """Run operation(conn) in a session, retrying on a fresh connection if the connection drops.
+
+    The operation must be safe to repeat: it runs inside one transaction that
+    is rolled back when the connection is lost.
+    """
+    attempts = attempts or SETTINGS['DB_RECONNECT_ATTEMPTS']
+    for attempt in range(1, attempts + 1):
+        try:
+            with db_session() as conn:
+                return operation(conn)
+        except db_disconnect_errors() as e:
+            # Statement timeouts etc. leave the connection usable - only retry real disconnects
+            from psycopg2.extensions import QueryCanceledError
+            if isinstance(e, QueryCanceledError) or attempt == attempts:
+                raise
+            print(f"[DB] Connection lost ({str(e).strip()[:80]}), reconnecting (attempt {attempt + 1}/{attempts})...")
+            time.sleep(min(2 ** attempt, 30))
+
+# =============================================================================
+# LOGGING (structured records through a queue)
+# =============================================================================
+
+# Hot loops log through `log`; records are queued and formatted/written by a listener
+# thread, so a slow terminal or container log driver never blocks a scrape.
+log = logging.getLogger('scraper')
+LOG_QUEUE = Queue()
+_log_listener = None
+
+# Attributes every LogRecord has - anything else was passed with extra= and is a field
+_LOG_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg and the extra= fields (e.g. record_id)"""
+
+    def format(self, record):
+        entry = {'ts': round(record.created, 3), 'level': record.levelname, 'logger': record.name,
+                 'msg': record.getMessage()}
+        entry.update((key, value) for key, value in vars(record).items() if key not in _LOG_RECORD_ATTRS)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RecordTraceFilter(logging.Filter):
+    """Drop DEBUG records unless their record_id is the traced one (DEBUG_RECORD_ID)"""
+
+    def __init__(self, record_id):
+        super().__init__()
+        self.record_id = str(record_id)
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or str(getattr(record, 'record_id', None)) == self.record_id
+
+class DeferredQueueHandler(logging.Handler):
+    """Queue records for the listener thread, leaving message formatting to it.
+
+    logging.handlers.QueueHandler renders the message on the calling thread so
+    records can be pickled; this queue never leaves the process, so that is
+    skipped (and logging.handlers is only imported once setup_logging runs).
+    """
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+def setup_logging():
+    """Route the 'scraper' logger through LOG_QUEUE to the console (and LOG_FILE) per the settings"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    from logging.handlers import QueueListener
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(JsonLogFormatter() if SETTINGS['LOG_FORMAT'] == 'json' else logging.Formatter('%(message)s'))
+    handlers = [console]
+    if SETTINGS['LOG_FILE']:
+        os.makedirs(os.path.dirname(SETTINGS['LOG_FILE']) or '.', exist_ok=True)
+        log_file = logging.FileHandler(SETTINGS['LOG_FILE'], encoding='utf-8')
+        log_file.setFormatter(JsonLogFormatter())
+        handlers.append(log_file)
+
+    level = logging.getLevelName(str(SETTINGS['LOG_LEVEL']).upper())
+    queue_handler = DeferredQueueHandler(LOG_QUEUE)
+    if SETTINGS['DEBUG_MODE']:
+        # DEBUG lines of the traced record only; the filter runs before anything is queued
+        if level != logging.DEBUG:
+            queue_handler.addFilter(RecordTraceFilter(SETTINGS['DEBUG_RECORD_ID']))
+        level = logging.DEBUG
+    log.setLevel(level)
+    log.addHandler(queue_handler)
+    log.propagate = False
+
+    _log_listener = QueueListener(LOG_QUEUE, *handlers)
+    _log_listener.start()
+    atexit.register(stop_logging)
+
+def flush_logging():
+    """Wait until the listener has written every queued record (call before switching back to print)"""
+    if _log_listener is not None:
+        LOG_QUEUE.join()
+
+def stop_logging():
+    """Write the remaining records and stop the listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+# =============================================================================
+# METRICS REGISTRY (Prometheus textfile + JSON summary)
+# =============================================================================
+
+# Histograms keep exact counts below 32us and 16 linear sub-buckets per power of two above (~6% error)
+HISTOGRAM_SUB_BUCKETS = 16
+# "le" bounds (seconds) the HDR buckets are folded into for the Prometheus export
+PROMETHEUS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SUMMARY_PERCENTILES = (0.5, 0.9, 0.99)
+
+def _histogram_bucket(microseconds):
+    shift = max(0, microseconds.bit_length() - 5)
+    return HISTOGRAM_SUB_BUCKETS * shift + (microseconds >> shift)
+
+def _histogram_bucket_bounds(index):
+    """[lower, upper) of a bucket in microseconds"""
+    shift = max(0, index // HISTOGRAM_SUB_BUCKETS - 1)
+    mantissa = index - HISTOGRAM_SUB_BUCKETS * shift
+    return mantissa << shift, (mantissa + 1) << shift
+
+class Histogram:
+    """HDR-style latency histogram: sparse log-linear buckets over microseconds"""
+
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        index = _histogram_bucket(max(0, int(seconds * 1e6)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Midpoint of the bucket holding the nearest-rank percentile, in seconds"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                lower, upper = _histogram_bucket_bounds(index)
+                return min(self.max, max(self.min, (lower + upper) / 2e6))
+        return self.max
+
+    def cumulative(self, bounds):
+        """Observations per "le" bound (a bucket counts toward the bounds above its midpoint)"""
+        counts = [0] * len(bounds)
+        for index, count in self.buckets.items():
+            lower, upper = _histogram_bucket_bounds(index)
+            midpoint = (lower + upper) / 2e6
+            for position, bound in enumerate(bounds):
+                if midpoint <= bound:
+                    counts[position] += count
+        return counts
+
+    def summary(self):
+        summary = {'count': self.count, 'sum': round(self.total, 6),
+                   'min': self.min, 'max': self.max}
+        for fraction in SUMMARY_PERCENTILES:
+            value = self.percentile(fraction)
+            summary[f'p{int(fraction * 100)}'] = round(value, 6) if value is not None else None
+        return summary
+
+def _prometheus_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and latency histograms, keyed by name and label set"""
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def prometheus_text(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                declared = set()
+                for (name, labels), value in sorted(metrics.items()):
+                    if name not in declared:
+                        lines.append(f'# TYPE {name} {kind}')
+                        declared.add(name)
+                    lines.append(f'{name}{_prometheus_labels(labels)} {value}')
+            declared = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in declared:
+                    lines.append(f'# TYPE {name} histogram')
+                    declared.add(name)
+                for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                    lines.append(f'{name}_bucket{_prometheus_labels(labels, [("le", bound)])} {count}')
+                lines.append(f'{name}_bucket{_prometheus_labels(labels, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{name}_sum{_prometheus_labels(labels)} {histogram.total}')
+                lines.append(f'{name}_count{_prometheus_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """JSON-friendly snapshot: counters, gauges and percentile summaries of every histogram"""
+        def key(name, labels):
+            return name + ('{' + ','.join(f'{label}={value}' for label, value in labels) + '}' if labels else '')
+
+        with self._lock:
+            return {
+                'counters': {key(*metric): value for metric, value in sorted(self.counters.items())},
+                'gauges': {key(*metric): value for metric, value in sorted(self.gauges.items())},
+                'histograms': {key(*metric): histogram.summary() for metric, histogram in sorted(self.histograms.items())},
+            }
+
+METRICS = MetricsRegistry()
+
+class Stopwatch:
+    """Times consecutive sections of one block: mark(section) records the time since the previous mark"""
+
+    __slots__ = ('metric', 'label', 'last')
+
+    def __init__(self, metric, label):
+        self.metric = metric
+        self.label = label
+        self.last = time.perf_counter()
+
+    def mark(self, section):
+        now = time.perf_counter()
+        METRICS.observe(self.metric, now - self.last, **{self.label: section})
+        self.last = now
+
+def record_batch_time(stage, seconds, rows=None):
+    """Report a batch latency (mapping, DB writes) and the rows it produced per result"""
+    METRICS.observe('scraper_batch_seconds', seconds, stage=stage)
+    for result, count in (rows or {}).items():
+        if count:
+            METRICS.inc('scraper_db_rows_total', count, result=result)
+
+def _write_atomically(path, text):
+    """Write via a temp file + rename so collectors never read a half-written file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def export_metrics(summary=False):
+    """Write the Prometheus textfile (and the JSON summary when asked); errors are reported, never raised"""
+    try:
+        if SETTINGS['METRICS_TEXTFILE']:
+            METRICS.set_gauge('scraper_metrics_exported_timestamp_seconds', round(time.time(), 3))
+            _write_atomically(SETTINGS['METRICS_TEXTFILE'], METRICS.prometheus_text())
+        if summary and SETTINGS['METRICS_SUMMARY_FILE']:
+            summary = METRICS.summary()
+            extractors = [stats for stats in extractor_stats() if stats['runs'] or stats['skipped']]
+            if extractors:
+                summary['extractors'] = extractors
+            _write_atomically(SETTINGS['METRICS_SUMMARY_FILE'], json.dumps(summary, indent=2, default=str))
+    except OSError as e:
+        print(f"[ERROR] Could not export metrics: {e}")
+
+_metrics_exporter = None
+
+def start_metrics_exporter():
+    """Export metrics every METRICS_EXPORT_SECONDS and once more (with the JSON summary) at exit"""
+    global _metrics_exporter
+    if _metrics_exporter is not None or not SETTINGS['METRICS_TEXTFILE']:
+        return
+
+    def export_loop():
+        while True:
+            time.sleep(SETTINGS['METRICS_EXPORT_SECONDS'])
+            export_metrics()
+
+    _metrics_exporter = threading.Thread(target=export_loop, name='metrics-exporter', daemon=True)
+    _metrics_exporter.start()
+    atexit.register(export_metrics, summary=True)
+
+# =============================================================================
+# RUN TELEMETRY (SyncLog + SyncRunMetrics)
+# =============================================================================
+
+SYNC_LOG_SOURCE = 'manual'  # psychologie.ch records are stored with dataSource='manual'
+CANTON_COUNTERS = ('fetched', 'saved', 'merged', 'skipped', 'errors')
+
+SYNC_LOG_INSERT_SQL = '''
+    INSERT INTO "SyncLog" (id, source, canton, "totalFetched", "totalSaved", "totalMerged", "totalSkipped",
+                           status, "errorMessage", "startedAt", "completedAt")
+    VALUES %s
+'''
+SYNC_RUN_METRIC_COLUMNS = (
+    'mode', 'durationSeconds', 'pagesFetched', 'pagesPerSecond', 'fetchP50Ms', 'fetchP95Ms',
+    'parseP50Ms', 'parseP95Ms', 'dbRowsWritten', 'dbRowsPerSecond', 'cacheHitRatio', 'errors',
+)
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def marker_canton(psych):
+    """Canton abbreviation of a marker record (for per-canton counters)"""
+    return CANTON_MAPPING.get(psych.get('canton_id'), 'Unknown')
+
+class RunTelemetry:
+    """Counters and stage latencies of one scraper run, persisted to SyncLog / SyncRunMetrics"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started_at = datetime.now()
+        self._clock_started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stage_seconds = {'fetch': [], 'parse': []}
+        self.db_rows = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.cantons = {}  # canton -> {counter: value}
+
+    def record_stage(self, stage, seconds):
+        with self._lock:
+            self.stage_seconds.setdefault(stage, []).append(seconds)
+
+    def record_db_write(self, rows, seconds):
+        with self._lock:
+            self.db_rows += rows
+            self.db_seconds += seconds
+
+    def record_cache(self, hits, lookups=1):
+        """Content-hash lookups: a hit is a profile whose content was unchanged"""
+        with self._lock:
+            self.cache_hits += int(hits)
+            self.cache_lookups += lookups
+
+    def count(self, canton, counter, amount=1):
+        with self._lock:
+            counters = self.cantons.setdefault(canton or 'Unknown', dict.fromkeys(CANTON_COUNTERS, 0))
+            counters[counter] += amount
+
+    def totals(self):
+        totals = dict.fromkeys(CANTON_COUNTERS, 0)
+        for counters in self.cantons.values():
+            for counter, value in counters.items():
+                totals[counter] += value
+        return totals
+
+    def metrics(self):
+        """Per-run throughput and latency summary (latencies in milliseconds)"""
+        duration = time.perf_counter() - self._clock_started
+        totals = self.totals()
+
+        def latency_ms(stage, fraction):
+            value = percentile(self.stage_seconds.get(stage, []), fraction)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'mode': self.mode,
+            'durationSeconds': round(duration, 3),
+            'pagesFetched': totals['fetched'],
+            'pagesPerSecond': round(totals['fetched'] / duration, 3) if duration > 0 else None,
+            'fetchP50Ms': latency_ms('fetch', 0.50),
+            'fetchP95Ms': latency_ms('fetch', 0.95),
+            'parseP50Ms': latency_ms('parse', 0.50),
+            'parseP95Ms': latency_ms('parse', 0.95),
+            'dbRowsWritten': self.db_rows,
+            'dbRowsPerSecond': round(self.db_rows / self.db_seconds, 1) if self.db_seconds > 0 else None,
+            'cacheHitRatio': round(self.cache_hits / self.cache_lookups, 4) if self.cache_lookups else None,
+            'errors': totals['errors'],
+        }
+
+    def print_summary(self, metrics):
+        print(f"[METRICS] {metrics['pagesFetched']} pages in {metrics['durationSeconds']:.1f}s "
+              f"({metrics['pagesPerSecond'] or 0:.2f}/s) | fetch p50/p95: {metrics['fetchP50Ms']}/{metrics['fetchP95Ms']} ms | "
+              f"parse p50/p95: {metrics['parseP50Ms']}/{metrics['parseP95Ms']} ms | "
+              f"DB: {metrics['dbRowsWritten']} rows ({metrics['dbRowsPerSecond'] or 0:.0f}/s) | "
+              f"cache hit ratio: {metrics['cacheHitRatio']}")
+
+    def save(self, status='completed', error_message=None):
+        """Write one SyncLog row for the run, one per canton, and the run's SyncRunMetrics row"""
+        completed_at = datetime.now()
+        metrics = self.metrics()
+        self.print_summary(metrics)
+
+        totals = self.totals()
+        if error_message is None and totals['errors']:
+            error_message = f"errors: {totals['errors']}"
+        run_id = generate_therapist_id()
+        sync_rows = [(run_id, SYNC_LOG_SOURCE, None, totals['fetched'], totals['saved'], totals['merged'],
+                      totals['skipped'], status, error_message, self.started_at, completed_at)]
+        for canton, counters in sorted(self.cantons.items()):
+            sync_rows.append((
+                generate_therapist_id(), SYNC_LOG_SOURCE, canton, counters['fetched'], counters['saved'],
+                counters['merged'], counters['skipped'], status,
+                f"errors: {counters['errors']}" if counters['errors'] else None,
+                self.started_at, completed_at
+            ))
+        metric_columns = ', '.join(f'"{col}"' for col in SYNC_RUN_METRIC_COLUMNS)
+
+        def write(conn):
+            from psycopg2.extras import execute_values
+            ensure_migrations(conn)
+            cursor = conn.cursor()
+            execute_values(cursor, SYNC_LOG_INSERT_SQL, sync_rows, page_size=len(sync_rows))
+            cursor.execute(
+                f'INSERT INTO "SyncRunMetrics" (id, "syncLogId", {metric_columns}) '
+                f'VALUES (%s, %s, {", ".join(["%s"] * len(SYNC_RUN_METRIC_COLUMNS))})',
+                [generate_therapist_id(), run_id] + [metrics[col] for col in SYNC_RUN_METRIC_COLUMNS]
+            )
+            cursor.close()
+
+        try:
+            run_in_db_session(write)
+            print(f"[OK] Run recorded in SyncLog ({run_id}, {len(sync_rows) - 1} cantons)")
+        except Exception as e:
+            # Telemetry must never fail the run itself
+            print(f"[ERROR] Could not record run telemetry: {e}")
+            return None
+        return run_id
+
+ACTIVE_TELEMETRY = None
+LAST_RUN = None  # Outcome of the last finished run (the CLI's JSON result)
+
+def start_run_telemetry(mode):
+    """Start collecting telemetry for a run (scrape_profile_page reports into it)"""
+    global ACTIVE_TELEMETRY
+    ACTIVE_TELEMETRY = RunTelemetry(mode)
+    METRICS.set_gauge('scraper_run_started_timestamp_seconds', round(time.time(), 3), mode=mode)
+    return ACTIVE_TELEMETRY
+
+def finish_run_telemetry(status='completed', error_message=None):
+    """Persist and detach the active run telemetry"""
+    global ACTIVE_TELEMETRY, LAST_RUN
+    telemetry, ACTIVE_TELEMETRY = ACTIVE_TELEMETRY, None
+    flush_therapist_stats()
+    if telemetry is None:
+        return None
+    METRICS.inc('scraper_runs_total', mode=telemetry.mode, status=status)
+    METRICS.set_gauge('scraper_run_finished_timestamp_seconds', round(time.time(), 3), mode=telemetry.mode)
+    export_metrics()
+    run_id = telemetry.save(status, error_message)
+    LAST_RUN = {'mode': telemetry.mode, 'status': status, 'error': error_message, 'syncLogId': run_id,
+                'metrics': telemetry.metrics(), 'totals': telemetry.totals()}
+    return run_id
+
+def record_stage_time(stage, seconds):
+    """Report a per-record stage latency to the metrics registry and the active run"""
+    METRICS.observe('scraper_stage_seconds', seconds, stage=stage)
+    if ACTIVE_TELEMETRY is not None:
+        ACTIVE_TELEMETRY.record_stage(stage, seconds)
+
+def recorded_run(mode):
+    """Decorator: record every call of a scrape run in SyncLog / SyncRunMetrics"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_run_telemetry(mode)
+            try:
+                result = func(*args, **kwargs)
+            except KeyboardInterrupt:
+                finish_run_telemetry('interrupted')
+                raise
+            except Exception as e:
+                finish_run_telemetry('failed', str(e)[:500])
+                raise
+            finish_run_telemetry('completed')
+            return result
+        return wrapper
+    return decorator
+
+# =============================================================================
+# FIELD-LEVEL MERGE (DataMerge)
+# =============================================================================
+
+MERGE_PREFER_NEWEST = 'prefer_newest'   # the scraped profile page wins
+MERGE_PREFER_SOURCE = 'prefer_source'   # the psychologie.ch API marker wins, the page only fills gaps
+MERGE_ORDERED_UNION = 'ordered_union'   # marker items in their order, then new page items
+
+# Strategy per field when a scraped profile is merged into its marker record
+FIELD_MERGE_STRATEGIES = {
+    'offer': MERGE_ORDERED_UNION,
+    'target_groups': MERGE_ORDERED_UNION,
+    'languages': MERGE_ORDERED_UNION,
+    'billing': MERGE_ORDERED_UNION,
+    'specialisations': MERGE_ORDERED_UNION,
+    'fsp_titles': MERGE_ORDERED_UNION,
+    'about_me': MERGE_PREFER_NEWEST,
+    'practice_name': MERGE_PREFER_NEWEST,
+    'full_name': MERGE_PREFER_NEWEST,
+    'online_sessions': MERGE_PREFER_NEWEST,
+    'profile_image_url': MERGE_PREFER_NEWEST,
+    'url': MERGE_PREFER_NEWEST,
+    'scraped_at': MERGE_PREFER_NEWEST,
+}
+MERGE_DEFAULT_STRATEGY = MERGE_PREFER_SOURCE
+# Conflict resolutions use the MergeConflictResolution enum values of the schema
+MERGE_RESOLUTIONS = {MERGE_PREFER_NEWEST: 'use_newer', MERGE_PREFER_SOURCE: 'keep_existing'}
+MERGE_STRATEGY_NAME = 'field_level'
+# Fields whose completeness makes up DataMerge.qualityImprovement
+MERGE_QUALITY_FIELDS = (
+    'address', 'zip', 'city', 'phone', 'email', 'website', 'about_me', 'practice_name', 'online_sessions',
+    'profile_image_url', 'offer', 'target_groups', 'languages', 'billing', 'specialisations', 'fsp_titles',
+)
+
+def _is_empty(value):
+    return value is None or value == '' or value == [] or value == {}
+
+def ordered_union(existing, incoming):
+    """Existing items in their order, then unseen incoming items (strings compared case-insensitively)"""
+    merged = []
+    seen = set()
+    for item in list(existing) + list(incoming):
+        key = item.strip().lower() if isinstance(item, str) else json.dumps(item, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            merged.append(item)
+    return merged
+
+def profile_quality(record):
+    """Share of MERGE_QUALITY_FIELDS that are filled (0..1)"""
+    return sum(1 for field in MERGE_QUALITY_FIELDS if not _is_empty(record.get(field))) / len(MERGE_QUALITY_FIELDS)
+
+def merge_profile(existing, incoming):
+    """Merge a scraped profile into its marker record using FIELD_MERGE_STRATEGIES.
+
+    Returns (merged, merge_row): merge_row holds the DataMerge values for
+    insert_data_merges(), or None if no field (besides scraped_at) changed.
+    """
+    merged = dict(existing)
+    changes = {}
+    conflicts = []
+    for field, new_value in incoming.items():
+        old_value = merged.get(field)
+        if _is_empty(new_value) or old_value == new_value:
+            continue
+        strategy = FIELD_MERGE_STRATEGIES.get(field, MERGE_DEFAULT_STRATEGY)
+        if _is_empty(old_value):
+            value = new_value
+        elif strategy == MERGE_ORDERED_UNION and isinstance(old_value, list) and isinstance(new_value, list):
+            value = ordered_union(old_value, new_value)
+        else:
+            value = new_value if strategy == MERGE_PREFER_NEWEST else old_value
+            if field not in CONTENT_HASH_EXCLUDED_FIELDS:
+                conflicts.append({'field': field, 'strategy': strategy, 'existing': old_value,
+                                  'incoming': new_value, 'resolution': MERGE_RESOLUTIONS[strategy]})
+        if value != old_value:
+            merged[field] = value
+            if field not in CONTENT_HASH_EXCLUDED_FIELDS:
+                changes[field] = old_value
+
+    if not changes and not conflicts:
+        return merged, None
+    touched = set(changes) | {conflict['field'] for conflict in conflicts}
+    merge_row = (
+        str(existing.get('id', '')),
+        json.dumps({'existing': {field: existing.get(field) for field in touched},
+                    'incoming': {field: incoming.get(field) for field in touched}}, ensure_ascii=False, default=str),
+        json.dumps({field: merged.get(field) for field in touched}, ensure_ascii=False, default=str),
+        json.dumps(conflicts, ensure_ascii=False, default=str) if conflicts else None,
+        MERGE_STRATEGY_NAME,
+        round(profile_quality(merged) - profile_quality(existing), 4),
+    )
+    return merged, merge_row
+
+DATA_MERGE_INSERT_SQL = '''
+    INSERT INTO "DataMerge" (id, "therapistId", "sourceData", "mergedData", conflicts, "mergeStrategy",
+                             "qualityImprovement", "createdBy")
+    SELECT v.id, t.id, v.source_data::jsonb, v.merged_data::jsonb, v.conflicts::jsonb, v.strategy, v.quality, 'scraper'
+    FROM (VALUES %s) AS v(id, psych_id, source_data, merged_data, conflicts, strategy, quality)
+    JOIN "Therapist" t ON t.psychologie_ch_id = v.psych_id
+'''
+
+def insert_data_merges(cursor, merge_rows):
+    """Bulk-insert DataMerge rows (None entries skipped) in the caller's transaction.
+
+    Rows are matched to "Therapist" by psychologie_ch_id in the same statement;
+    merges of profiles without a therapist row are dropped. Returns rows written.
+    """
+    from psycopg2.extras import execute_values
+    rows = [(generate_therapist_id(),) + merge_row for merge_row in merge_rows if merge_row]
+    if not rows:
+        return 0
+    execute_values(cursor, DATA_MERGE_INSERT_SQL, rows, page_size=len(rows),
+                   template='(%s, %s, %s, %s, %s, %s, %s::double precision)')
+    return cursor.rowcount
+
 # =============================================================================
 # DATABASE FUNCTIONS
 # =============================================================================
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+_migrations_applied = False
+
+def apply_migrations(conn, until=None):
+    """Apply pending SQL migrations from scraper/migrations (each in its own transaction).
+
+    With until, only the migrations whose names sort before it are applied.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scraper_migrations (
+            name VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    ''')
+    conn.commit()
+
+    cursor.execute('SELECT name FROM scraper_migrations')
+    applied = {row[0] for row in cursor.fetchall()}
+
+    pending = sorted(name for name in os.listdir(MIGRATIONS_DIR)
+                     if name.endswith('.sql') and name not in applied and (until is None or name < until))
+    for name in pending:
+        with open(os.path.join(MIGRATIONS_DIR, name), 'r', encoding='utf-8') as f:
+            sql = f.read()
+        try:
+            # Index builds may legitimately exceed the session statement timeout
+            cursor.execute('SET LOCAL statement_timeout = 0')
+            cursor.execute(sql)
+            cursor.execute('INSERT INTO scraper_migrations (name) VALUES (%s)', (name,))
+            conn.commit()
+            print(f"[OK] Applied migration {name}")
+        except Exception:
+            conn.rollback()
+            raise
+
+    cursor.close()
+    return pending
+
+def ensure_migrations(conn):
+    """Apply migrations once per process before the first write"""
+    global _migrations_applied
+    if not _migrations_applied:
+        apply_migrations(conn)
+        _migrations_applied = True
+
+# Rows sharing a psychologie_ch_id (migration 0003 refuses to build its unique index over them):
+# every row but the newest live one of each id
+PSYCH_ID_DUPLICATES_SQL = '''
+    SELECT id, keeper_id, psychologie_ch_id FROM (
+        SELECT id, psychologie_ch_id,
+               first_value(id) OVER ids AS keeper_id,
+               row_number() OVER ids AS rank
+        FROM "Therapist"
+        WHERE psychologie_ch_id IS NOT NULL
+        WINDOW ids AS (PARTITION BY psychologie_ch_id ORDER BY deleted_at IS NULL DESC, "updatedAt" DESC, id DESC)
+    ) ranked
+    WHERE rank > 1
+    ORDER BY psychologie_ch_id, id
+'''
+PSYCH_ID_DUPLICATE_CANDIDATE_SQL = '''
+    INSERT INTO "DuplicateCandidate" (id, "therapist1Id", "therapist2Id", "similarityScore", "matchReasons",
+                                      status, "resolvedAt", "resolvedBy")
+    SELECT v.id, LEAST(v.older_id, v.keeper_id), GREATEST(v.older_id, v.keeper_id), 1.0, ARRAY['psychologie_ch_id'],
+           'merged', NOW(), 'dedup-ids'
+    FROM (VALUES %s) AS v(id, older_id, keeper_id)
+    ON CONFLICT DO NOTHING
+'''
+# The older row keeps its data but gives up the id (so the unique index can be built) and is soft-deleted;
+# its id is appended to the kept row's mergedFrom
+PSYCH_ID_RETIRE_DUPLICATES_SQL = '''
+    UPDATE "Therapist" SET deleted_at = COALESCE(deleted_at, NOW()), psychologie_ch_id = NULL, "updatedAt" = NOW()
+    WHERE id = ANY(%s)
+'''
+PSYCH_ID_RECORD_MERGED_FROM_SQL = '''
+    UPDATE "Therapist" t SET "mergedFrom" = t."mergedFrom" || v.older_ids, "updatedAt" = NOW()
+    FROM (VALUES %s) AS v(keeper_id, older_ids)
+    WHERE t.id = v.keeper_id
+'''
+
+def resolve_psychologie_ch_id_duplicates(dry_run=False):
+    """Soft-delete the older Therapist rows sharing a psychologie_ch_id, so migration 0003 can apply.
+
+    Keeps the newest live row of each id. Each older row is soft-deleted with
+    its psychologie_ch_id cleared, recorded as a merged DuplicateCandidate
+    pair and listed in the kept row's mergedFrom; nothing is deleted.
+    """
+    from psycopg2.extras import execute_values
+    print("\n" + "="*70)
+    print("[DEDUP IDS] RESOLVE THERAPIST ROWS SHARING A PSYCHOLOGIE_CH_ID")
+    print("="*70)
+
+    with db_session() as conn:
+        # Migrations before 0003 only: 0003 itself fails while duplicates exist
+        apply_migrations(conn, until='0003')
+        cursor = conn.cursor()
+        cursor.execute(PSYCH_ID_DUPLICATES_SQL)
+        duplicates = cursor.fetchall()
+        psych_ids = {psych_id for _, _, psych_id in duplicates}
+        print(f"[INFO] {len(duplicates)} older rows share {len(psych_ids)} psychologie_ch_id values with a newer row")
+        for older_id, keeper_id, psych_id in duplicates[:20]:
+            print(f"  * {psych_id}: soft-delete {older_id}, keep {keeper_id}")
+        if len(duplicates) > 20:
+            print(f"  ... and {len(duplicates) - 20} more")
+        result = {'duplicates': len(duplicates), 'psychologie_ch_ids': len(psych_ids), 'retired': 0}
+        if dry_run or not duplicates:
+            conn.rollback()
+            if not duplicates:
+                ensure_migrations(conn)
+            return result
+
+        if not confirm_operation("\nSoft-delete these older rows? Type 'YES' to proceed: "):
+            print("[CANCELLED] Operation cancelled by user")
+            conn.rollback()
+            return None
+
+        candidate_ids = generate_therapist_ids(len(duplicates))
+        execute_values(cursor, PSYCH_ID_DUPLICATE_CANDIDATE_SQL,
+                       [(candidate_id, older_id, keeper_id)
+                        for candidate_id, (older_id, keeper_id, _) in zip(candidate_ids, duplicates)])
+        merged_from = {}
+        for older_id, keeper_id, _ in duplicates:
+            merged_from.setdefault(keeper_id, []).append(older_id)
+        execute_values(cursor, PSYCH_ID_RECORD_MERGED_FROM_SQL, list(merged_from.items()),
+                       template='(%s, %s::text[])')
+        cursor.execute(PSYCH_ID_RETIRE_DUPLICATES_SQL, ([older_id for older_id, _, _ in duplicates],))
+        result['retired'] = cursor.rowcount
+        conn.commit()
+        print(f"[OK] Soft-deleted {result['retired']} older duplicate rows")
+        ensure_migrations(conn)
+    refresh_therapist_stats(force=True)
+    return result
+
+# Cached statistics (migration 0006): one "TherapistStats" row recomputed by refresh_therapist_stats()
+STATS_SNAPSHOT_ID = 'current'
+STATS_COLUMNS = (
+    'totalCount', 'psychologieChCount', 'deletedCount', 'recentlyUpdatedCount', 'invalidZipCount',
+    'invalidCantonCount', 'bySource', 'byCanton', 'byQuality', 'databaseSizeBytes', 'refreshedAt',
+)
+STATS_SELECT_SQL = f'''
+    SELECT {', '.join(f'"{col}"' for col in STATS_COLUMNS)} FROM "TherapistStats" WHERE id = %s
+'''
+
+_stats_lock = threading.Lock()
+_stats_refreshed_at = 0.0
+_stats_stale = False
+
+def refresh_therapist_stats(force=False):
+    """Recompute the TherapistStats snapshot after a write batch.
+
+    Throttled to once per STATS_REFRESH_INTERVAL_SECONDS: skipped refreshes
+    only mark the snapshot stale, and flush_therapist_stats() catches up at
+    the end of the run. Failures are reported but never fail the write.
+    Returns True if the snapshot was recomputed.
+    """
+    global _stats_refreshed_at, _stats_stale
+    with _stats_lock:
+        if not force and time.time() - _stats_refreshed_at < SETTINGS['STATS_REFRESH_INTERVAL_SECONDS']:
+            _stats_stale = True
+            return False
+        _stats_refreshed_at = time.time()
+        _stats_stale = False
+
+    def refresh(conn):
+        ensure_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute('SELECT refresh_therapist_stats()')
+        cursor.close()
+
+    try:
+        started = time.perf_counter()
+        run_in_db_session(refresh)
+        record_batch_time('stats_refresh', time.perf_counter() - started)
+        return True
+    except Exception as e:
+        print(f"[DB ERROR] Could not refresh statistics snapshot: {e}")
+        with _stats_lock:
+            _stats_stale = True
+        return False
+
+def mark_therapist_stats_stale():
+    """Record a write without refreshing; for writers that hold a session (the refresh needs its own)"""
+    global _stats_stale
+    with _stats_lock:
+        _stats_stale = True
+
+def flush_therapist_stats():
+    """Refresh the snapshot if writes happened since the last refresh"""
+    if _stats_stale:
+        refresh_therapist_stats(force=True)
+
+def load_therapist_stats():
+    """Read the TherapistStats snapshot as a dict, computing it first if it does not exist yet"""
+    def read(conn):
+        ensure_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute(STATS_SELECT_SQL, (STATS_SNAPSHOT_ID,))
+        row = cursor.fetchone()
+        cursor.close()
+        return dict(zip(STATS_COLUMNS, row)) if row else None
+
+    stats = run_in_db_session(read)
+    if stats is None and refresh_therapist_stats(force=True):
+        stats = run_in_db_session(read)
+    return stats
+
+# Volatile fields that must not influence change detection (url_slug is derived from the names)
+CONTENT_HASH_EXCLUDED_FIELDS = frozenset(('scraped_at', 'url_slug'))
+# List fields whose extractors dedupe through set(), so their order is not stable
+# between runs: hashed sorted. Every other list is hashed in order, so a reorder
+# counts as a change (merge_profile's ordered_union strategy keeps list order).
+CONTENT_HASH_UNORDERED_FIELDS = frozenset(('fsp_titles', 'billing', 'offer'))
+
+# Values _canonicalize_for_hash returns unchanged (exact types - subclasses take the slow path)
+_HASH_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+_HASH_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+
+def _canonicalize_for_hash(value):
+    """Normalize a value so equal content always serializes identically"""
+    if type(value) in _HASH_SCALAR_TYPES:
+        return value
+    if isinstance(value, dict):
+        return {str(k): _canonicalize_for_hash(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(type(item) is str for item in value):
+            return list(value)
+        return [_canonicalize_for_hash(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return _sorted_for_hash(_canonicalize_for_hash(v) for v in value)
+    return value
+
+def _sorted_for_hash(items):
+    """Sort canonical items when they are all strings (mixed items keep their order)"""
+    items = list(items)
+    if all(isinstance(item, str) for item in items):
+        items.sort()
+    return items
+
+@functools.lru_cache(maxsize=None)
+def content_hash_fields():
+    """The fields a content hash covers: the marker fields, the page's base fields and every extractor's field"""
+    fields = set(PsychologistRecord.FIELDS) | {'user', 'url'} | {extractor.field for extractor in PROFILE_EXTRACTORS}
+    return tuple(sorted(fields - CONTENT_HASH_EXCLUDED_FIELDS))
+
+def compute_content_hash(therapist):
+    """Stable SHA-256 over the extracted fields of a therapist record.
+
+    Only content_hash_fields() count, and a missing field, None and '' hash
+    alike: a raw snapshot marker (refresh) and the merge_profile() output of
+    the same content (overwrite, incremental) get the same hash.
+    """
+    import hashlib
+    payload = {}
+    for key in content_hash_fields():
+        value = therapist.get(key)
+        if value is not None and value != '':
+            value = _canonicalize_for_hash(value)
+            if key in CONTENT_HASH_UNORDERED_FIELDS and isinstance(value, list):
+                value = _sorted_for_hash(value)
+            payload[key] = value
+    canonical = _HASH_ENCODER.encode(payload)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def load_content_hashes(cursor):
+    """Load {psychologie_ch_id: content_hash} for all psychologie.ch rows in one query.
+
+    Soft-deleted rows map to None, so a profile that comes back is classified
+    'changed' (and written, which revives it) even if its content is identical.
+    """
+    cursor.execute('''
+        SELECT psychologie_ch_id, CASE WHEN deleted_at IS NULL THEN content_hash END
+        FROM "Therapist" WHERE psychologie_ch_id IS NOT NULL
+    ''')
+    return dict(cursor.fetchall())
+
+def classify_change(existing_hashes, psych_id, content_hash):
+    """Return 'new', 'changed' or 'unchanged' for a record against the stored hashes"""
+    psych_id = str(psych_id)
+    if psych_id not in existing_hashes:
+        return 'new'
+    if existing_hashes[psych_id] == content_hash:
+        return 'unchanged'
+    return 'changed'
+
+# Swiss canton mapping (ID -> Abbreviation) - CORRECTED
+CANTON_MAPPING = {
+    1: 'AG',   # Aargau (not Zurich!)
+    2: 'AI',   # Appenzell Innerrhoden
+    3: 'AR',   # Appenzell Ausserrhoden
+    4: 'BE',   # Bern
+    5: 'BL',   # Basel-Landschaft
+    6: 'BS',   # Basel-Stadt
+    7: 'FR',   # Fribourg (not Nidwalden!)
+    8: 'GE',   # Geneva
+    9: 'GL',   # Glarus
+    10: 'GR',  # Graubunden
+    11: 'JU',  # Jura
+    12: 'LU',  # Luzern
+    13: 'NE',  # Neuchatel
+    14: 'NW',  # Nidwalden
+    15: 'OW',  # Obwalden
+    16: 'SG',  # St. Gallen
+    17: 'SH',  # Schaffhausen
+    18: 'SO',  # Solothurn
+    19: 'SZ',  # Schwyz
+    20: 'TG',  # Thurgau
+    21: 'TI',  # Ticino
+    22: 'UR',  # Uri
+    23: 'VD',  # Vaud
+    24: 'VS',  # Valais
+    25: 'ZG',  # Zug (not Geneva!)
+    26: 'ZH'   # Zurich
+}
+
 def generate_therapist_id():
     """Generate an ID similar to existing Therapist table IDs"""
     prefix = "cmj"
@@ -163,7 +1263,15 @@ def generate_therapist_id():
     random_part = ''.join(random.choices(string.ascii_lowercase + string.digits, k=12))
     return f"{prefix}{timestamp_part}{random_part}"
 
-def map_therapist_to_db(therapist):
+ID_ALPHABET = string.ascii_lowercase + string.digits
+
+def generate_therapist_ids(count):
+    """Allocate count IDs at once (generate_therapist_id format, one timestamp part for the batch)"""
+    prefix = "cmjd" + str(int(datetime.now().timestamp() * 1000))[-6:]
+    random_part = ''.join(random.choices(ID_ALPHABET, k=12 * count))
+    return [prefix + random_part[start:start + 12] for start in range(0, 12 * count, 12)]
+
+def map_therapist_to_db(therapist, content_hash=None):
     """Map psychologie.ch therapist data to database columns - COMPREHENSIVE MAPPING"""
     db_record = {}
 
@@ -190,36 +1298,7 @@ def map_therapist_to_db(therapist):
     # Convert canton_id to canton name/abbreviation
     canton_id = therapist.get('canton_id')
     if canton_id is not None:
-        # Swiss canton mapping (ID -> Abbreviation) - CORRECTED
-        canton_mapping = {
-            1: 'AG',   # Aargau (not Zurich!)
-            2: 'AI',   # Appenzell Innerrhoden
-            3: 'AR',   # Appenzell Ausserrhoden
-            4: 'BE',   # Bern
-            5: 'BL',   # Basel-Landschaft
-            6: 'BS',   # Basel-Stadt
-            7: 'FR',   # Fribourg (not Nidwalden!)
-            8: 'GE',   # Geneva
-            9: 'GL',   # Glarus
-            10: 'GR',  # Graubunden
-            11: 'JU',  # Jura
-            12: 'LU',  # Luzern
-            13: 'NE',  # Neuchatel
-            14: 'NW',  # Nidwalden
-            15: 'OW',  # Obwalden
-            16: 'SG',  # St. Gallen
-            17: 'SH',  # Schaffhausen
-            18: 'SO',  # Solothurn
-            19: 'SZ',  # Schwyz
-            20: 'TG',  # Thurgau
-            21: 'TI',  # Ticino
-            22: 'UR',  # Uri
-            23: 'VD',  # Vaud
-            24: 'VS',  # Valais
-            25: 'ZG',  # Zug (not Geneva!)
-            26: 'ZH'   # Zurich
-        }
-        db_record['canton'] = canton_mapping.get(canton_id, f'Unknown({canton_id})')
+        db_record['canton'] = CANTON_MAPPING.get(canton_id, f'Unknown({canton_id})')
     else:
         db_record['canton'] = 'Unknown'
 
@@ -348,7 +1427,7 @@ def map_therapist_to_db(therapist):
     db_record['citySearchValue'] = therapist.get('city', '').lower()
 
     # Profile URL
-    db_record['url'] = therapist.get('url', f'https://www.psychologie.ch/en/psyfinder/{therapist.get("firstname", "").lower()}-{therapist.get("lastname", "").lower()}')
+    db_record['url'] = therapist.get('url', profile_url(f'{therapist.get("firstname", "").lower()}-{therapist.get("lastname", "").lower()}'))
 
     # Data source tracking
     db_record['dataSource'] = 'manual'  # Since 'psychologie.ch' is not a valid enum value
@@ -366,55 +1445,583 @@ def map_therapist_to_db(therapist):
     # Store full raw data as backup for future analysis
     db_record['raw_data'] = json.dumps(therapist)
 
+    # Content hash for change detection on the next run
+    db_record['content_hash'] = content_hash or compute_content_hash(therapist)
+
+    # A profile present in the current snapshot is never soft-deleted
+    db_record['deleted_at'] = None
+
     return db_record
 
 def insert_therapist_to_db(therapist):
-    """Insert a single therapist record into the database"""
+    """Insert a single therapist record into the database (skipped if its content is unchanged)"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        with db_session() as conn:
+            ensure_migrations(conn)
+            cursor = conn.cursor()
+
+            # Check if record exists
+            psych_id = str(therapist.get('id', ''))
+            cursor.execute('SELECT id, content_hash, deleted_at FROM "Therapist" WHERE psychologie_ch_id = %s', (psych_id,))
+            existing = cursor.fetchone()
+            content_hash = compute_content_hash(therapist)
+
+            if existing and existing[1] == content_hash and existing[2] is None:
+                # Nothing changed since the last run - don't touch the row
+                action = "unchanged"
+            elif existing:
+                # Update existing record
+                db_record = map_therapist_to_db(therapist, content_hash)
+                # Remove id from update (don't change the existing ID)
+                if 'id' in db_record:
+                    del db_record['id']
+
+                set_clause = ', '.join([f'"{col}" = %s' for col in db_record.keys()])
+                values = list(db_record.values()) + [existing[0]]
+
+                update_sql = f'UPDATE "Therapist" SET {set_clause} WHERE id = %s'
+                cursor.execute(update_sql, values)
+                sync_therapist_children(cursor, {existing[0]: build_therapist_children(db_record)})
+                action = "updated"
+            else:
+                # Insert new record
+                db_record = map_therapist_to_db(therapist, content_hash)
+                columns = list(db_record.keys())
+                values = list(db_record.values())
+                placeholders = ['%s'] * len(columns)
+
+                insert_sql = f'''
+                    INSERT INTO "Therapist" ({', '.join(f'"{col}"' for col in columns)})
+                    VALUES ({', '.join(placeholders)})
+                '''
+                cursor.execute(insert_sql, values)
+                sync_therapist_children(cursor, {db_record['id']: build_therapist_children(db_record)})
+                action = "inserted"
 
-        # Check if record exists
-        psych_id = str(therapist.get('id', ''))
-        cursor.execute('SELECT id FROM "Therapist" WHERE psychologie_ch_id = %s', (psych_id,))
-        existing = cursor.fetchone()
+            cursor.close()
 
-        if existing:
-            # Update existing record
-            db_record = map_therapist_to_db(therapist)
-            # Remove id from update (don't change the existing ID)
-            if 'id' in db_record:
-                del db_record['id']
+        return action
 
-            set_clause = ', '.join([f'"{col}" = %s' for col in db_record.keys()])
-            values = list(db_record.values()) + [existing[0]]
+    except Exception as e:
+        print(f"[ERROR] Database error for therapist {therapist.get('firstname')} {therapist.get('lastname')}: {e}")
+        return "error"
 
-            update_sql = f'UPDATE "Therapist" SET {set_clause} WHERE id = %s'
-            cursor.execute(update_sql, values)
-            action = "updated"
+# Fixed column order for batched writes (every key map_therapist_to_db can produce)
+THERAPIST_COLUMNS = (
+    'id', 'createdAt', 'updatedAt', 'firstName', 'lastName', 'street', 'city', 'canton', 'zip',
+    'lat', 'lng', 'phone', 'mobile', 'email', 'website', 'hasPicture', 'pictureUrl',
+    'professionalTitle1', 'professionalTitle2', 'practiceName', 'languages_spoken',
+    'specializations', 'services_offered', 'target_groups_json', 'billing_options', 'about_me',
+    'offersOnlineTherapy', 'offersVideoCall', 'online_availability', 'contactVerified',
+    'showPhone', 'showMobile', 'showFax', 'offersPhoneCall', 'onlineBookingConsultation',
+    'insuranceBasic', 'insuranceSelf', 'insuranceSupplementary', 'dataQualityScore',
+    'profileCompleteness', 'dataCompleteness', 'contactDataQuality', 'gender', 'role',
+    'specialization', 'trafficLight', 'citySearchValue', 'url', 'dataSource', 'externalId',
+    'psychologie_ch_id', 'psychologie_ch_user_id', 'scraped_at', 'raw_data', 'content_hash',
+    'deleted_at',
+)
+# Never overwritten on conflict
+THERAPIST_INSERT_ONLY_COLUMNS = frozenset(('id', 'createdAt'))
+
+THERAPIST_COLUMN_INDEX = {column: position for position, column in enumerate(THERAPIST_COLUMNS)}
+
+def db_record_to_row(db_record):
+    """Order a mapped record by THERAPIST_COLUMNS (missing optional columns become NULL)"""
+    return tuple(db_record.get(column) for column in THERAPIST_COLUMNS)
+
+def row_to_db_record(row):
+    """Inverse of db_record_to_row, for helpers that read mapped records by column name"""
+    return dict(zip(THERAPIST_COLUMNS, row))
+
+def map_therapists_to_rows(therapists, content_hashes=None, encode_json=True):
+    """Batch version of map_therapist_to_db returning THERAPIST_COLUMNS-ordered tuples.
+
+    Produces exactly db_record_to_row(map_therapist_to_db(therapist)), except
+    that IDs are allocated in bulk and the batch shares one createdAt/updatedAt.
+    content_hashes (aligned with therapists) skips recomputing known hashes.
+    encode_json=False leaves the list columns as lists and raw_data NULL (the
+    Parquet export, which never writes the rows).
+    The tuple below must follow THERAPIST_COLUMNS; benchmarks.py mapper checks it.
+    """
+    ids = generate_therapist_ids(len(therapists))
+    current_time = datetime.now()
+    canton_mapping = CANTON_MAPPING
+    dumps = json.dumps if encode_json else (lambda value: value)
+    rows = []
+
+    for position, therapist in enumerate(therapists):
+        get = therapist.get
+        canton_id = get('canton_id')
+        latitude = get('latitude')
+        longitude = get('longitude')
+        phone = get('phone')
+        mobile_phone = get('mobile_phone')
+        fsp_titles = get('fsp_titles', [])
+        languages = get('languages', [])
+        specialisations = get('specialisations', [])
+        offer = get('offer', [])
+        target_groups = get('target_groups', [])
+        billing = get('billing', [])
+        online_sessions = get('online_sessions', 'unavailable')
+        online = online_sessions == 'available'
+        scraped_at = get('scraped_at')
+        psych_id = str(get('id', ''))
+        content_hash = content_hashes[position] if content_hashes else None
+
+        if latitude:
+            try:
+                latitude = float(latitude)
+            except (ValueError, TypeError):
+                latitude = None
         else:
-            # Insert new record
-            db_record = map_therapist_to_db(therapist)
-            columns = list(db_record.keys())
-            values = list(db_record.values())
-            placeholders = ['%s'] * len(columns)
-
-            insert_sql = f'''
-                INSERT INTO "Therapist" ({', '.join(f'"{col}"' for col in columns)})
-                VALUES ({', '.join(placeholders)})
-            '''
-            cursor.execute(insert_sql, values)
-            action = "inserted"
-
+            latitude = None
+        if longitude:
+            try:
+                longitude = float(longitude)
+            except (ValueError, TypeError):
+                longitude = None
+        else:
+            longitude = None
+
+        rows.append((
+            ids[position], current_time, current_time,
+            get('firstname') or get('user', {}).get('firstname', 'Unknown'),
+            get('lastname') or get('user', {}).get('lastname', 'Unknown'),
+            get('address', ''),
+            get('city', 'Unknown'),
+            'Unknown' if canton_id is None else canton_mapping.get(canton_id, f'Unknown({canton_id})'),
+            get('zip', ''),
+            latitude, longitude,
+            get('phone', ''), get('mobile_phone', ''), get('email', ''), get('website', ''),
+            bool(get('profile_image_url')), get('profile_image_url', ''),
+            fsp_titles[0] if fsp_titles else None,
+            (fsp_titles[1] if len(fsp_titles) > 1 else '') if fsp_titles else None,
+            get('practice_name', get('name', '')),
+            dumps(languages) if languages else None,
+            dumps(specialisations) if specialisations else None,
+            dumps(offer) if offer else None,
+            dumps(target_groups) if target_groups else None,
+            dumps(billing) if billing else None,
+            get('about_me', ''),
+            online, online, online_sessions,
+            False, bool(phone), bool(mobile_phone), False, bool(phone), False,
+            True, True, True,
+            9, 95, 95, 'verified_generic', 'unknown', 'therapist',
+            get('practice_name', 'Psychology'), 1, get('city', '').lower(),
+            get('url', profile_url(f'{get("firstname", "").lower()}-{get("lastname", "").lower()}')),
+            'manual', psych_id, psych_id, str(get('user_id', '')),
+            datetime.fromtimestamp(scraped_at) if scraped_at else None,
+            dumps(therapist) if encode_json else None,
+            content_hash or compute_content_hash(therapist),
+            None,
+        ))
+    return rows
+
+def _build_upsert_sql(skip_unchanged=True):
+    columns = ', '.join(f'"{col}"' for col in THERAPIST_COLUMNS)
+    updates = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in THERAPIST_COLUMNS
+                        if col not in THERAPIST_INSERT_ONLY_COLUMNS)
+    condition = '''
+        WHERE "Therapist".content_hash IS DISTINCT FROM EXCLUDED.content_hash
+           OR "Therapist".deleted_at IS NOT NULL''' if skip_unchanged else ''
+    return f'''
+        INSERT INTO "Therapist" ({columns})
+        VALUES %s
+        ON CONFLICT (psychologie_ch_id) DO UPDATE SET {updates}{condition}
+        RETURNING id, psychologie_ch_id, (xmax = 0) AS inserted
+    '''
+
+UPSERT_THERAPISTS_SQL = _build_upsert_sql()
+UPSERT_ALL_THERAPISTS_SQL = _build_upsert_sql(skip_unchanged=False)
+
+def upsert_therapists_sql():
+    """The upsert statement for the SKIP_UNCHANGED_CONTENT setting"""
+    return UPSERT_THERAPISTS_SQL if SETTINGS['SKIP_UNCHANGED_CONTENT'] else UPSERT_ALL_THERAPISTS_SQL
+
+def _upsert_rows(conn, rows, therapists, children, merge_rows, counts, failures):
+    """Upsert rows in one statement; on failure bisect until the bad rows are isolated.
+
+    children maps psychologie_ch_id to build_therapist_children() output; child
+    rows and DataMerge rows are only written for the rows that were actually
+    inserted or updated.
+    """
+    from psycopg2.extras import execute_values
+    cursor = conn.cursor()
+    try:
+        returned = execute_values(cursor, upsert_therapists_sql(), rows, page_size=len(rows), fetch=True)
+        sync_therapist_children(cursor, {therapist_id: children[psych_id] for therapist_id, psych_id, _ in returned})
+        insert_data_merges(cursor, [merge_rows.get(psych_id) for _, psych_id, _ in returned])
         conn.commit()
+    except Exception as e:
+        if isinstance(e, db_disconnect_errors()) and conn.closed:
+            # Lost the connection, not a bad row - let the caller reconnect and retry
+            raise
+        conn.rollback()
+        if len(rows) == 1:
+            failures.append((therapists[0], e))
+            return
+        middle = len(rows) // 2
+        _upsert_rows(conn, rows[:middle], therapists[:middle], children, merge_rows, counts, failures)
+        _upsert_rows(conn, rows[middle:], therapists[middle:], children, merge_rows, counts, failures)
+        return
+    finally:
         cursor.close()
-        conn.close()
 
-        return action
+    counts['written'].extend(psych_id for _, psych_id, _ in returned)
+    inserted = sum(1 for _, _, was_inserted in returned if was_inserted)
+    counts['inserted'] += inserted
+    counts['updated'] += len(returned) - inserted
+    # Rows whose content hash matched were filtered by the WHERE clause
+    counts['unchanged'] += len(rows) - len(returned)
+
+def bulk_upsert_therapists(therapists, batch_size=None, conn=None, written_ids=None, merge_rows=None):
+    """Upsert therapists in batches of INSERT ... ON CONFLICT (psychologie_ch_id).
+
+    Returns (counts, failures) where failures is a list of (therapist, error)
+    for the rows that still failed after bisecting their batch. If given,
+    written_ids collects the psychologie_ch_id of every inserted/updated row,
+    and merge_rows ({psychologie_ch_id: merge_profile() row}) are recorded in
+    DataMerge for the rows that were actually written.
+    """
+    batch_size = batch_size or SETTINGS['DB_BATCH_SIZE']
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    failures = []
+
+    for start in range(0, len(therapists), batch_size):
+        batch = therapists[start:start + batch_size]
+        map_started = time.perf_counter()
+        rows = map_therapists_to_rows(batch)
+        psych_id_position = THERAPIST_COLUMN_INDEX['psychologie_ch_id']
+        children = {row[psych_id_position]: build_therapist_children(row_to_db_record(row)) for row in rows}
+        write_started = time.perf_counter()
+        record_batch_time('map', write_started - map_started)
+
+        def write_batch(conn):
+            # Counts are only merged once the batch went through, so a retried batch isn't counted twice
+            batch_counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'written': []}
+            batch_failures = []
+            ensure_migrations(conn)
+            _upsert_rows(conn, rows, batch, children, merge_rows or {}, batch_counts, batch_failures)
+            return batch_counts, batch_failures
+
+        if conn is not None:
+            batch_counts, batch_failures = write_batch(conn)
+        else:
+            batch_counts, batch_failures = run_in_db_session(write_batch)
+        batch_written = batch_counts.pop('written')
+        record_batch_time('db_upsert', time.perf_counter() - write_started, dict(batch_counts, error=len(batch_failures)))
+        if batch_written and conn is None:
+            refresh_therapist_stats()
+        if written_ids is not None:
+            written_ids.extend(batch_written)
+        for key, value in batch_counts.items():
+            counts[key] += value
+        failures.extend(batch_failures)
+
+    counts['error'] = len(failures)
+    return counts, failures
+
+INSERT_THERAPISTS_SQL = f'''
+    INSERT INTO "Therapist" ({', '.join(f'"{col}"' for col in THERAPIST_COLUMNS)})
+    VALUES %s
+'''
+
+def replace_therapists_batch(db_records, merge_rows=None):
+    """Replace a batch of therapists by URL in one transaction.
+
+    Deletes every row holding one of the batch URLs (any dataSource) or one of
+    its psychologie.ch ids with a single DELETE ... ANY, then bulk-inserts the
+    batch. If that fails, each record is retried under its own savepoint so
+    one bad row does not abort the rest. merge_rows (aligned with db_records,
+    None entries allowed) are written to DataMerge with their rows.
+    Returns (replaced_urls, failures) with failures as (index, error) pairs.
+    """
+    rows = [db_record_to_row(db_record) for db_record in db_records]
+    urls = [db_record['url'] for db_record in db_records]
+    psych_ids = [db_record['psychologie_ch_id'] for db_record in db_records]
+    children = [build_therapist_children(db_record) for db_record in db_records]
+    merge_rows = merge_rows or [None] * len(db_records)
+
+    def write(conn):
+        from psycopg2.extras import execute_values
+        cursor = conn.cursor()
+        cursor.execute('SAVEPOINT replace_batch')
+        try:
+            cursor.execute('DELETE FROM "Therapist" WHERE url = ANY(%s) OR psychologie_ch_id = ANY(%s) RETURNING url',
+                           (urls, psych_ids))
+            replaced = {row[0] for row in cursor.fetchall()}
+            execute_values(cursor, INSERT_THERAPISTS_SQL, rows, page_size=len(rows))
+            # Replaced rows took their child rows with them (ON DELETE CASCADE)
+            sync_therapist_children(cursor, {db_record['id']: children[index] for index, db_record in enumerate(db_records)})
+            insert_data_merges(cursor, merge_rows)
+            cursor.execute('RELEASE SAVEPOINT replace_batch')
+            cursor.close()
+            return replaced, []
+        except Exception:
+            if conn.closed:
+                raise
+            cursor.execute('ROLLBACK TO SAVEPOINT replace_batch')
+
+        # Slow path: isolate the failing rows, keep everything else in this transaction
+        replaced = set()
+        failures = []
+        for index, row in enumerate(rows):
+            cursor.execute('SAVEPOINT replace_row')
+            try:
+                cursor.execute('DELETE FROM "Therapist" WHERE url = %s OR psychologie_ch_id = %s RETURNING url',
+                               (urls[index], psych_ids[index]))
+                replaced.update(r[0] for r in cursor.fetchall())
+                execute_values(cursor, INSERT_THERAPISTS_SQL, [row])
+                sync_therapist_children(cursor, {db_records[index]['id']: children[index]})
+                insert_data_merges(cursor, [merge_rows[index]])
+                cursor.execute('RELEASE SAVEPOINT replace_row')
+            except Exception as e:
+                if conn.closed:
+                    raise
+                cursor.execute('ROLLBACK TO SAVEPOINT replace_row')
+                failures.append((index, e))
+        cursor.close()
+        return replaced, failures
 
-    except Exception as e:
-        print(f"[ERROR] Database error for therapist {therapist.get('firstname')} {therapist.get('lastname')}: {e}")
-        return "error"
+    started = time.perf_counter()
+    replaced, failures = run_in_db_session(write)
+    record_batch_time('db_replace', time.perf_counter() - started,
+                      {'inserted': len(rows) - len(failures), 'error': len(failures)})
+    refresh_therapist_stats()
+    return replaced, failures
+
+# =============================================================================
+# WRITE SINKS (psycopg2 / psycopg 3 pipeline)
+# =============================================================================
+
+# A sink takes batches of merged profiles from a scrape loop: submit(therapists, merge_rows, on_batch)
+# and close(). on_batch(therapists, outcome) receives {'counts', 'failures', 'written_ids', 'seconds'}
+# like bulk_upsert_therapists, or {'error': exception} when the batch could not be written at all.
+
+# Bind parameters per statement are limited to 65535 by the wire protocol
+PIPELINE_MAX_PARAMETERS = 65535
+
+class Psycopg2Sink:
+    """Synchronous sink: every batch is written with bulk_upsert_therapists before submit() returns"""
+
+    name = 'psycopg2'
+
+    def submit(self, therapists, merge_rows, on_batch):
+        started = time.perf_counter()
+        written_ids = []
+        try:
+            counts, failures = bulk_upsert_therapists(therapists, written_ids=written_ids, merge_rows=merge_rows)
+        except Exception as e:
+            on_batch(therapists, {'error': e})
+            return
+        on_batch(therapists, {'counts': counts, 'failures': failures, 'written_ids': written_ids,
+                              'seconds': time.perf_counter() - started})
+
+    def close(self):
+        pass
+
+def _build_pipeline_upsert_sql(row_count):
+    """One statement per batch: the upsert plus child rows and DataMerge history as data-modifying CTEs.
+
+    Everything that depends on the upserted ids is resolved server-side, so a
+    batch needs no round trip of its own and many batches can be in flight.
+    Changed child values are updated in place instead of delete + insert.
+    """
+    row_placeholder = '(' + ', '.join(['%s'] * len(THERAPIST_COLUMNS)) + ')'
+    upsert = upsert_therapists_sql().replace('VALUES %s', 'VALUES ' + ', '.join([row_placeholder] * row_count))
+    ctes = [f'upserted AS ({upsert})']
+    for position, (table, key_column, value_columns) in enumerate(THERAPIST_CHILD_TABLES):
+        columns = ', '.join(f'"{col}"' for col in value_columns)
+        column_types = ', '.join(f'"{col}" text' for col in value_columns)
+        ctes.append(f'''
+            children_{position} AS (
+                SELECT * FROM jsonb_to_recordset(%s::jsonb) AS x(id text, psych_id text, "{key_column}" text, {column_types})
+            )''')
+        ctes.append(f'''
+            stale_{position} AS (
+                DELETE FROM "{table}" c USING upserted u
+                WHERE c."therapistId" = u.id AND NOT EXISTS (
+                    SELECT 1 FROM children_{position} x
+                    WHERE x.psych_id = u.psychologie_ch_id AND x."{key_column}" = c."{key_column}")
+            )''')
+        ctes.append(f'''
+            new_{position} AS (
+                INSERT INTO "{table}" (id, "therapistId", "{key_column}", {columns})
+                SELECT x.id, u.id, x."{key_column}", {', '.join(f'x."{col}"' for col in value_columns)}
+                FROM children_{position} x JOIN upserted u ON u.psychologie_ch_id = x.psych_id
+                ON CONFLICT ("therapistId", "{key_column}") DO UPDATE
+                SET {', '.join(f'"{col}" = EXCLUDED."{col}"' for col in value_columns)}
+                WHERE ({', '.join(f'"{table}"."{col}"' for col in value_columns)})
+                      IS DISTINCT FROM ({', '.join(f'EXCLUDED."{col}"' for col in value_columns)})
+            )''')
+    ctes.append('''
+        merges AS (
+            INSERT INTO "DataMerge" (id, "therapistId", "sourceData", "mergedData", conflicts, "mergeStrategy",
+                                     "qualityImprovement", "createdBy")
+            SELECT x.id, u.id, x.source_data::jsonb, x.merged_data::jsonb, x.conflicts::jsonb, x.strategy, x.quality, 'scraper'
+            FROM jsonb_to_recordset(%s::jsonb) AS x(id text, psych_id text, source_data text, merged_data text,
+                                                    conflicts text, strategy text, quality double precision)
+            JOIN upserted u ON u.psychologie_ch_id = x.psych_id
+        )''')
+    return 'WITH ' + ',\n'.join(ctes) + '\nSELECT id, psychologie_ch_id, inserted FROM upserted'
+
+def _pipeline_batch_params(therapists, merge_rows):
+    """Bind parameters of _build_pipeline_upsert_sql() for one batch"""
+    rows = map_therapists_to_rows(therapists)
+    db_records = [row_to_db_record(row) for row in rows]
+    params = [value for row in rows for value in row]
+    child_rows = [[] for _ in THERAPIST_CHILD_TABLES]
+    for db_record in db_records:
+        for position, child_set in enumerate(build_therapist_children(db_record)):
+            value_columns = THERAPIST_CHILD_TABLES[position][2]
+            key_column = THERAPIST_CHILD_TABLES[position][1]
+            for key, values in child_set.items():
+                row = {'id': generate_therapist_id(), 'psych_id': db_record['psychologie_ch_id'], key_column: key}
+                row.update(zip(value_columns, values))
+                child_rows[position].append(row)
+    params.extend(json.dumps(rows) for rows in child_rows)
+    merge_columns = ('psych_id', 'source_data', 'merged_data', 'conflicts', 'strategy', 'quality')
+    merges = [dict(zip(merge_columns, merge_rows[db_record['psychologie_ch_id']]), id=generate_therapist_id())
+              for db_record in db_records if merge_rows.get(db_record['psychologie_ch_id'])]
+    params.append(json.dumps(merges))
+    return params
+
+class PipelineSink:
+    """Asynchronous sink: a writer thread streams batches over one psycopg 3 connection in pipeline mode.
+
+    submit() only queues the batch (blocking when PIPELINE_MAX_IN_FLIGHT batches
+    are already waiting), so the scrape loop never waits on a round trip. The
+    writer sends each batch as one autocommitted statement followed by a Sync
+    and collects the results once PIPELINE_MAX_IN_FLIGHT batches are out or
+    nothing else is queued. A batch that fails (or whose result is lost with
+    the connection) is written again through bulk_upsert_therapists, which
+    isolates the bad rows. on_batch runs on the writer thread.
+    """
+
+    name = 'pipeline'
+
+    def __init__(self, psycopg_module):
+        import psycopg2.extensions
+        self.psycopg = psycopg_module
+        self.max_in_flight = max(1, SETTINGS['PIPELINE_MAX_IN_FLIGHT'])
+        self.max_rows = PIPELINE_MAX_PARAMETERS // (len(THERAPIST_COLUMNS) + 1)
+        self._sql = {}  # row count -> statement
+        self._queue = Queue(maxsize=self.max_in_flight)
+        run_in_db_session(ensure_migrations)
+        self._conn = self.psycopg.connect(
+            psycopg2.extensions.make_dsn(**SETTINGS['DB_CONFIG']),
+            autocommit=True,
+            connect_timeout=SETTINGS['DB_CONNECT_TIMEOUT_SECONDS'],
+            options=f"-c statement_timeout={SETTINGS['DB_STATEMENT_TIMEOUT_MS']}",
+        )
+        self._thread = threading.Thread(target=self._run, name='pipeline-sink', daemon=True)
+        self._thread.start()
+
+    def submit(self, therapists, merge_rows, on_batch):
+        for start in range(0, len(therapists), self.max_rows):
+            self._queue.put((therapists[start:start + self.max_rows], dict(merge_rows), on_batch))
+
+    def close(self):
+        """Wait until every submitted batch has been written and reported"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _statement(self, row_count):
+        if row_count not in self._sql:
+            self._sql[row_count] = _build_pipeline_upsert_sql(row_count)
+        return self._sql[row_count]
+
+    def _run(self):
+        in_flight = []  # (batch, cursor, started)
+        done = False
+        try:
+            with self._conn, self._conn.pipeline() as pipeline:
+                while not done:
+                    batch = self._queue.get()
+                    if batch is None:
+                        done = True
+                    elif self._conn.closed:
+                        self._fallback(batch)
+                    else:
+                        cursor = self._conn.cursor()
+                        started = time.perf_counter()
+                        # Errors raised here belong to earlier batches' results - every batch is checked when
+                        # collected. The Sync must still go out so each batch stays its own implicit transaction.
+                        try:
+                            cursor.execute(self._statement(len(batch[0])), _pipeline_batch_params(batch[0], batch[1]))
+                        except self.psycopg.Error:
+                            pass
+                        try:
+                            pipeline.sync()
+                        except self.psycopg.Error:
+                            pass
+                        in_flight.append((batch, cursor, started))
+                    if in_flight and (done or len(in_flight) >= self.max_in_flight or self._queue.empty()):
+                        self._collect(in_flight)
+        except self.psycopg.Error as e:
+            print(f"[DB ERROR] Pipeline connection failed: {e}")
+        # Batches whose outcome is unknown after a lost connection, then anything still queued
+        for batch, _, _ in in_flight:
+            self._fallback(batch)
+        while not done:
+            batch = self._queue.get()
+            done = batch is None
+            if not done:
+                self._fallback(batch)
+
+    def _collect(self, in_flight):
+        """Wait for the results of the in-flight batches and report them in submission order.
+
+        Reported batches are removed from in_flight; on a lost connection the
+        rest stays there for the caller to write through the fallback.
+        """
+        while in_flight:
+            batch, cursor, started = in_flight[0]
+            therapists, merge_rows, on_batch = batch
+            try:
+                returned = cursor.fetchall()
+            except self.psycopg.Error:
+                # fetchall() raises the first error of everything it received - results are only
+                # attached to the cursors whose statement succeeded
+                returned = cursor.fetchall() if cursor.pgresult is not None else None
+            if returned is None:
+                if self._conn.closed:
+                    raise self.psycopg.OperationalError("connection lost while collecting pipeline results")
+                in_flight.pop(0)
+                self._fallback(batch)
+                continue
+            in_flight.pop(0)
+            inserted = sum(1 for _, _, was_inserted in returned if was_inserted)
+            counts = {'inserted': inserted, 'updated': len(returned) - inserted,
+                      'unchanged': len(therapists) - len(returned), 'error': 0}
+            seconds = time.perf_counter() - started
+            record_batch_time('db_pipeline', seconds, counts)
+            on_batch(therapists, {'counts': counts, 'failures': [], 'written_ids': [row[1] for row in returned],
+                                  'seconds': seconds})
+            if returned:
+                refresh_therapist_stats()
+
+    def _fallback(self, batch):
+        therapists, merge_rows, on_batch = batch
+        Psycopg2Sink().submit(therapists, merge_rows, on_batch)
+
+def get_write_sink(kind=None):
+    """Create the write sink named by DB_WRITE_SINK ('psycopg2' or 'pipeline')"""
+    kind = kind or SETTINGS['DB_WRITE_SINK']
+    if kind == 'pipeline':
+        try:
+            import psycopg
+        except ImportError:
+            print("[WARN] psycopg 3 is required for the pipeline sink (pip install 'psycopg[binary]') - using psycopg2")
+            return Psycopg2Sink()
+        try:
+            return PipelineSink(psycopg)
+        except psycopg.Error as e:
+            print(f"[WARN] Could not open the pipeline connection ({e}) - using psycopg2")
+            return Psycopg2Sink()
+    if kind != 'psycopg2':
+        print(f"[WARN] Unknown DB_WRITE_SINK '{kind}' - using psycopg2")
+    return Psycopg2Sink()
 
 def scrape_and_overwrite_database():
     """Scrape all psychologie.ch profiles and replace conflicting records by URL"""
@@ -425,69 +2032,104 @@ def scrape_and_overwrite_database():
     print("1. Keep all records from other data sources (doc24, wepractice, manual)")
     print("2. REPLACE psychologie.ch records that have URL conflicts")
     print("3. Scrape therapist profiles ONE BY ONE from psychologie.ch")
-    print("4. For each profile: DELETE existing record with same URL, then INSERT new one")
+    print(f"4. Every {SETTINGS['DB_BATCH_SIZE']} profiles: DELETE existing records with the same URLs, then INSERT the batch")
     print("5. Show errors immediately - you can monitor and stop if needed")
     print("6. This process can take several hours!")
     print("!"*70)
 
-    confirm = input("\nAre you SURE you want to continue? Type 'YES' to proceed: ").strip()
-    if confirm != 'YES':
+    if not confirm_operation("\nAre you SURE you want to continue? Type 'YES' to proceed: "):
         print("[CANCELLED] Operation cancelled by user")
-        return
+        return None
 
     print("\n[+] Starting scrape and overwrite process...")
+    telemetry = start_run_telemetry('replace')
 
     try:
-        # Connect to database for real-time operations
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        conn.commit()
+        # Step 1: Load stored content hashes so unchanged profiles skip all writes
+        print("\n[*] STEP 1: Loading content hashes of existing psychologie.ch records...")
+        with db_session() as conn:
+            ensure_migrations(conn)
+            existing_hashes = load_content_hashes(conn.cursor())
+        print(f"[+] Loaded {len(existing_hashes)} stored hashes")
 
-        # Step 2: Scrape and import profiles one by one
-        print("\n[*] STEP 2: Scraping and importing profiles immediately...")
+        # Step 2: Scrape profiles one by one and import them in batched transactions
+        print("\n[*] STEP 2: Scraping and importing profiles in batches...")
 
         # Load psychologists data
-        psychologists = extract_psychologists_from_json('data/psychologie.ch.json')
+        psychologists = select_markers(extract_psychologists_from_json('data/psychologie.ch.json'))
+        if SETTINGS['MAX_PROFILES_TO_SCRAPE'] is not None and len(psychologists) > SETTINGS['MAX_PROFILES_TO_SCRAPE']:
+            print(f"Limiting to {SETTINGS['MAX_PROFILES_TO_SCRAPE']} profiles (set MAX_PROFILES_TO_SCRAPE = None for all)")
+            psychologists = psychologists[:SETTINGS['MAX_PROFILES_TO_SCRAPE']]
 
         successful_scrapes = 0
         successful_inserts = 0
         failed_scrapes = 0
         failed_inserts = 0
+        change_counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        visits = {}  # ('profile', psychologie_ch_id) -> content changed, for the recrawl history
 
-        print(f"Starting scrape of ALL {len(psychologists)} profiles...")
-        print("Each profile will be scraped and immediately imported to database.")
+        print(f"Starting scrape of {len(psychologists)} profiles...")
+        print(f"Profiles are written in transactions of {SETTINGS['DB_BATCH_SIZE']} (or every "
+              f"{SETTINGS['DB_FLUSH_INTERVAL_SECONDS']}s).")
         print("Progress will be shown every 10 profiles.")
-        print("Each insert uses its own transaction - one failure won't stop others.")
+        print("Each row uses its own savepoint - one failure won't stop the others in its batch.")
+
+        pending = []  # (psych, db_record, change, merge_row) waiting for the next batch
+        batch_started = time.time()
+
+        def flush_batch():
+            """Write the pending profiles in one transaction and report per-profile results"""
+            nonlocal successful_inserts, failed_inserts, batch_started
+            if not pending:
+                return
+            write_started = time.perf_counter()
+            try:
+                replaced, failures = replace_therapists_batch([entry[1] for entry in pending],
+                                                              merge_rows=[entry[3] for entry in pending])
+            except Exception as e:
+                # Connection could not be recovered - every profile of the batch failed
+                replaced, failures = set(), [(index, e) for index in range(len(pending))]
+            telemetry.record_db_write(len(pending) - len(failures), time.perf_counter() - write_started)
+
+            failed_indexes = {index for index, _ in failures}
+            for index, error in failures:
+                failed_psych = pending[index][0]
+                failed_inserts += 1
+                telemetry.count(pending[index][1]['canton'], 'errors')
+                log.error("[DB ERROR] Failed to insert %s %s: %s", failed_psych['firstname'], failed_psych['lastname'], error,
+                          extra={'record_id': failed_psych['id']})
+
+                # Save failed URL construction for DB insertion failures too
+                save_failed_url_construction(
+                    'data/failed_url_constructions.json', failed_psych['id'], failed_psych.get('user_id'),
+                    failed_psych['firstname'], failed_psych['lastname'],
+                    failed_psych['url_slug'], profile_url(failed_psych['url_slug']),
+                    f"Database insertion failed: {str(error)[:100]}"
+                )
+
+            for index, (written_psych, db_record, change, _) in enumerate(pending):
+                if index in failed_indexes:
+                    continue
+                successful_inserts += 1
+                change_counts[change] += 1
+                telemetry.count(db_record['canton'], 'saved')
+                existing_hashes[str(written_psych['id'])] = db_record['content_hash']
+                if db_record['url'] in replaced:
+                    log.info("[REPLACE] Replaced existing record for %s %s", written_psych['firstname'],
+                             written_psych['lastname'], extra={'record_id': written_psych['id']})
+
+            pending.clear()
+            batch_started = time.time()
 
         for i, psych in enumerate(psychologists):
             if (i + 1) % 10 == 0:
-                print(f"Progress: {i+1}/{len(psychologists)} ({(i+1)/len(psychologists)*100:.1f}%) | "
-                      f"Scraped: {successful_scrapes} | Inserted: {successful_inserts} | "
-                      f"Failed: {failed_scrapes + failed_inserts}")
-
-            # Create URL slug
-            def normalize_for_url(text):
-                text = text.lower().replace(' ', '-')
-                char_map = {
-                    'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss',
-                    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'å': 'a',
-                    'ç': 'c', 'ć': 'c', 'č': 'c',
-                    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-                    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-                    'ñ': 'n', 'ń': 'n',
-                    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o',
-                    'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-                    'ý': 'y', 'ÿ': 'y',
-                    'ż': 'z', 'ź': 'z', 'ž': 'z'
-                }
-                for special, normal in char_map.items():
-                    text = text.replace(special, normal)
-                text = re.sub(r'[^\w\-]', '', text)
-                return text
-
-            firstname_slug = normalize_for_url(psych['firstname'].strip())
-            lastname_slug = normalize_for_url(psych['lastname'].strip())
-            url_slug = f"{firstname_slug}-{lastname_slug}"
+                log.info("Progress: %d/%d (%.1f%%) | Scraped: %d | Inserted: %d | Unchanged: %d | Failed: %d",
+                         i + 1, len(psychologists), (i + 1) / len(psychologists) * 100, successful_scrapes,
+                         successful_inserts, change_counts['unchanged'], failed_scrapes + failed_inserts)
+
+            url_slug = psych['url_slug']
+            canton = marker_canton(psych)
+            telemetry.count(canton, 'fetched')
 
             # Scrape profile
             result = scrape_profile_page(
@@ -499,65 +2141,34 @@ def scrape_and_overwrite_database():
             )
 
             if result:
-                # Merge data
-                merged_data = psych.copy()
-                for key, value in result.items():
-                    if key not in merged_data or not merged_data[key]:
-                        merged_data[key] = value
+                # Merge data field by field
+                merged_data, merge_row = merge_profile(psych, result)
                 merged_data['scraped_at'] = time.time()
 
-                # Immediately insert/replace in database (each operation in its own transaction)
-                try:
-                    db_record = map_therapist_to_db(merged_data)
-                    therapist_url = db_record['url']
-
-                    # Start a new transaction for this operation
-                    conn.rollback()  # Clear any aborted transaction state
-
-                    # DELETE existing record with same URL (from any dataSource)
-                    cursor.execute('DELETE FROM "Therapist" WHERE url = %s', (therapist_url,))
-                    deleted_for_this_record = cursor.rowcount
-
-                    # INSERT the new psychologie.ch record
-                    columns = list(db_record.keys())
-                    values = list(db_record.values())
-                    placeholders = ['%s'] * len(columns)
-
-                    insert_sql = f'''
-                        INSERT INTO "Therapist" ({', '.join(f'"{col}"' for col in columns)})
-                        VALUES ({', '.join(placeholders)})
-                    '''
-
-                    cursor.execute(insert_sql, values)
-                    conn.commit()  # Commit this specific insert/replace operation
-
-                    successful_inserts += 1
+                # Skip mapping and all writes when the extracted content is unchanged
+                content_hash = compute_content_hash(merged_data)
+                change = classify_change(existing_hashes, psych['id'], content_hash)
+                telemetry.record_cache(change == 'unchanged')
+                visits[('profile', str(psych['id']))] = change == 'changed'
+                if change == 'unchanged' and SETTINGS['SKIP_UNCHANGED_CONTENT']:
+                    change_counts['unchanged'] += 1
+                    telemetry.count(canton, 'skipped')
                     successful_scrapes += 1
+                    time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
+                    continue
 
-                    if deleted_for_this_record > 0:
-                        print(f"[REPLACE] Replaced existing record for {psych['firstname']} {psych['lastname']}")
-
-                except Exception as e:
-                    failed_inserts += 1
-                    conn.rollback()  # Rollback on failure to clear transaction state
-                    print(f"[DB ERROR] Failed to insert {psych['firstname']} {psych['lastname']}: {e}")
-
-                    # Save failed URL construction for DB insertion failures too
-                    failed_url_file = 'data/failed_url_constructions.json'
-                    constructed_url = f"https://www.psychologie.ch/en/psyfinder/{url_slug}"
-                    error_reason = f"Database insertion failed: {str(e)[:100]}"
-                    save_failed_url_construction(
-                        failed_url_file, psych['id'], psych.get('user_id'),
-                        psych['firstname'], psych['lastname'],
-                        url_slug, constructed_url, error_reason
-                    )
+                # Queue for the next batched replace
+                successful_scrapes += 1
+                pending.append((psych, map_therapist_to_db(merged_data, content_hash), change, merge_row))
             else:
                 failed_scrapes += 1
-                print(f"[SCRAPE FAILED] {psych['firstname']} {psych['lastname']} (ID: {psych['id']})")
+                telemetry.count(canton, 'errors')
+                log.warning("[SCRAPE FAILED] %s %s (ID: %s)", psych['firstname'], psych['lastname'], psych['id'],
+                            extra={'record_id': psych['id']})
 
                 # Save failed URL construction for later analysis
                 failed_url_file = 'data/failed_url_constructions.json'
-                constructed_url = f"https://www.psychologie.ch/en/psyfinder/{url_slug}"
+                constructed_url = profile_url(url_slug)
                 error_reason = "Scraping failed - URL construction or page access issue"
                 save_failed_url_construction(
                     failed_url_file, psych['id'], psych.get('user_id'),
@@ -565,9 +2176,18 @@ def scrape_and_overwrite_database():
                     url_slug, constructed_url, error_reason
                 )
 
+            if (len(pending) >= SETTINGS['DB_BATCH_SIZE'] or
+                    (pending and time.time() - batch_started > SETTINGS['DB_FLUSH_INTERVAL_SECONDS'])):
+                flush_batch()
+
             # Rate limiting
             time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
 
+        flush_batch()
+        record_recrawl_visits(visits)
+        finish_run_telemetry('completed')
+        flush_logging()
+
         # Summary
         print("\n" + "="*60)
         print("SELECTIVE REPLACE PSYCHOLOGIE.CH DATA - COMPLETED!")
@@ -577,19 +2197,27 @@ def scrape_and_overwrite_database():
         print(f"[+] Successfully inserted/replaced: {successful_inserts}")
         print(f"[+] Failed scrapes: {failed_scrapes}")
         print(f"[+] Failed DB operations: {failed_inserts}")
+        print(f"[+] New: {change_counts['new']} | Changed: {change_counts['changed']} | "
+              f"Unchanged (skipped): {change_counts['unchanged']}")
 
         # Show final database composition
-        cursor.execute('SELECT "dataSource", COUNT(*) FROM "Therapist" GROUP BY "dataSource" ORDER BY COUNT(*) DESC')
-        sources = cursor.fetchall()
+        with db_session() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT "dataSource", COUNT(*) FROM "Therapist" GROUP BY "dataSource" ORDER BY COUNT(*) DESC')
+            sources = cursor.fetchall()
+            cursor.close()
         print(f"[+] Final database composition:")
         for source, count in sources:
             print(f"  - {source or 'psychologie.ch'}: {count} records")
         print("="*60)
+        return {'profiles': len(psychologists), 'scraped': successful_scrapes, 'written': successful_inserts,
+                'failed_scrapes': failed_scrapes, 'failed_writes': failed_inserts, 'changes': change_counts}
 
-        cursor.close()
-        conn.close()
-
+    except KeyboardInterrupt:
+        finish_run_telemetry('interrupted')
+        raise
     except Exception as e:
+        finish_run_telemetry('failed', str(e)[:500])
         print(f"[ERROR] Scrape and overwrite failed: {e}")
         import traceback
         traceback.print_exc()
@@ -613,32 +2241,10 @@ def scrape_all_profiles():
 
         for i, psych in enumerate(psychologists):
             if (i + 1) % 10 == 0:
-                print(f"Progress: {i+1}/{len(psychologists)} ({(i+1)/len(psychologists)*100:.1f}%) | Success: {successful} | Failed: {failed}")
-
-            # Create URL slug
-            def normalize_for_url(text):
-                text = text.lower().replace(' ', '-')
-                char_map = {
-                    'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss',
-                    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'å': 'a',
-                    'ç': 'c', 'ć': 'c', 'č': 'c',
-                    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-                    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-                    'ñ': 'n', 'ń': 'n',
-                    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o',
-                    'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-                    'ý': 'y', 'ÿ': 'y',
-                    'ż': 'z', 'ź': 'z', 'ž': 'z'
-                }
-                for special, normal in char_map.items():
-                    text = text.replace(special, normal)
-                text = re.sub(r'[^\w\-]', '', text)
-                return text
-
-            firstname_slug = normalize_for_url(psych['firstname'].strip())
-            lastname_slug = normalize_for_url(psych['lastname'].strip())
-
-            url_slug = f"{firstname_slug}-{lastname_slug}"
+                log.info("Progress: %d/%d (%.1f%%) | Success: %d | Failed: %d", i + 1, len(psychologists),
+                         (i + 1) / len(psychologists) * 100, successful, failed)
+
+            url_slug = psych['url_slug']
 
             # Scrape profile
             result = scrape_profile_page(
@@ -650,11 +2256,8 @@ def scrape_all_profiles():
             )
 
             if result:
-                # Merge data
-                merged_data = psych.copy()
-                for key, value in result.items():
-                    if key not in merged_data or not merged_data[key]:
-                        merged_data[key] = value
+                # Merge data field by field
+                merged_data, _ = merge_profile(psych, result)
                 merged_data['scraped_at'] = time.time()
                 scraped_data.append(merged_data)
                 successful += 1
@@ -664,6 +2267,7 @@ def scrape_all_profiles():
             # Rate limiting
             time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
 
+        flush_logging()
         print(f"\nScraping complete: {successful} successful, {failed} failed")
         return scraped_data
 
@@ -671,584 +2275,1178 @@ def scrape_all_profiles():
         # Restore original setting
         SETTINGS['MAX_PROFILES_TO_SCRAPE'] = original_limit
 
+# =============================================================================
+# NORMALIZED LANGUAGES & REASONS (TherapistLanguage / TherapistReason)
+# =============================================================================
+
+# Language names as they appear on psychologie.ch (en/de/fr/it) -> (ISO code, display name)
+LANGUAGES = (
+    ('de', 'German', ('german', 'deutsch', 'allemand', 'tedesco', 'high german', 'hochdeutsch')),
+    ('gsw', 'Swiss German', ('swiss german', 'schweizerdeutsch', 'mundart', 'dialekt', 'suisse allemand',
+                             'schwiizerdütsch', 'svizzero tedesco')),
+    ('fr', 'French', ('french', 'französisch', 'francais', 'français', 'francese')),
+    ('it', 'Italian', ('italian', 'italienisch', 'italien', 'italiano')),
+    ('rm', 'Romansh', ('romansh', 'rätoromanisch', 'romanche', 'romancio', 'rumantsch')),
+    ('en', 'English', ('english', 'englisch', 'anglais', 'inglese')),
+    ('es', 'Spanish', ('spanish', 'spanisch', 'espagnol', 'spagnolo', 'español', 'espanol')),
+    ('pt', 'Portuguese', ('portuguese', 'portugiesisch', 'portugais', 'portoghese', 'português')),
+    ('nl', 'Dutch', ('dutch', 'niederländisch', 'néerlandais', 'olandese', 'nederlands')),
+    ('tr', 'Turkish', ('turkish', 'türkisch', 'turc', 'turco', 'türkçe')),
+    ('sq', 'Albanian', ('albanian', 'albanisch', 'albanais', 'albanese', 'shqip')),
+    ('sr', 'Serbian', ('serbian', 'serbisch', 'serbe', 'serbo')),
+    ('hr', 'Croatian', ('croatian', 'kroatisch', 'croate', 'croato')),
+    ('bs', 'Bosnian', ('bosnian', 'bosnisch', 'bosniaque', 'bosniaco')),
+    ('ru', 'Russian', ('russian', 'russisch', 'russe', 'russo')),
+    ('pl', 'Polish', ('polish', 'polnisch', 'polonais', 'polacco')),
+    ('el', 'Greek', ('greek', 'griechisch', 'grec', 'greco')),
+    ('ar', 'Arabic', ('arabic', 'arabisch', 'arabe', 'arabo')),
+    ('he', 'Hebrew', ('hebrew', 'hebräisch', 'hébreu', 'ebraico')),
+    ('fa', 'Persian', ('persian', 'persisch', 'farsi', 'persan', 'persiano')),
+    ('hu', 'Hungarian', ('hungarian', 'ungarisch', 'hongrois', 'ungherese')),
+    ('cs', 'Czech', ('czech', 'tschechisch', 'tchèque', 'ceco')),
+    ('sgn', 'Sign Language', ('sign language', 'gebärdensprache', 'langue des signes', 'lingua dei segni')),
+)
+LANGUAGE_VOCABULARY = {alias: (code, display) for code, display, aliases in LANGUAGES for alias in aliases}
+
+# Offer / target group wording (en/de/fr/it) -> canonical searchValue; display names for the canonical values
+REASONS = (
+    ('individual-therapy', 'Individual therapy', ('individual therapy', 'individual psychotherapy', 'einzeltherapie',
+                                                  'thérapie individuelle', 'psicoterapia individuale')),
+    ('couples-therapy', 'Couples therapy', ('couples therapy', 'couple therapy', 'paartherapie',
+                                            'thérapie de couple', 'terapia di coppia')),
+    ('family-therapy', 'Family therapy', ('family therapy', 'familientherapie', 'thérapie familiale',
+                                          'terapia familiare')),
+    ('group-therapy', 'Group therapy', ('group therapy', 'gruppentherapie', 'thérapie de groupe',
+                                        'terapia di gruppo')),
+    ('crisis-intervention', 'Crisis intervention', ('crisis intervention', 'krisenintervention',
+                                                    'intervention de crise', 'intervento di crisi')),
+    ('online-therapy', 'Online therapy', ('online therapy', 'onlinetherapie', 'online-therapie',
+                                          'thérapie en ligne', 'terapia online')),
+    ('coaching', 'Coaching', ('coaching',)),
+    ('supervision', 'Supervision', ('supervision', 'supervisione')),
+    ('adults', 'Adults', ('adults', 'erwachsene', 'adultes', 'adulti')),
+    ('children', 'Children', ('children', 'kinder', 'enfants', 'bambini')),
+    ('adolescents', 'Adolescents', ('adolescents', 'youth', 'teenagers', 'jugendliche', 'adolescenti')),
+    ('seniors', 'Seniors', ('seniors', 'older adults', 'elderly', 'ältere menschen', 'senioren',
+                            'personnes âgées', 'anziani')),
+    ('couples', 'Couples', ('couples', 'paare', 'coppie')),
+    ('families', 'Families', ('families', 'familien', 'familles', 'famiglie')),
+)
+REASON_SYNONYMS = {alias: search_value for search_value, _, aliases in REASONS for alias in aliases}
+REASON_DISPLAY_NAMES = {search_value: display for search_value, display, _ in REASONS}
+
+# Therapist columns holding the JSON lists the child rows are derived from
+REASON_SOURCE_COLUMNS = (('services_offered', 'offer'), ('target_groups_json', 'target_group'))
+CHILD_SOURCE_COLUMNS = ('languages_spoken',) + tuple(column for column, _ in REASON_SOURCE_COLUMNS)
+
+VOCABULARY_SPACE_PATTERN = re.compile(r'\s+')
+KNOWLEDGE_PATTERN = re.compile(r'^(?P<name>[^(:]+?)\s*(?:\((?P<paren>[^)]*)\)|[:\-–]\s*(?P<suffix>.+))$')
+
+def vocabulary_key(text):
+    """Lowercase, whitespace-collapsed lookup key for the vocabularies"""
+    return VOCABULARY_SPACE_PATTERN.sub(' ', text).strip().lower()
+
+def vocabulary_slug(text):
+    """ASCII slug for values outside the vocabularies"""
+    return re.sub(r'-{2,}', '-', normalize_for_url(vocabulary_key(text))).strip('-')[:100]
+
+def normalize_language(raw):
+    """Map a scraped language entry to (language, displayValue, knowledge), or None if it is unusable"""
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    text = VOCABULARY_SPACE_PATTERN.sub(' ', raw).strip()
+    knowledge = None
+    match = KNOWLEDGE_PATTERN.match(text)
+    if match:
+        text = match.group('name')
+        knowledge = (match.group('paren') or match.group('suffix') or '').strip() or None
+
+    known = LANGUAGE_VOCABULARY.get(vocabulary_key(text))
+    if known:
+        return known[0], known[1], knowledge
+    language = vocabulary_slug(text)
+    return (language, text, knowledge) if language else None
+
+def normalize_reason(raw, category):
+    """Map an offer / target group entry to (searchValue, displayValue, category), or None"""
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    text = VOCABULARY_SPACE_PATTERN.sub(' ', raw).strip()
+    search_value = REASON_SYNONYMS.get(vocabulary_key(text))
+    if search_value:
+        return search_value, REASON_DISPLAY_NAMES[search_value], category
+    search_value = vocabulary_slug(text)
+    return (search_value, text, category) if search_value else None
+
+def _json_list(value):
+    """Decode one of the JSON list columns (None / invalid -> empty list)"""
+    if not value:
+        return []
+    try:
+        decoded = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return decoded if isinstance(decoded, list) else []
+
+def build_therapist_children(db_record):
+    """Derive the normalized child rows of a mapped record.
+
+    Returns (languages, reasons): {language: (displayValue, knowledge)} and
+    {searchValue: (displayValue, category)}. The first entry wins a collision.
+    """
+    languages = {}
+    for raw in _json_list(db_record.get('languages_spoken')):
+        normalized = normalize_language(raw)
+        if normalized and normalized[0] not in languages:
+            languages[normalized[0]] = normalized[1:]
+
+    reasons = {}
+    for column, category in REASON_SOURCE_COLUMNS:
+        for raw in _json_list(db_record.get(column)):
+            normalized = normalize_reason(raw, category)
+            if normalized and normalized[0] not in reasons:
+                reasons[normalized[0]] = normalized[1:]
+    return languages, reasons
+
+# (table, key column, value columns) of the synced child tables
+THERAPIST_CHILD_TABLES = (
+    ('TherapistLanguage', 'language', ('displayValue', 'knowledge')),
+    ('TherapistReason', 'searchValue', ('displayValue', 'category')),
+)
+
+def sync_therapist_children(cursor, children):
+    """Bring TherapistLanguage / TherapistReason in line with children = {therapist_id: (languages, reasons)}.
+
+    One SELECT ... ANY per table loads the current rows of the whole batch;
+    removed or changed rows are deleted and new ones bulk-inserted. Runs in
+    the caller's transaction. Returns {table: (inserted, deleted)}.
+    """
+    from psycopg2.extras import execute_values
+    if not children:
+        return {}
+    therapist_ids = list(children)
+    results = {}
+
+    for position, (table, key_column, value_columns) in enumerate(THERAPIST_CHILD_TABLES):
+        columns = ', '.join(f'"{col}"' for col in value_columns)
+        cursor.execute(f'SELECT id, "therapistId", "{key_column}", {columns} FROM "{table}" WHERE "therapistId" = ANY(%s)',
+                       (therapist_ids,))
+        existing = {(row[1], row[2]): (row[0], tuple(row[3:])) for row in cursor.fetchall()}
+
+        wanted = {}
+        for therapist_id, child_sets in children.items():
+            for key, values in child_sets[position].items():
+                wanted[(therapist_id, key)] = tuple(values)
+
+        stale_ids = [row_id for pair, (row_id, values) in existing.items() if wanted.get(pair) != values]
+        kept = {pair for pair, (_, values) in existing.items() if wanted.get(pair) == values}
+        new_rows = [(generate_therapist_id(), therapist_id, key) + values
+                    for (therapist_id, key), values in wanted.items() if (therapist_id, key) not in kept]
+
+        if stale_ids:
+            cursor.execute(f'DELETE FROM "{table}" WHERE id = ANY(%s)', (stale_ids,))
+        if new_rows:
+            execute_values(
+                cursor,
+                f'INSERT INTO "{table}" (id, "therapistId", "{key_column}", {columns}) VALUES %s '
+                f'ON CONFLICT ("therapistId", "{key_column}") DO NOTHING',
+                new_rows, page_size=len(new_rows)
+            )
+        results[table] = (len(new_rows), len(stale_ids))
+    return results
+
+def backfill_therapist_children(batch_size=None):
+    """Derive child rows for every psychologie.ch record from its stored JSON columns"""
+    batch_size = batch_size or SETTINGS['DB_BATCH_SIZE']
+    source_columns = ', '.join(CHILD_SOURCE_COLUMNS)
+    totals = {table: [0, 0] for table, _, _ in THERAPIST_CHILD_TABLES}
+    processed = 0
+
+    print("\n[+] Syncing TherapistLanguage / TherapistReason from stored records...")
+    with db_session() as conn:
+        records = conn.cursor(name='children_backfill', withhold=True)
+        records.itersize = batch_size
+        records.execute(f'SELECT id, {source_columns} FROM "Therapist" WHERE psychologie_ch_id IS NOT NULL AND deleted_at IS NULL')
+        conn.commit()
+        try:
+            while True:
+                rows = records.fetchmany(batch_size)
+                if not rows:
+                    break
+                children = {row[0]: build_therapist_children(dict(zip(CHILD_SOURCE_COLUMNS, row[1:]))) for row in rows}
+                # Written and committed on this session (the WITH HOLD cursor survives the
+                # commit); a second pool slot per batch would deadlock a pool of one
+                cursor = conn.cursor()
+                results = sync_therapist_children(cursor, children)
+                cursor.close()
+                conn.commit()
+                for table, (inserted, deleted) in results.items():
+                    totals[table][0] += inserted
+                    totals[table][1] += deleted
+                processed += len(rows)
+                print(f"[PROGRESS] {processed} records synced")
+        finally:
+            records.close()
+
+    for table, (inserted, deleted) in totals.items():
+        print(f"[OK] {table}: {inserted} inserted, {deleted} deleted")
+    return totals
+
+# =============================================================================
+# PSYCHOLOGIST RECORDS
+# =============================================================================
+
+URL_SLUG_CHAR_MAP = {
+    'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss',
+    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'å': 'a',
+    'ç': 'c', 'ć': 'c', 'č': 'c',
+    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
+    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
+    'ñ': 'n', 'ń': 'n',
+    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o',
+    'ù': 'u', 'ú': 'u', 'û': 'u',
+    'ý': 'y', 'ÿ': 'y',
+    'ż': 'z', 'ź': 'z', 'ž': 'z'
+}
+URL_SLUG_TRANSLATION = str.maketrans(URL_SLUG_CHAR_MAP)
+URL_SLUG_STRIP_PATTERN = re.compile(r'[^\w\-]')
+
+def normalize_for_url(text):
+    """Normalize a name part for use in a psychologie.ch profile URL slug"""
+    # Convert to lowercase and replace spaces with hyphens
+    text = text.lower().replace(' ', '-')
+
+    # Replace common special characters with ASCII equivalents
+    text = text.translate(URL_SLUG_TRANSLATION)
+
+    # Remove any remaining special characters except hyphens and alphanumeric
+    return URL_SLUG_STRIP_PATTERN.sub('', text)
+
+def build_url_slug(firstname, lastname):
+    """Build the profile URL slug from first and last name"""
+    return f"{normalize_for_url(firstname.strip())}-{normalize_for_url(lastname.strip())}"
+
+def profile_url(url_slug):
+    """Profile page URL for a slug (SETTINGS['BASE_URL'] + slug)"""
+    return f"{SETTINGS['BASE_URL']}{url_slug}"
+
+def _intern(value):
+    """Intern repeated marker strings (city, zip, ...) so 50k records share one copy"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class PsychologistRecord:
+    """Compact, slotted record for one psychologie.ch marker.
+
+    Supports the dict-style access the scrape loops already use
+    (record['firstname'], record.get('user_id'), record.copy()), so it can be
+    passed anywhere a marker dict was expected. The nested `user` payload is
+    kept as a reference to the parsed JSON and only copied on to_dict().
+    """
+
+    FIELDS = (
+        # Basic identification
+        'id', 'user_id', 'firstname', 'lastname', 'url_slug',
+        # Location data
+        'address', 'address_2', 'zip', 'city', 'canton_id', 'country_id', 'latitude', 'longitude',
+        # Contact and professional data
+        'mobile_phone', 'phone', 'email', 'website', 'name', 'name_2',
+        # Accessibility and address flags
+        'is_wheelchair_accessible', 'is_work_address', 'is_main_work_address',
+        'is_correspondence_address', 'is_private_address', 'is_billing_address',
+        # Timestamps
+        'created_at', 'updated_at',
+    )
+    # Repeated across thousands of markers - stored interned
+    INTERNED_FIELDS = frozenset(('zip', 'city', 'address_2', 'name_2', 'country_id'))
+    __slots__ = FIELDS + ('_user',)
+
+    def __init__(self, **fields):
+        user = fields.pop('user', None)
+        for field in self.FIELDS:
+            value = fields.get(field)
+            if field in self.INTERNED_FIELDS:
+                value = _intern(value)
+            setattr(self, field, value)
+        self._user = user
+
+    @classmethod
+    def from_marker(cls, psychologist, url_slug=None):
+        """Build a record from a raw display-markers entry"""
+        user = psychologist.get('user') or {}
+        record = cls.__new__(cls)
+        record.id = psychologist.get('id')
+        record.user_id = user.get('id')
+        record.firstname = user.get('firstname')
+        record.lastname = user.get('lastname')
+        record.url_slug = url_slug
+        record.address = psychologist.get('address', '')
+        record.address_2 = _intern(psychologist.get('address_2'))
+        record.zip = _intern(psychologist.get('zip', ''))
+        record.city = _intern(psychologist.get('city', ''))
+        record.canton_id = psychologist.get('canton_id')
+        record.country_id = _intern(psychologist.get('country_id'))
+        record.latitude = psychologist.get('latitude')
+        record.longitude = psychologist.get('longitude')
+        record.mobile_phone = psychologist.get('mobile_phone')
+        record.phone = psychologist.get('phone')
+        record.email = psychologist.get('email')
+        record.website = psychologist.get('website')
+        record.name = psychologist.get('name')  # practice name
+        record.name_2 = _intern(psychologist.get('name_2'))
+        record.is_wheelchair_accessible = psychologist.get('is_wheelchair_accessible')
+        record.is_work_address = psychologist.get('is_work_address')
+        record.is_main_work_address = psychologist.get('is_main_work_address')
+        record.is_correspondence_address = psychologist.get('is_correspondence_address')
+        record.is_private_address = psychologist.get('is_private_address')
+        record.is_billing_address = psychologist.get('is_billing_address')
+        record.created_at = psychologist.get('created_at')
+        record.updated_at = psychologist.get('updated_at')
+        # Keep a reference to the raw user payload instead of copying it
+        record._user = user
+        return record
+
+    @property
+    def user(self):
+        """Raw nested user object from the marker JSON"""
+        return self._user if self._user is not None else {}
+
+    def keys(self):
+        return self.FIELDS + ('user',)
+
+    def __getitem__(self, key):
+        if key == 'user':
+            return self.user
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key == 'user' or key in self.FIELDS
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def to_dict(self):
+        """Materialize the record as a plain dict (same shape as the old marker dicts)"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['user'] = self.user
+        return data
+
+    def copy(self):
+        """Return a mutable dict copy, used by the loops before merging scraped data"""
+        return self.to_dict()
+
+    def __repr__(self):
+        return f"PsychologistRecord(id={self.id!r}, firstname={self.firstname!r}, lastname={self.lastname!r})"
+
+def iter_display_markers(data):
+    """Yield every raw marker from the display-markers dispatches of a psychologie.ch snapshot"""
+    for component in data.get('components', []):
+        effects = component.get('effects', {})
+        for dispatch in effects.get('dispatches', []):
+            if dispatch.get('name') == 'display-markers':
+                markers = dispatch.get('params', [])
+                # markers is an array containing one array of psychologist objects
+                if markers and isinstance(markers[0], list):
+                    yield from markers[0]
+
 def extract_psychologists_from_json(json_file_path):
-    """Extract all psychologists' first and last names from the JSON file."""
+    """Extract all psychologists from the JSON file as compact PsychologistRecord objects."""
     with open(json_file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
     psychologists = []
 
-    # Navigate to the display-markers dispatch
     try:
-        components = data.get('components', [])
-        for component in components:
-            effects = component.get('effects', {})
-            dispatches = effects.get('dispatches', [])
-
-            for dispatch in dispatches:
-                if dispatch.get('name') == 'display-markers':
-                    markers = dispatch.get('params', [])
-                    # markers is an array containing one array of psychologist objects
-                    if markers and isinstance(markers[0], list):
-                        for psychologist in markers[0]:
-                            user = psychologist.get('user', {})
-                            firstname = user.get('firstname')
-                            lastname = user.get('lastname')
-                            user_id = user.get('id')
-                            psychologist_id = psychologist.get('id')
-
-                            if firstname and lastname:
-                                # Create URL slug by normalizing special characters
-                                def normalize_for_url(text):
-                                    # Convert to lowercase and replace spaces with hyphens
-                                    text = text.lower().replace(' ', '-')
-
-                                    # Replace common special characters with ASCII equivalents
-                                    char_map = {
-                                        'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss',
-                                        'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'å': 'a',
-                                        'ç': 'c', 'ć': 'c', 'č': 'c',
-                                        'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-                                        'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-                                        'ñ': 'n', 'ń': 'n',
-                                        'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o',
-                                        'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-                                        'ý': 'y', 'ÿ': 'y',
-                                        'ż': 'z', 'ź': 'z', 'ž': 'z'
-                                    }
-
-                                    for special, normal in char_map.items():
-                                        text = text.replace(special, normal)
-
-                                    # Remove any remaining special characters except hyphens and alphanumeric
-                                    text = re.sub(r'[^\w\-]', '', text)
-
-                                    return text
-
-                                firstname_slug = normalize_for_url(firstname.strip())
-                                lastname_slug = normalize_for_url(lastname.strip())
-                                url_slug = f"{firstname_slug}-{lastname_slug}"
-
-                                # Extract ALL available API data, not just basic fields
-                                psychologist_data = {
-                                    # Basic identification
-                                    'id': psychologist_id,
-                                    'user_id': user_id,
-                                    'firstname': firstname,
-                                    'lastname': lastname,
-                                    'url_slug': url_slug,
-
-                                    # Location data (this was missing!)
-                                    'address': psychologist.get('address', ''),
-                                    'address_2': psychologist.get('address_2'),
-                                    'zip': psychologist.get('zip', ''),
-                                    'city': psychologist.get('city', ''),
-                                    'canton_id': psychologist.get('canton_id'),
-                                    'country_id': psychologist.get('country_id'),
-                                    'latitude': psychologist.get('latitude'),
-                                    'longitude': psychologist.get('longitude'),
-
-                                    # Contact and professional data
-                                    'mobile_phone': psychologist.get('mobile_phone'),
-                                    'phone': psychologist.get('phone'),
-                                    'email': psychologist.get('email'),
-                                    'website': psychologist.get('website'),
-                                    'name': psychologist.get('name'),  # practice name
-                                    'name_2': psychologist.get('name_2'),
-
-                                    # Accessibility and address flags
-                                    'is_wheelchair_accessible': psychologist.get('is_wheelchair_accessible'),
-                                    'is_work_address': psychologist.get('is_work_address'),
-                                    'is_main_work_address': psychologist.get('is_main_work_address'),
-                                    'is_correspondence_address': psychologist.get('is_correspondence_address'),
-                                    'is_private_address': psychologist.get('is_private_address'),
-                                    'is_billing_address': psychologist.get('is_billing_address'),
-
-                                    # Timestamps
-                                    'created_at': psychologist.get('created_at'),
-                                    'updated_at': psychologist.get('updated_at'),
-
-                                    # Full user object
-                                    'user': psychologist.get('user', {})
-                                }
-
-                                psychologists.append(psychologist_data)
+        for psychologist in iter_display_markers(data):
+            user = psychologist.get('user', {})
+            firstname = user.get('firstname')
+            lastname = user.get('lastname')
+
+            if firstname and lastname:
+                url_slug = build_url_slug(firstname, lastname)
+                psychologists.append(PsychologistRecord.from_marker(psychologist, url_slug))
     except Exception as e:
         print(f"Error parsing JSON: {e}")
         return []
 
     return psychologists
 
-def scrape_profile_page(psychologist_id, user_id, firstname, lastname, url_slug):
-    """Scrape individual profile page for psychologist data."""
-    base_url = "https://www.psychologie.ch/en/psyfinder/"
-    url = f"{base_url}{url_slug}"
+def parse_shard(shard):
+    """'I/N' -> (I, N); raises ValueError unless 0 <= I < N"""
+    index, _, count = str(shard).partition('/')
+    index, count = int(index), int(count)
+    if not 0 <= index < count:
+        raise ValueError(f"shard '{shard}' must be I/N with 0 <= I < N")
+    return index, count
+
+def marker_shard(psych_id, count):
+    """Shard of a psychologie.ch id (stable across runs and processes, unlike hash())"""
+    return zlib.crc32(str(psych_id).encode('utf-8')) % count
+
+def select_markers(psychologists):
+    """Keep the markers of the CANTONS and SHARD settings (in order; the limit is left to the caller)"""
+    if SETTINGS['CANTONS']:
+        cantons = {canton.upper() for canton in SETTINGS['CANTONS']}
+        psychologists = [psych for psych in psychologists if marker_canton(psych) in cantons]
+    if SETTINGS['SHARD']:
+        index, count = parse_shard(SETTINGS['SHARD'])
+        psychologists = [psych for psych in psychologists if marker_shard(psych['id'], count) == index]
+    return psychologists
 
+def get_rss_mb():
+    """Return (current, peak) resident set size of this process in MB"""
+    import resource
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_kb //= 1024  # macOS reports bytes
+    current = None
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with open('/proc/self/statm', 'r') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    return current, peak_kb / 1024
+
+def measure_extraction_memory(json_file_path='data/psychologie.ch.json'):
+    """Report RSS and retained heap for extracting all records from a snapshot.
+
+    Returns the measurements (sizes in MB), not the records.
+    """
+    import gc
+    import tracemalloc
+
+    rss_before, _ = get_rss_mb()
+    tracemalloc.start()
+    psychologists = extract_psychologists_from_json(json_file_path)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after, rss_peak = get_rss_mb()
+
+    print(f"[MEM] Records extracted: {len(psychologists)}")
+    print(f"[MEM] Retained by records: {retained / (1024 * 1024):.1f} MB "
+          f"({retained / max(len(psychologists), 1):.0f} bytes/record)")
+    print(f"[MEM] Peak traced during parse: {peak / (1024 * 1024):.1f} MB")
+    if rss_before is not None and rss_after is not None:
+        print(f"[MEM] RSS before: {rss_before:.1f} MB | after: {rss_after:.1f} MB | peak: {rss_peak:.1f} MB")
+    else:
+        print(f"[MEM] Peak RSS: {rss_peak:.1f} MB")
+
+    def mb(size):
+        return None if size is None else round(size, 1)
+
+    return {'records': len(psychologists), 'retained_mb': mb(retained / (1024 * 1024)),
+            'bytes_per_record': round(retained / max(len(psychologists), 1)),
+            'peak_traced_mb': mb(peak / (1024 * 1024)),
+            'rss_before_mb': mb(rss_before), 'rss_after_mb': mb(rss_after), 'rss_peak_mb': mb(rss_peak)}
+
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+# Upper bound for a server-requested Retry-After before retrying a 429
+MAX_RETRY_AFTER_SECONDS = 60
+
+_http_local = threading.local()
+
+def http_session():
+    """Per-thread requests.Session, so profile fetches reuse kept-alive connections"""
+    import requests
+    session = getattr(_http_local, 'session', None)
+    if session is None:
+        session = _http_local.session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+    return session
+
+def fetch_profile_page(url):
+    """Fetch a profile page and return its body (raises requests.RequestException)"""
+    fetch_started = time.perf_counter()
+    for attempt in range(SETTINGS['HTTP_429_RETRIES'] + 1):
+        response = http_session().get(url, timeout=10)
+        # requests only exposes time-to-headers; DNS/connect/TLS are folded into it
+        METRICS.observe('scraper_http_ttfb_seconds', response.elapsed.total_seconds())
+        METRICS.inc('scraper_http_responses_total', status=response.status_code)
+        if response.status_code != 429 or attempt == SETTINGS['HTTP_429_RETRIES']:
+            break
+        time.sleep(retry_after_seconds(response))
+    response.raise_for_status()
+    record_stage_time('fetch', time.perf_counter() - fetch_started)
+    METRICS.inc('scraper_http_response_bytes_total', len(response.content))
+    return response.content
+
+def retry_after_seconds(response):
+    """Seconds to wait before retrying a 429 (Retry-After in seconds, else the rate limit; capped)"""
+    try:
+        seconds = float(response.headers.get('Retry-After', ''))
+    except ValueError:
+        seconds = max(SETTINGS['RATE_LIMIT_SECONDS'], 1)
+    return min(max(seconds, 0), MAX_RETRY_AFTER_SECONDS)
 
-        # Extract data based on the structure we saw
-        profile_data = {
-            'id': psychologist_id,
-            'user_id': user_id,
-            'firstname': firstname,
-            'lastname': lastname,
-            'url': url,
-            'scraped_at': time.time()
-        }
+# =============================================================================
+# PROFILE PAGE EXTRACTORS
+# =============================================================================
 
-        # Try to extract various fields
+# Registered in run order by @profile_extractor. Kinds:
+#   set      - the value (if not None) replaces profile_data[field]
+#   fallback - like set, but only runs while the field is still missing
+#   collect  - the value (a list) is added to the candidates for field
+#   finalize - builds profile_data[field] from the collected candidates
+PROFILE_EXTRACTORS = []
+EXTRACTOR_KINDS = ('set', 'fallback', 'collect', 'finalize')
+EXTRACTOR_COUNTERS = ('runs', 'skipped', 'errors', 'hits', 'kept', 'overwritten', 'discarded')
+
+class ProfileExtractor:
+    """One registered heuristic of parse_profile_html plus its running statistics.
+
+    Per page an extractor is skipped (fallback with the field already set) or
+    runs; a run either raises, produces nothing, or produces a value (a hit).
+    A hit ends up kept (in the final profile), overwritten (a later extractor
+    replaced it) or discarded (collected items that all got filtered out).
+    """
+
+    def __init__(self, name, field, kind, func):
+        if kind not in EXTRACTOR_KINDS:
+            raise ValueError(f"Unknown extractor kind '{kind}'")
+        self.name = name
+        self.field = field
+        self.kind = kind
+        self.func = func
+        self.seconds = 0.0
+        for counter in EXTRACTOR_COUNTERS:
+            setattr(self, counter, 0)
+
+    def stats(self):
+        stats = {'extractor': self.name, 'field': self.field, 'kind': self.kind, 'seconds': round(self.seconds, 6)}
+        stats.update((counter, getattr(self, counter)) for counter in EXTRACTOR_COUNTERS)
+        stats['hit_rate'] = self.hits / self.runs if self.runs else None
+        stats['ms_per_run'] = self.seconds * 1000 / self.runs if self.runs else None
+        # Cost per field that made it into a profile: the ranking key of extractor_report()
+        stats['ms_per_kept'] = self.seconds * 1000 / self.kept if self.kept else None
+        return stats
+
+_extractor_stats_lock = threading.Lock()
+
+def profile_extractor(name, field, kind='set'):
+    """Register func(soup, profile_data, candidates) as the next extractor of parse_profile_html"""
+    def decorator(func):
+        PROFILE_EXTRACTORS.append(ProfileExtractor(name, field, kind, func))
+        return func
+    return decorator
+
+def run_profile_extractors(soup, profile_data):
+    """Run the registered extractors over one page, filling profile_data.
+
+    Each extractor runs in isolation: one that raises is counted and the
+    rest still run. Returns [(extractor name, exception)] for the failures.
+    """
+    candidates = {}  # field -> collected items, in extractor order
+    collected = []  # (extractor, items)
+    owners = {}  # field -> extractor whose value is in profile_data
+    outcomes = {}  # extractor -> 'skipped' | 'error' | 'miss' | 'hit'
+    overwritten = []
+    timings = []
+    failures = []
+
+    for extractor in PROFILE_EXTRACTORS:
+        field = extractor.field
+        if extractor.kind == 'fallback' and field in profile_data:
+            outcomes[extractor] = 'skipped'
+            continue
+        started = time.perf_counter()
         try:
-            # Name (usually in h1 or similar)
-            name_elem = soup.find('h1') or soup.find(class_=re.compile(r'name|title', re.I))
-            if name_elem:
-                profile_data['full_name'] = name_elem.get_text(strip=True)
-
-            # Practice name - look for the specific structure we saw
-            practice_elem = soup.find(string=re.compile(r'Praxis|Practice|Cabinet|Studio', re.I))
-            if practice_elem:
-                # Get the parent element that contains the full practice name
-                parent = practice_elem.parent
-                if parent and parent.name in ['h2', 'h3', 'div', 'p']:
-                    profile_data['practice_name'] = parent.get_text(strip=True)
-                else:
-                    profile_data['practice_name'] = practice_elem.strip()
-
-            # Address - look for the address section more specifically
-            address_text = ""
-            # Look for elements with address-like content
-            address_candidates = soup.find_all(['div', 'p', 'span'], string=re.compile(r'(strasse|straße|weg|platz|rue|avenue|via|street|road)', re.I))
-            for candidate in address_candidates:
-                text = candidate.get_text(strip=True)
-                # Filter out JavaScript and very short texts
-                if len(text) > 10 and not text.startswith('(') and not 'function' in text.lower():
-                    address_text = text
+            value = extractor.func(soup, profile_data, candidates)
+        except Exception as e:
+            failures.append((extractor.name, e))
+            outcomes[extractor] = 'error'
+            value = None
+        timings.append((extractor, time.perf_counter() - started))
+        if extractor in outcomes:
+            continue
+        outcomes[extractor] = 'hit' if value else 'miss'
+
+        if extractor.kind == 'collect':
+            if value:
+                candidates.setdefault(field, []).extend(value)
+                collected.append((extractor, value))
+        elif value is not None:
+            if field in owners and outcomes[owners[field]] == 'hit':
+                overwritten.append(owners[field])
+            profile_data[field] = value
+            owners[field] = extractor
+
+    kept = {extractor for field, extractor in owners.items() if profile_data.get(field)}
+    discarded = set()
+    for extractor, items in collected:
+        final = profile_data.get(extractor.field) or ()
+        final = {item.strip() for item in final if isinstance(item, str)}
+        if any(isinstance(item, str) and item.strip() in final for item in items):
+            kept.add(extractor)
+        else:
+            discarded.add(extractor)
+
+    for extractor, seconds in timings:
+        METRICS.observe('scraper_extractor_seconds', seconds, extractor=extractor.name)
+    with _extractor_stats_lock:
+        for extractor, seconds in timings:
+            extractor.seconds += seconds
+        for extractor, outcome in outcomes.items():
+            if outcome == 'skipped':
+                extractor.skipped += 1
+                continue
+            extractor.runs += 1
+            if outcome == 'error':
+                extractor.errors += 1
+            elif outcome == 'hit':
+                extractor.hits += 1
+        for extractor in overwritten:
+            extractor.overwritten += 1
+        for extractor in kept:
+            extractor.kept += 1
+        for extractor in discarded:
+            extractor.discarded += 1
+    return failures
+
+def extractor_stats():
+    """Statistics of every registered extractor, in run order"""
+    with _extractor_stats_lock:
+        return [extractor.stats() for extractor in PROFILE_EXTRACTORS]
+
+def extractor_report(stats=None):
+    """Text table of the extractors ranked by cost per kept field (most expensive first).
+
+    Extractors that ran but never produced a kept field rank first: they cost
+    time without contributing data and are the first candidates to drop.
+    """
+    stats = stats if stats is not None else extractor_stats()
+    ranked = sorted(stats, key=lambda row: (row['ms_per_kept'] is not None,
+                                            -(row['ms_per_kept'] or row['seconds'])))
+    lines = [f"{'extractor':<24} {'field':<18} {'runs':>6} {'hit%':>6} {'kept':>6} {'overwr':>6} {'discard':>7} "
+             f"{'errors':>6} {'skipped':>7} {'ms/run':>8} {'ms/kept':>9}"]
+    for row in ranked:
+        hit_rate = f"{row['hit_rate'] * 100:.0f}" if row['hit_rate'] is not None else '-'
+        ms_per_run = f"{row['ms_per_run']:.3f}" if row['ms_per_run'] is not None else '-'
+        ms_per_kept = f"{row['ms_per_kept']:.3f}" if row['ms_per_kept'] is not None else 'never'
+        lines.append(f"{row['extractor']:<24} {row['field']:<18} {row['runs']:>6} {hit_rate:>6} {row['kept']:>6} "
+                     f"{row['overwritten']:>6} {row['discarded']:>7} {row['errors']:>6} {row['skipped']:>7} "
+                     f"{ms_per_run:>8} {ms_per_kept:>9}")
+    return '\n'.join(lines)
+
+@profile_extractor('name', 'full_name')
+def extract_name(soup, profile_data, candidates):
+    # Name (usually in h1 or similar)
+    name_elem = soup.find('h1') or soup.find(class_=re.compile(r'name|title', re.I))
+    if name_elem:
+        return name_elem.get_text(strip=True)
+    return None
+
+@profile_extractor('practice_name', 'practice_name')
+def extract_practice_name(soup, profile_data, candidates):
+    # Practice name - look for the specific structure we saw
+    practice_elem = soup.find(string=re.compile(r'Praxis|Practice|Cabinet|Studio', re.I))
+    if practice_elem:
+        # Get the parent element that contains the full practice name
+        parent = practice_elem.parent
+        if parent and parent.name in ['h2', 'h3', 'div', 'p']:
+            return parent.get_text(strip=True)
+        return practice_elem.strip()
+    return None
+
+def clean_address(address_text):
+    # Remove excessive whitespace and newlines
+    address_text = re.sub(r'\s+', ' ', address_text).strip()
+    # Remove trailing commas if they exist before country
+    return re.sub(r',\s*,', ',', address_text)
+
+@profile_extractor('address_candidates', 'address')
+def extract_address_candidates(soup, profile_data, candidates):
+    # Look for elements with address-like content
+    address_candidates = soup.find_all(['div', 'p', 'span'], string=re.compile(r'(strasse|straße|weg|platz|rue|avenue|via|street|road)', re.I))
+    for candidate in address_candidates:
+        text = candidate.get_text(strip=True)
+        # Filter out JavaScript and very short texts
+        if len(text) > 10 and not text.startswith('(') and not 'function' in text.lower():
+            return clean_address(text)
+    return None
+
+@profile_extractor('address_text_pattern', 'address', kind='fallback')
+def extract_address_text_pattern(soup, profile_data, candidates):
+    # Look for the address section by finding text near city/zip patterns
+    text_content = soup.get_text()
+    # Look for patterns like "Street Name, ZIP City"
+    address_match = re.search(r'([A-Za-zäöüÄÖÜ\s]+\d{1,3}[A-Za-zäöüÄÖÜ\s]*),\s*(\d{4})\s+([A-Za-zäöüÄÖÜ\s]+)', text_content)
+    if address_match:
+        return clean_address(f"{address_match.group(1).strip()}, {address_match.group(2)} {address_match.group(3).strip()}")
+    return None
+
+@profile_extractor('phone', 'phone')
+def extract_phone(soup, profile_data, candidates):
+    # Phone number - improved regex
+    phone_pattern = r'[\+]?[41][\s\-\.]?\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d'
+    phone_match = re.search(phone_pattern, soup.get_text())
+    if phone_match:
+        # Clean up the phone number
+        phone = re.sub(r'[^\+\d]', '', phone_match.group())
+        if len(phone) >= 10:  # Valid phone number length
+            return phone
+    return None
+
+@profile_extractor('email', 'email')
+def extract_email(soup, profile_data, candidates):
+    email_elem = soup.find('a', href=re.compile(r'mailto:', re.I))
+    if email_elem:
+        return email_elem.get('href').replace('mailto:', '')
+    return None
+
+@profile_extractor('website', 'website')
+def extract_website(soup, profile_data, candidates):
+    website_elem = soup.find('a', href=re.compile(r'^https?://(?!www\.psychologie\.ch)', re.I))
+    if website_elem:
+        return website_elem.get('href')
+    return None
+
+@profile_extractor('online_sessions', 'online_sessions')
+def extract_online_sessions(soup, profile_data, candidates):
+    # Online sessions - look for "Available" or "Unavailable"
+    online_sessions_elem = soup.find(string=re.compile(r'Online sessions?', re.I))
+    if online_sessions_elem:
+        # Get the parent or next element that contains the status
+        parent = online_sessions_elem.parent
+        if parent:
+            # Look for status in siblings or parent's text
+            status_match = re.search(r'(Available|Unavailable)', parent.get_text(), re.I)
+            if status_match:
+                return status_match.group(1).lower()
+            # Look in the broader context
+            context = parent.find_parent('div') if parent.name != 'div' else parent
+            if context:
+                status_match = re.search(r'(Available|Unavailable)', context.get_text(), re.I)
+                if status_match:
+                    return status_match.group(1).lower()
+    return None
+
+@profile_extractor('online_sessions_text', 'online_sessions', kind='fallback')
+def extract_online_sessions_text(soup, profile_data, candidates):
+    # Fallback: search the entire page text for online session status
+    page_text = soup.get_text()
+    if 'Online sessions' in page_text:
+        if 'Available' in page_text:
+            return 'available'
+        elif 'Unavailable' in page_text:
+            return 'unavailable'
+    return None
+
+@profile_extractor('profile_image', 'profile_image_url')
+def extract_profile_image(soup, profile_data, candidates):
+    # Profile image - look for the main profile image
+    profile_img = soup.find('img', class_=re.compile(r'br-16px|profile|avatar', re.I))
+    if profile_img and profile_img.get('src'):
+        return profile_img['src']
+    return None
+
+@profile_extractor('profile_image_alt', 'profile_image_url', kind='fallback')
+def extract_profile_image_alt(soup, profile_data, candidates):
+    # Fallback: look for any img with psychologist name in alt
+    alt_img = soup.find('img', alt=re.compile(f"{profile_data['firstname']}|{profile_data['lastname']}", re.I))
+    if alt_img and alt_img.get('src'):
+        return alt_img['src']
+    return None
+
+@profile_extractor('fsp_titles', 'fsp_titles')
+def extract_fsp_titles(soup, profile_data, candidates):
+    fsp_titles = []
+    title_elems = soup.find_all(string=re.compile(r'Fachpsychologin|Fachpsychologe|Eidgenössisch', re.I))
+    for elem in title_elems:
+        if elem and elem.parent:
+            title_text = elem.parent.get_text(strip=True)
+            if len(title_text) < 200:  # Avoid picking up large blocks of text
+                fsp_titles.append(title_text)
+    if fsp_titles:
+        return list(set(fsp_titles))  # Remove duplicates
+    return None
+
+@profile_extractor('specialisation_section', 'specialisations', kind='collect')
+def extract_specialisation_section(soup, profile_data, candidates):
+    # Look for specialisation section more specifically
+    spec_section = soup.find(string=re.compile(r'Specialisation', re.I))
+    if spec_section:
+        parent = spec_section.parent
+        if parent:
+            container = parent.find_next_sibling(['div', 'p'])
+            if container:
+                spec_text = container.get_text(strip=True)
+                if spec_text and len(spec_text) > 10 and len(spec_text) < 1000:
+                    # Clean up the text - remove quotes and normalize
+                    spec_text = spec_text.strip('"').strip("'")
+                    if spec_text:
+                        return [spec_text]
+    return None
+
+@profile_extractor('specialisation_keywords', 'specialisations', kind='collect')
+def extract_specialisation_keywords(soup, profile_data, candidates):
+    # Look for elements that might contain actual specializations (not URLs or JS)
+    specialisations = []
+    potential_specs = soup.find_all(['p', 'div'], string=re.compile(r'(therapie|psychologie|systemisch|hypnose|cognitive|behavioral|trauma)', re.I))
+    for elem in potential_specs[:3]:  # Limit to avoid spam
+        text = elem.get_text(strip=True)
+        # Filter out problematic content
+        if (len(text) > 15 and len(text) < 200 and
+            not any(problem in text.lower() for problem in [
+                'http', 'https', 'var ', 'function', 'redirect', 'role of the fsp',
+                'psychologie.ch', 'afp.psychologie.ch', 'gtm.', 'google', 'facebook'
+            ])):
+            # Check if it looks like a real specialization
+            if any(keyword in text.lower() for keyword in [
+                'therapie', 'psychologie', 'systemisch', 'hypnose', 'trauma',
+                'kognitiv', 'behavioral', 'psychoanalyse', 'gestalt', 'familie'
+            ]):
+                specialisations.append(text)
+    return specialisations
+
+@profile_extractor('specialisations', 'specialisations', kind='finalize')
+def finalize_specialisations(soup, profile_data, candidates):
+    specialisations = candidates.get('specialisations')
+    if not specialisations:
+        return None
+    # Filter out duplicates and very similar entries
+    unique_specs = []
+    seen = set()
+    for spec in specialisations:
+        # Create a normalized version for comparison
+        normalized = re.sub(r'[^\w\s]', '', spec.lower()).strip()
+        if normalized not in seen and len(normalized) > 10:
+            unique_specs.append(spec)
+            seen.add(normalized)
+    return unique_specs[:3]  # Limit to 3 high-quality specs
+
+@profile_extractor('languages', 'languages')
+def extract_languages(soup, profile_data, candidates):
+    languages = []
+    lang_terms = ['German', 'French', 'Italian', 'English', 'Swiss German']
+    for lang in lang_terms:
+        if soup.find(string=re.compile(rf'\b{lang}\b', re.I)):
+            languages.append(lang)
+    return languages or None
+
+@profile_extractor('about_me_header', 'about_me')
+def extract_about_me_header(soup, profile_data, candidates):
+    # Look for the specific biography content that follows "About me" or similar headers
+    about_me_text = ""
+    # First, find the "About me" header
+    about_headers = soup.find_all(['h2', 'h3', 'h4', 'div', 'strong'], string=re.compile(r'about me|über mich|à propos|biographie', re.I))
+
+    for header in about_headers:
+        # Get the next sibling element which should contain the biography
+        next_elem = header.find_next_sibling(['p', 'div'])
+        if next_elem:
+            text = next_elem.get_text(strip=True)
+            # Check if this looks like biography content
+            if (len(text) > 50 and len(text) < 3000 and
+                not text.startswith('http') and 'var ' not in text.lower() and
+                not any(problem in text for problem in ['billing', 'offer', 'languages', 'telephone', 'email'])):
+                # Look for biography indicators
+                bio_indicators = ['born', 'trained', 'studied', 'worked', 'experience', 'therapist', 'psychologist',
+                                'university', 'degree', 'practice', 'clinic', 'hospital', 'i ', 'je ', 'my ',
+                                'trained', 'worked as', 'specialized in']
+                if any(indicator in text.lower() for indicator in bio_indicators):
+                    about_me_text = text
                     break
 
-            # If no specific address found, try to extract from structured data
-            if not address_text:
-                # Look for the address section by finding text near city/zip patterns
-                text_content = soup.get_text()
-                # Look for patterns like "Street Name, ZIP City"
-                address_match = re.search(r'([A-Za-zäöüÄÖÜ\s]+\d{1,3}[A-Za-zäöüÄÖÜ\s]*),\s*(\d{4})\s+([A-Za-zäöüÄÖÜ\s]+)', text_content)
-                if address_match:
-                    address_text = f"{address_match.group(1).strip()}, {address_match.group(2)} {address_match.group(3).strip()}"
-
-            # Clean up address formatting
-            if address_text:
-                # Remove excessive whitespace and newlines
-                address_text = re.sub(r'\s+', ' ', address_text).strip()
-                # Remove trailing commas if they exist before country
-                address_text = re.sub(r',\s*,', ',', address_text)
-                profile_data['address'] = address_text
-
-            # Phone number - improved regex
-            phone_pattern = r'[\+]?[41][\s\-\.]?\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d[\s\-\.]*\d'
-            phone_match = re.search(phone_pattern, soup.get_text())
-            if phone_match:
-                # Clean up the phone number
-                phone = re.sub(r'[^\+\d]', '', phone_match.group())
-                if len(phone) >= 10:  # Valid phone number length
-                    profile_data['phone'] = phone
-
-            # Email
-            email_elem = soup.find('a', href=re.compile(r'mailto:', re.I))
-            if email_elem:
-                profile_data['email'] = email_elem.get('href').replace('mailto:', '')
-
-            # Website
-            website_elem = soup.find('a', href=re.compile(r'^https?://(?!www\.psychologie\.ch)', re.I))
-            if website_elem:
-                profile_data['website'] = website_elem.get('href')
-
-            # Online sessions - look for "Available" or "Unavailable"
-            online_sessions_elem = soup.find(string=re.compile(r'Online sessions?', re.I))
-            if online_sessions_elem:
-                # Get the parent or next element that contains the status
-                parent = online_sessions_elem.parent
-                if parent:
-                    # Look for status in siblings or parent's text
-                    status_match = re.search(r'(Available|Unavailable)', parent.get_text(), re.I)
-                    if status_match:
-                        profile_data['online_sessions'] = status_match.group(1).lower()
-                    else:
-                        # Look in the broader context
-                        context = parent.find_parent('div') if parent.name != 'div' else parent
-                        if context:
-                            status_match = re.search(r'(Available|Unavailable)', context.get_text(), re.I)
-                            if status_match:
-                                profile_data['online_sessions'] = status_match.group(1).lower()
-
-            # Fallback: search the entire page text for online session status
-            if 'online_sessions' not in profile_data:
-                page_text = soup.get_text()
-                if 'Online sessions' in page_text:
-                    if 'Available' in page_text:
-                        profile_data['online_sessions'] = 'available'
-                    elif 'Unavailable' in page_text:
-                        profile_data['online_sessions'] = 'unavailable'
-
-            # Profile image - look for the main profile image
-            profile_img = soup.find('img', class_=re.compile(r'br-16px|profile|avatar', re.I))
-            if profile_img and profile_img.get('src'):
-                profile_data['profile_image_url'] = profile_img['src']
-            else:
-                # Fallback: look for any img with psychologist name in alt
-                alt_img = soup.find('img', alt=re.compile(f'{firstname}|{lastname}', re.I))
-                if alt_img and alt_img.get('src'):
-                    profile_data['profile_image_url'] = alt_img['src']
-
-            # FSP titles
-            fsp_titles = []
-            title_elems = soup.find_all(string=re.compile(r'Fachpsychologin|Fachpsychologe|Eidgenössisch', re.I))
-            for elem in title_elems:
-                if elem and elem.parent:
-                    title_text = elem.parent.get_text(strip=True)
-                    if len(title_text) < 200:  # Avoid picking up large blocks of text
-                        fsp_titles.append(title_text)
-            if fsp_titles:
-                profile_data['fsp_titles'] = list(set(fsp_titles))  # Remove duplicates
-
-            # Specialisations - improved extraction with filtering
-            specialisations = []
-
-            # Look for specialisation section more specifically
-            spec_section = soup.find(string=re.compile(r'Specialisation', re.I))
-            if spec_section:
-                parent = spec_section.parent
-                if parent:
-                    container = parent.find_next_sibling(['div', 'p'])
-                    if container:
-                        spec_text = container.get_text(strip=True)
-                        if spec_text and len(spec_text) > 10 and len(spec_text) < 1000:
-                            # Clean up the text - remove quotes and normalize
-                            spec_text = spec_text.strip('"').strip("'")
-                            if spec_text:
-                                specialisations.append(spec_text)
-
-            # Also look for structured specialisation data in the page
-            # Look for elements that might contain actual specializations (not URLs or JS)
-            potential_specs = soup.find_all(['p', 'div'], string=re.compile(r'(therapie|psychologie|systemisch|hypnose|cognitive|behavioral|trauma)', re.I))
-            for elem in potential_specs[:3]:  # Limit to avoid spam
-                text = elem.get_text(strip=True)
-                # Filter out problematic content
-                if (len(text) > 15 and len(text) < 200 and
-                    not any(problem in text.lower() for problem in [
-                        'http', 'https', 'var ', 'function', 'redirect', 'role of the fsp',
-                        'psychologie.ch', 'afp.psychologie.ch', 'gtm.', 'google', 'facebook'
-                    ])):
-                    # Check if it looks like a real specialization
-                    if any(keyword in text.lower() for keyword in [
-                        'therapie', 'psychologie', 'systemisch', 'hypnose', 'trauma',
-                        'kognitiv', 'behavioral', 'psychoanalyse', 'gestalt', 'familie'
-                    ]):
-                        specialisations.append(text)
-
-            # Remove duplicates and limit
-            if specialisations:
-                # Filter out duplicates and very similar entries
-                unique_specs = []
-                seen = set()
-                for spec in specialisations:
-                    # Create a normalized version for comparison
-                    normalized = re.sub(r'[^\w\s]', '', spec.lower()).strip()
-                    if normalized not in seen and len(normalized) > 10:
-                        unique_specs.append(spec)
-                        seen.add(normalized)
-
-                profile_data['specialisations'] = unique_specs[:3]  # Limit to 3 high-quality specs
-
-            # Languages
-            languages = []
-            lang_terms = ['German', 'French', 'Italian', 'English', 'Swiss German']
-            for lang in lang_terms:
-                if soup.find(string=re.compile(rf'\b{lang}\b', re.I)):
-                    languages.append(lang)
-            if languages:
-                profile_data['languages'] = languages
-
-            # Extract structured sections: About me, Offer, Target groups, Languages, Billing
-
-            # About me section - targeted biography extraction
-            about_me_text = ""
-
-            # Look for the specific biography content that follows "About me" or similar headers
-            # First, find the "About me" header
-            about_headers = soup.find_all(['h2', 'h3', 'h4', 'div', 'strong'], string=re.compile(r'about me|über mich|à propos|biographie', re.I))
-
-            for header in about_headers:
-                # Get the next sibling element which should contain the biography
-                next_elem = header.find_next_sibling(['p', 'div'])
-                if next_elem:
-                    text = next_elem.get_text(strip=True)
-                    # Check if this looks like biography content
-                    if (len(text) > 50 and len(text) < 3000 and
-                        not text.startswith('http') and 'var ' not in text.lower() and
-                        not any(problem in text for problem in ['billing', 'offer', 'languages', 'telephone', 'email'])):
-                        # Look for biography indicators
-                        bio_indicators = ['born', 'trained', 'studied', 'worked', 'experience', 'therapist', 'psychologist',
-                                        'university', 'degree', 'practice', 'clinic', 'hospital', 'i ', 'je ', 'my ',
-                                        'trained', 'worked as', 'specialized in']
-                        if any(indicator in text.lower() for indicator in bio_indicators):
-                            about_me_text = text
-                            break
-
-                # If next sibling didn't work, try to find content within the same parent
-                if not about_me_text:
-                    parent = header.parent
-                    if parent and parent.name in ['div', 'section']:
-                        # Get all paragraphs in this section after the header
-                        header_index = None
-                        for i, child in enumerate(parent.children):
-                            if child == header or (hasattr(child, 'get_text') and header.get_text().strip() in child.get_text()):
-                                header_index = i
-                                break
-
-                        if header_index is not None:
-                            content_parts = []
-                            for child in list(parent.children)[header_index + 1:]:
-                                if child.name in ['p', 'div'] and hasattr(child, 'get_text'):
-                                    text = child.get_text(strip=True)
-                                    if text and len(text) > 20:
-                                        content_parts.append(text)
-                                        if len(content_parts) >= 3:  # Limit to first few paragraphs
-                                            break
-
-                            if content_parts:
-                                combined_text = ' '.join(content_parts)
-                                if len(combined_text) > 100:
-                                    about_me_text = combined_text
+        # If next sibling didn't work, try to find content within the same parent
+        if not about_me_text:
+            parent = header.parent
+            if parent and parent.name in ['div', 'section']:
+                # Get all paragraphs in this section after the header
+                header_index = None
+                for i, child in enumerate(parent.children):
+                    if child == header or (hasattr(child, 'get_text') and header.get_text().strip() in child.get_text()):
+                        header_index = i
+                        break
+
+                if header_index is not None:
+                    content_parts = []
+                    for child in list(parent.children)[header_index + 1:]:
+                        if child.name in ['p', 'div'] and hasattr(child, 'get_text'):
+                            text = child.get_text(strip=True)
+                            if text and len(text) > 20:
+                                content_parts.append(text)
+                                if len(content_parts) >= 3:  # Limit to first few paragraphs
                                     break
 
-            # Fallback: look for substantial paragraphs that contain first-person language
-            if not about_me_text:
-                paragraphs = soup.find_all('p')
-                for p in paragraphs:
-                    text = p.get_text(strip=True)
-                    if (len(text) > 80 and len(text) < 2000 and
-                        not text.startswith('http') and 'var ' not in text.lower() and
-                        not p.find_parent(['ul', 'ol', 'table', 'header', 'nav']) and
-                        not any(header in text.lower() for header in ['billing', 'offer', 'languages', 'telephone', 'email', 'website', 'address'])):
-                        # Must contain first-person indicators or biography keywords
-                        if (any(word in text.lower() for word in ['i ', 'je ', 'my ', 'me ', 'born', 'trained', 'studied', 'worked']) and
-                            not text.lower().startswith(('news', 'psychologists', 'psyfinder'))):
-                            about_me_text = text
+                    if content_parts:
+                        combined_text = ' '.join(content_parts)
+                        if len(combined_text) > 100:
+                            about_me_text = combined_text
                             break
 
-            if about_me_text:
-                # Clean up the text
-                about_me_text = re.sub(r'\s+', ' ', about_me_text).strip()
-                about_me_text = about_me_text.strip('.,;:- ')
-                profile_data['about_me'] = about_me_text[:3000]  # Allow up to 3000 chars for biographies
-
-            # Offer/Services section - comprehensive extraction
-            services = []
-
-            # First, try structured extraction from "Offer" section
-            offer_section = soup.find(string=re.compile(r'Offer', re.I))
-            if offer_section:
-                parent = offer_section.parent
-                if parent:
-                    container = parent.find_next_sibling(['div', 'ul', 'p'])
-                    if container:
-                        # Try to extract from list items first
-                        list_items = container.find_all('li')
-                        if list_items:
-                            for item in list_items:
-                                text = item.get_text(strip=True)
-                                if len(text) > 2 and not text.startswith('http'):
-                                    services.append(text)
-                        else:
-                            # If no list items, try to extract from continuous text
-                            container_text = container.get_text(strip=True)
-                            if container_text and len(container_text) > 10:
-                                # Split on common separators and clean up
-                                # Handle patterns like "Depression Panic attacks and anxiety Burnout"
-                                parts = re.split(r'\s+(?=Unemployment|Work stoppage|Dissatisfaction|Bulling|Psychosocial|Relationship|Divorce|Family|Gender|Sexual|Retirement|Loneliness|Behavioural|Substance|Food|Stress|Bereavement|Suicidal|Existential|Sleep|Chronic|Depression|Panic|Burnout|Self-esteem)', container_text)
-
-                                for part in parts:
-                                    part = part.strip()
-                                    if len(part) > 2 and not part.startswith('http'):
-                                        # Further split on spaces if it's a compound term
-                                        subparts = part.split()
-                                        if len(subparts) <= 4:  # Keep short phrases together
-                                            services.append(part)
-                                        else:
-                                            # For longer phrases, split on common connectors
-                                            subparts = re.split(r'\s+and\s+|\s+or\s+', part)
-                                            services.extend([sp.strip() for sp in subparts if sp.strip()])
-
-            # Second, try to find services in any div or section that contains service-like content
-            if len(services) < 10:  # If we didn't get many services, try broader search
-                all_containers = soup.find_all(['div', 'section'], class_=re.compile(r'(content|services|offer)', re.I))
-                for container in all_containers:
-                    text = container.get_text(strip=True)
-                    if len(text) > 50 and any(keyword in text.lower() for keyword in ['depression', 'anxiety', 'therapy', 'stress']):
-                        # Extract service-like terms from the text
-                        service_candidates = re.findall(r'\b[A-Z][a-z]+(?:\s+[a-z]+){0,3}\b', text)
-                        for candidate in service_candidates:
-                            candidate = candidate.strip()
-                            if (len(candidate) > 3 and len(candidate) < 50 and
-                                candidate.lower() not in ['offer', 'services', 'target', 'groups', 'languages', 'billing', 'about', 'specialisation']):
-                                services.append(candidate)
-
-            # Third, fallback to keyword-based extraction for any missing services
-            fallback_services = []
-            service_keywords = [
-                'Unemployment', 'Work stoppage', 'Dissatisfaction with job', 'Bullying', 'Psychosocial risks',
-                'Relationship problems', 'Divorce', 'Separation', 'Family problems', 'Gender identity',
-                'Sexual orientation', 'Retirement', 'Loneliness', 'Behavioural addictions', 'Substance addictions',
-                'Food-related problems', 'Behavioural problems', 'Stress related to learning', 'Bullying/harassment',
-                'Bereavement', 'Suicidal thoughts', 'Stress', 'Existential crisis', 'Sleep-related problems',
-                'Chronic pain', 'Depression', 'Panic attacks', 'Anxiety', 'Burnout', 'Self-esteem'
-            ]
-
-            for keyword in service_keywords:
-                if soup.find(string=re.compile(rf'\b{re.escape(keyword)}\b', re.I)):
-                    fallback_services.append(keyword)
-
-            services.extend(fallback_services)
-
-            # Clean and deduplicate
-            if services:
-                cleaned_services = []
-                seen = set()
-                noise_terms = [
-                    'offer', 'services', 'and', 'with', 'for', 'the', 'to', 'of', 'in', 'at', 'by', 'on',
-                    'greater protection for patients', 'the role of the', 'who pays what', 'rights', 'online intervention',
-                    'training', 'formapsy', 'how to obtain', 'qualification', 'postgraduate', 'become a member',
-                    'registration', 'next', 'fsp', 'federation', 'about us', 'affiliated institutions', 'working at',
-                    'job offers', 'contact', 'declaration', 'confidentiality', 'terms and conditions', 'impressum'
-                ]
-
-                for service in services:
-                    service = service.strip()
-                    # Skip if it's noise or too short/long
-                    if (len(service) < 3 or len(service) > 100 or
-                        service.lower() in noise_terms or
-                        any(noise in service.lower() for noise in noise_terms) or
-                        service in seen):
-                        continue
-
-                    cleaned_services.append(service)
-                    seen.add(service)
-
-                profile_data['offer'] = cleaned_services[:SETTINGS['MAX_SERVICES_PER_PROFILE']]
-
-            # Target groups section
-            target_section = soup.find(string=re.compile(r'Target groups', re.I))
-            if target_section:
-                parent = target_section.parent
-                if parent:
-                    container = parent.find_next_sibling(['div', 'ul'])
-                    if container:
-                        targets = []
-                        list_items = container.find_all('li') or container.find_all(string=True)
-                        for item in list_items:
-                            if isinstance(item, str):
-                                text = item.strip()
-                            else:
-                                text = item.get_text(strip=True)
-
-                            if len(text) > 2 and not text.startswith('http'):
-                                targets.append(text)
-
-                        if targets:
-                            profile_data['target_groups'] = targets[:15]  # Limit to 15 groups
-
-            # Languages - improved extraction
-            languages_section = soup.find(string=re.compile(r'Languages', re.I))
-            if languages_section:
-                parent = languages_section.parent
-                if parent:
-                    container = parent.find_next_sibling(['div', 'ul'])
-                    if container:
-                        languages = []
-                        list_items = container.find_all('li') or container.find_all(string=True)
-                        for item in list_items:
-                            if isinstance(item, str):
-                                text = item.strip()
-                            else:
-                                text = item.get_text(strip=True)
-
-                            # Clean up language names
-                            text = text.strip()
-                            if len(text) > 2 and text not in ['Languages', 'Sprachen', 'Langues', 'Lingue']:
-                                languages.append(text)
-
-                        if languages:
-                            profile_data['languages'] = languages[:SETTINGS['MAX_LANGUAGES_PER_PROFILE']]
-
-            # Billing information - improved formatting
-            billing_info = []
-
-            billing_section = soup.find(string=re.compile(r'Billing', re.I))
-            if billing_section:
-                parent = billing_section.parent
-                if parent:
-                    container = parent.find_next_sibling(['div', 'ul', 'p'])
-                    if container:
-                        if container.name == 'ul':
-                            # Handle list format
-                            list_items = container.find_all('li')
-                            for item in list_items:
-                                text = item.get_text(strip=True)
-                                if text and len(text) > 3:
-                                    billing_info.append(text)
-                        else:
-                            # Handle paragraph format
-                            billing_text = container.get_text(strip=True)
-                            if billing_text:
-                                # Split concatenated billing info
-                                # Common patterns: "Covered by basic insuranceTo be paid by yourself"
-                                billing_text = re.sub(r'([a-z])([A-Z])', r'\1. \2', billing_text)
-                                billing_text = re.sub(r'\s+', ' ', billing_text)
-                                billing_info.append(billing_text)
-
-            # Also look for billing info in other locations
-            billing_keywords = ['covered by', 'supplementary', 'basic insurance', 'paid by yourself']
-            for keyword in billing_keywords:
-                elements = soup.find_all(string=re.compile(keyword, re.I))
-                for elem in elements:
-                    if elem and elem.parent:
-                        text = elem.parent.get_text(strip=True)
-                        if len(text) > 10 and text not in billing_info:
-                            # Clean up formatting
-                            text = re.sub(r'\s+', ' ', text)
+    if about_me_text:
+        return clean_about_me(about_me_text)
+    return None
+
+@profile_extractor('about_me_paragraphs', 'about_me', kind='fallback')
+def extract_about_me_paragraphs(soup, profile_data, candidates):
+    # Fallback: look for substantial paragraphs that contain first-person language
+    paragraphs = soup.find_all('p')
+    for p in paragraphs:
+        text = p.get_text(strip=True)
+        if (len(text) > 80 and len(text) < 2000 and
+            not text.startswith('http') and 'var ' not in text.lower() and
+            not p.find_parent(['ul', 'ol', 'table', 'header', 'nav']) and
+            not any(header in text.lower() for header in ['billing', 'offer', 'languages', 'telephone', 'email', 'website', 'address'])):
+            # Must contain first-person indicators or biography keywords
+            if (any(word in text.lower() for word in ['i ', 'je ', 'my ', 'me ', 'born', 'trained', 'studied', 'worked']) and
+                not text.lower().startswith(('news', 'psychologists', 'psyfinder'))):
+                return clean_about_me(text)
+    return None
+
+def clean_about_me(about_me_text):
+    about_me_text = re.sub(r'\s+', ' ', about_me_text).strip()
+    about_me_text = about_me_text.strip('.,;:- ')
+    return about_me_text[:3000]  # Allow up to 3000 chars for biographies
+
+@profile_extractor('offer_section', 'offer', kind='collect')
+def extract_offer_section(soup, profile_data, candidates):
+    # First, try structured extraction from "Offer" section
+    services = []
+    offer_section = soup.find(string=re.compile(r'Offer', re.I))
+    if offer_section:
+        parent = offer_section.parent
+        if parent:
+            container = parent.find_next_sibling(['div', 'ul', 'p'])
+            if container:
+                # Try to extract from list items first
+                list_items = container.find_all('li')
+                if list_items:
+                    for item in list_items:
+                        text = item.get_text(strip=True)
+                        if len(text) > 2 and not text.startswith('http'):
+                            services.append(text)
+                else:
+                    # If no list items, try to extract from continuous text
+                    container_text = container.get_text(strip=True)
+                    if container_text and len(container_text) > 10:
+                        # Split on common separators and clean up
+                        # Handle patterns like "Depression Panic attacks and anxiety Burnout"
+                        parts = re.split(r'\s+(?=Unemployment|Work stoppage|Dissatisfaction|Bulling|Psychosocial|Relationship|Divorce|Family|Gender|Sexual|Retirement|Loneliness|Behavioural|Substance|Food|Stress|Bereavement|Suicidal|Existential|Sleep|Chronic|Depression|Panic|Burnout|Self-esteem)', container_text)
+
+                        for part in parts:
+                            part = part.strip()
+                            if len(part) > 2 and not part.startswith('http'):
+                                # Further split on spaces if it's a compound term
+                                subparts = part.split()
+                                if len(subparts) <= 4:  # Keep short phrases together
+                                    services.append(part)
+                                else:
+                                    # For longer phrases, split on common connectors
+                                    subparts = re.split(r'\s+and\s+|\s+or\s+', part)
+                                    services.extend([sp.strip() for sp in subparts if sp.strip()])
+    return services
+
+@profile_extractor('offer_containers', 'offer', kind='collect')
+def extract_offer_containers(soup, profile_data, candidates):
+    # Second, try to find services in any div or section that contains service-like content
+    services = []
+    if len(candidates.get('offer', ())) < 10:  # If we didn't get many services, try broader search
+        all_containers = soup.find_all(['div', 'section'], class_=re.compile(r'(content|services|offer)', re.I))
+        for container in all_containers:
+            text = container.get_text(strip=True)
+            if len(text) > 50 and any(keyword in text.lower() for keyword in ['depression', 'anxiety', 'therapy', 'stress']):
+                # Extract service-like terms from the text
+                service_candidates = re.findall(r'\b[A-Z][a-z]+(?:\s+[a-z]+){0,3}\b', text)
+                for candidate in service_candidates:
+                    candidate = candidate.strip()
+                    if (len(candidate) > 3 and len(candidate) < 50 and
+                        candidate.lower() not in ['offer', 'services', 'target', 'groups', 'languages', 'billing', 'about', 'specialisation']):
+                        services.append(candidate)
+    return services
+
+@profile_extractor('offer_keywords', 'offer', kind='collect')
+def extract_offer_keywords(soup, profile_data, candidates):
+    # Third, fallback to keyword-based extraction for any missing services
+    fallback_services = []
+    service_keywords = [
+        'Unemployment', 'Work stoppage', 'Dissatisfaction with job', 'Bullying', 'Psychosocial risks',
+        'Relationship problems', 'Divorce', 'Separation', 'Family problems', 'Gender identity',
+        'Sexual orientation', 'Retirement', 'Loneliness', 'Behavioural addictions', 'Substance addictions',
+        'Food-related problems', 'Behavioural problems', 'Stress related to learning', 'Bullying/harassment',
+        'Bereavement', 'Suicidal thoughts', 'Stress', 'Existential crisis', 'Sleep-related problems',
+        'Chronic pain', 'Depression', 'Panic attacks', 'Anxiety', 'Burnout', 'Self-esteem'
+    ]
+
+    for keyword in service_keywords:
+        if soup.find(string=re.compile(rf'\b{re.escape(keyword)}\b', re.I)):
+            fallback_services.append(keyword)
+    return fallback_services
+
+@profile_extractor('offer', 'offer', kind='finalize')
+def finalize_offer(soup, profile_data, candidates):
+    # Clean and deduplicate
+    services = candidates.get('offer')
+    if not services:
+        return None
+    cleaned_services = []
+    seen = set()
+    noise_terms = [
+        'offer', 'services', 'and', 'with', 'for', 'the', 'to', 'of', 'in', 'at', 'by', 'on',
+        'greater protection for patients', 'the role of the', 'who pays what', 'rights', 'online intervention',
+        'training', 'formapsy', 'how to obtain', 'qualification', 'postgraduate', 'become a member',
+        'registration', 'next', 'fsp', 'federation', 'about us', 'affiliated institutions', 'working at',
+        'job offers', 'contact', 'declaration', 'confidentiality', 'terms and conditions', 'impressum'
+    ]
+
+    for service in services:
+        service = service.strip()
+        # Skip if it's noise or too short/long
+        if (len(service) < 3 or len(service) > 100 or
+            service.lower() in noise_terms or
+            any(noise in service.lower() for noise in noise_terms) or
+            service in seen):
+            continue
+
+        cleaned_services.append(service)
+        seen.add(service)
+
+    return cleaned_services[:SETTINGS['MAX_SERVICES_PER_PROFILE']]
+
+def extract_section_list(soup, heading, skip=()):
+    """Items of the div/ul following a section heading (list items, else its text nodes)"""
+    section = soup.find(string=re.compile(heading, re.I))
+    if not section or not section.parent:
+        return []
+    container = section.parent.find_next_sibling(['div', 'ul'])
+    if not container:
+        return []
+    items = []
+    for item in container.find_all('li') or container.find_all(string=True):
+        text = item.strip() if isinstance(item, str) else item.get_text(strip=True)
+        if len(text) > 2 and text not in skip:
+            items.append(text)
+    return items
+
+@profile_extractor('target_groups', 'target_groups')
+def extract_target_groups(soup, profile_data, candidates):
+    targets = [text for text in extract_section_list(soup, r'Target groups') if not text.startswith('http')]
+    return targets[:15] or None  # Limit to 15 groups
+
+@profile_extractor('languages_section', 'languages')
+def extract_languages_section(soup, profile_data, candidates):
+    # Languages - improved extraction
+    languages = extract_section_list(soup, r'Languages', skip=('Languages', 'Sprachen', 'Langues', 'Lingue'))
+    return languages[:SETTINGS['MAX_LANGUAGES_PER_PROFILE']] or None
+
+@profile_extractor('billing_section', 'billing', kind='collect')
+def extract_billing_section(soup, profile_data, candidates):
+    billing_info = []
+    billing_section = soup.find(string=re.compile(r'Billing', re.I))
+    if billing_section:
+        parent = billing_section.parent
+        if parent:
+            container = parent.find_next_sibling(['div', 'ul', 'p'])
+            if container:
+                if container.name == 'ul':
+                    # Handle list format
+                    list_items = container.find_all('li')
+                    for item in list_items:
+                        text = item.get_text(strip=True)
+                        if text and len(text) > 3:
                             billing_info.append(text)
+                else:
+                    # Handle paragraph format
+                    billing_text = container.get_text(strip=True)
+                    if billing_text:
+                        # Split concatenated billing info
+                        # Common patterns: "Covered by basic insuranceTo be paid by yourself"
+                        billing_text = re.sub(r'([a-z])([A-Z])', r'\1. \2', billing_text)
+                        billing_text = re.sub(r'\s+', ' ', billing_text)
+                        billing_info.append(billing_text)
+    return billing_info
+
+@profile_extractor('billing_keywords', 'billing', kind='collect')
+def extract_billing_keywords(soup, profile_data, candidates):
+    # Also look for billing info in other locations
+    billing_info = list(candidates.get('billing', ()))
+    found = []
+    billing_keywords = ['covered by', 'supplementary', 'basic insurance', 'paid by yourself']
+    for keyword in billing_keywords:
+        elements = soup.find_all(string=re.compile(keyword, re.I))
+        for elem in elements:
+            if elem and elem.parent:
+                text = elem.parent.get_text(strip=True)
+                if len(text) > 10 and text not in billing_info:
+                    # Clean up formatting
+                    text = re.sub(r'\s+', ' ', text)
+                    billing_info.append(text)
+                    found.append(text)
+    return found
+
+@profile_extractor('billing', 'billing', kind='finalize')
+def finalize_billing(soup, profile_data, candidates):
+    billing_info = candidates.get('billing')
+    if not billing_info:
+        return None
+    # Remove duplicates and format nicely
+    unique_billing = list(set(billing_info))
+    return unique_billing[:3]  # Limit to 3 billing options
+
+@profile_extractor('offer_fallback', 'offer', kind='fallback')
+def extract_offer_fallback(soup, profile_data, candidates):
+    # Fallback for services if structured extraction didn't work
+    services = []
+    service_terms = ['Depression', 'Anxiety', 'Therapy', 'Counseling', 'Psychotherapy', 'Burnout', 'Stress', 'Trauma', 'Divorce', 'Bereavement', 'Panic attacks']
+    for service in service_terms:
+        if soup.find(string=re.compile(rf'\b{re.escape(service)}\b', re.I)):
+            services.append(service)
+    if services:
+        return list(set(services))
+    return None
+
+def parse_profile_html(content, psychologist_id, user_id, firstname, lastname, url):
+    """Extract the profile fields from a fetched profile page with the registered extractors"""
+    from bs4 import BeautifulSoup
+    parse_started = time.perf_counter()
+    soup = BeautifulSoup(content, 'html.parser')
+    METRICS.observe('scraper_extractor_seconds', time.perf_counter() - parse_started, extractor='soup')
+
+    # Extract data based on the structure we saw
+    profile_data = {
+        'id': psychologist_id,
+        'user_id': user_id,
+        'firstname': firstname,
+        'lastname': lastname,
+        'url': url,
+        'scraped_at': time.time()
+    }
 
-            if billing_info:
-                # Remove duplicates and format nicely
-                unique_billing = list(set(billing_info))
-                profile_data['billing'] = unique_billing[:3]  # Limit to 3 billing options
-
-            # Fallback for services if structured extraction didn't work
-            if 'offer' not in profile_data:
-                services = []
-                service_terms = ['Depression', 'Anxiety', 'Therapy', 'Counseling', 'Psychotherapy', 'Burnout', 'Stress', 'Trauma', 'Divorce', 'Bereavement', 'Panic attacks']
-                for service in service_terms:
-                    if soup.find(string=re.compile(rf'\b{re.escape(service)}\b', re.I)):
-                        services.append(service)
-                if services:
-                    profile_data['offer'] = list(set(services))
+    failures = run_profile_extractors(soup, profile_data)
+    if failures:
+        METRICS.inc('scraper_pages_total', result='partial')
+        for name, e in failures:
+            log.warning("Error extracting %s for %s %s: %s", name, firstname, lastname, e,
+                        extra={'record_id': psychologist_id, 'extractor': name})
 
-        except Exception as e:
-            print(f"Error extracting data for {firstname} {lastname}: {e}")
+    record_stage_time('parse', time.perf_counter() - parse_started)
+    return profile_data
 
+def scrape_profile_page(psychologist_id, user_id, firstname, lastname, url_slug, archive=False):
+    """Scrape individual profile page for psychologist data (archive=True keeps the page for re-extraction)."""
+    import requests
+    url = profile_url(url_slug)
+
+    try:
+        content = fetch_profile_page(url)
+        if archive:
+            archive_profile_page(psychologist_id, content)
+        profile_data = parse_profile_html(content, psychologist_id, user_id, firstname, lastname, url)
+        METRICS.inc('scraper_pages_total', result='ok')
         return profile_data
 
     except requests.RequestException as e:
-        print(f"Request error for {firstname} {lastname}: {e}")
+        METRICS.inc('scraper_pages_total', result='request_error')
+        log.warning("Request error for %s %s: %s", firstname, lastname, e, extra={'record_id': psychologist_id})
         return None
     except Exception as e:
-        print(f"Error scraping {firstname} {lastname}: {e}")
+        METRICS.inc('scraper_pages_total', result='error')
+        log.warning("Error scraping %s %s: %s", firstname, lastname, e, extra={'record_id': psychologist_id})
         return None
 
 def save_incremental_data(output_file, new_data):
@@ -1324,32 +3522,6 @@ def validate_url_construction(psychologists, num_tests=5):
         'url_slug': 'jean-francois-briefer'  # Expected result
     }
 
-    def normalize_for_url(text):
-        # Convert to lowercase and replace spaces with hyphens
-        text = text.lower().replace(' ', '-')
-
-        # Replace common special characters with ASCII equivalents
-        char_map = {
-            'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss',
-            'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'å': 'a',
-            'ç': 'c', 'ć': 'c', 'č': 'c',
-            'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-            'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-            'ñ': 'n', 'ń': 'n',
-            'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o',
-            'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-            'ý': 'y', 'ÿ': 'y',
-            'ż': 'z', 'ź': 'z', 'ž': 'z'
-        }
-
-        for special, normal in char_map.items():
-            text = text.replace(special, normal)
-
-        # Remove any remaining special characters except hyphens and alphanumeric
-        text = re.sub(r'[^\w\-]', '', text)
-
-        return text
-
     expected_slug = f"{normalize_for_url(test_briefer['firstname'])}-{normalize_for_url(test_briefer['lastname'])}"
     print(f"    Input: {test_briefer['firstname']} {test_briefer['lastname']}")
     print(f"    Expected: {expected_slug}")
@@ -1361,20 +3533,15 @@ def validate_url_construction(psychologists, num_tests=5):
     # Get random samples (excluding the Briefer test)
     test_samples = random.sample(psychologists, min(num_tests, len(psychologists)))
 
-    base_url = "https://www.psychologie.ch/en/psyfinder/"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-
     successful_urls = 0
     failed_urls = 0
 
     for i, psych in enumerate(test_samples):
-        url = f"{base_url}{psych['url_slug']}"
+        url = profile_url(psych['url_slug'])
         print(f"  Test {i+1}: {psych['firstname']} {psych['lastname']} -> {psych['url_slug']}")
 
         try:
-            response = requests.head(url, headers=headers, timeout=5)  # Use HEAD request for faster testing
+            response = http_session().head(url, timeout=5)  # Use HEAD request for faster testing
             if response.status_code == 200:
                 successful_urls += 1
                 print("    SUCCESS: URL valid")
@@ -1390,6 +3557,7 @@ def validate_url_construction(psychologists, num_tests=5):
     print(f"\nURL validation complete: {successful_urls} valid, {failed_urls} failed")
     return successful_urls > failed_urls * 0.8  # Accept if >80% success rate
 
+@recorded_run('merge')
 def scrape_and_merge_in_place():
     """Scrape profiles and merge data directly into psychologie.ch.json"""
 
@@ -1426,6 +3594,7 @@ def scrape_and_merge_in_place():
         return
 
     print(f"Found {len(psychologists_to_process)} psychologists total")
+    psychologists_to_process = select_markers(psychologists_to_process)
 
     # Apply profile limit from configuration
     if SETTINGS['MAX_PROFILES_TO_SCRAPE'] is not None:
@@ -1438,6 +3607,7 @@ def scrape_and_merge_in_place():
     failed = 0
     skipped = 0
     save_interval = SETTINGS['SAVE_INTERVAL']  # Save every N profiles
+    telemetry = ACTIVE_TELEMETRY
     start_time = time.time()
     last_progress_time = start_time
 
@@ -1461,15 +3631,16 @@ def scrape_and_merge_in_place():
         psych_id = psychologist.get('id')
 
         if not (firstname and lastname and psych_id):
-            if SETTINGS['DEBUG_MODE'] and psych_id == SETTINGS['DEBUG_RECORD_ID']:
-                print(f"DEBUG: Skipping record {psych_id} - condition failed (firstname={repr(firstname)}, lastname={repr(lastname)}, psych_id={repr(psych_id)})")
+            log.debug("DEBUG: Skipping record %s - condition failed (firstname=%r, lastname=%r, psych_id=%r)",
+                      psych_id, firstname, lastname, psych_id, extra={'record_id': psych_id})
             continue
 
         # Skip already scraped records
         if 'scraped_at' in psychologist:
             skipped += 1
-            if SETTINGS['DEBUG_MODE'] and psych_id == SETTINGS['DEBUG_RECORD_ID']:
-                print(f"DEBUG: Skipping record {psych_id} - already scraped at {psychologist['scraped_at']}")
+            telemetry.count(marker_canton(psychologist), 'skipped')
+            log.debug("DEBUG: Skipping record %s - already scraped at %s", psych_id, psychologist['scraped_at'],
+                      extra={'record_id': psych_id})
             continue
 
         # Show progress every 10 records or every 30 seconds
@@ -1481,69 +3652,45 @@ def scrape_and_merge_in_place():
             eta_seconds = (records_to_process - processed_count) / rate if rate > 0 else 0
             eta_minutes = eta_seconds / 60
 
-            print(f"Progress: {processed_count}/{records_to_process} ({processed_count/records_to_process*100:.1f}%) | "
-                  f"Elapsed: {elapsed/60:.1f}min | Rate: {rate:.1f} rec/min | "
-                  f"ETA: {eta_minutes:.1f}min | Success: {successful} | Failed: {failed} | Skipped: {skipped}", flush=True)
+            log.info("Progress: %d/%d (%.1f%%) | Elapsed: %.1fmin | Rate: %.1f rec/min | "
+                     "ETA: %.1fmin | Success: %d | Failed: %d | Skipped: %d",
+                     processed_count, records_to_process, processed_count / records_to_process * 100,
+                     elapsed / 60, rate, eta_minutes, successful, failed, skipped)
             last_progress_time = current_time
 
-        print(f"Processing {i+1}/{len(psychologists_to_process)}: {firstname} {lastname}", flush=True)
+        log.info("Processing %d/%d: %s %s", i + 1, len(psychologists_to_process), firstname, lastname,
+                 extra={'record_id': psych_id})
 
         # Create URL slug
-        def normalize_for_url(text):
-            text = text.lower().replace(' ', '-')
-            char_map = {
-                'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss',
-                'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'å': 'a',
-                'ç': 'c', 'ć': 'c', 'č': 'c',
-                'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-                'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-                'ñ': 'n', 'ń': 'n',
-                'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o',
-                'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-                'ý': 'y', 'ÿ': 'y',
-                'ż': 'z', 'ź': 'z', 'ž': 'z'
-            }
-            for special, normal in char_map.items():
-                text = text.replace(special, normal)
-            text = re.sub(r'[^\w\-]', '', text)
-            return text
-
-        firstname_slug = normalize_for_url(firstname.strip())
-        lastname_slug = normalize_for_url(lastname.strip())
-
-        url_slug = f"{firstname_slug}-{lastname_slug}"
+        url_slug = build_url_slug(firstname, lastname)
 
         # Scrape the profile
-        if SETTINGS['DEBUG_MODE'] and psych_id == SETTINGS['DEBUG_RECORD_ID']:
-            print(f"DEBUG: About to scrape URL: https://www.psychologie.ch/en/psyfinder/{url_slug}")
+        log.debug("DEBUG: About to scrape URL: %s%s", SETTINGS['BASE_URL'], url_slug, extra={'record_id': psych_id})
 
         result = scrape_profile_page(psych_id, user.get('id'), firstname, lastname, url_slug)
+        telemetry.count(marker_canton(psychologist), 'fetched')
 
-        if SETTINGS['DEBUG_MODE'] and psych_id == SETTINGS['DEBUG_RECORD_ID']:
-            print(f"DEBUG: Scraping result: {result is not None} (keys: {list(result.keys()) if result else 'None'})")
+        log.debug("DEBUG: Scraping result: %s (keys: %s)", result is not None, result.keys() if result else None,
+                  extra={'record_id': psych_id})
 
         if result:
-            # Merge scraped data directly into the psychologist record
-            for key, value in result.items():
-                if key not in psychologist or not psychologist[key]:  # Only add if missing or empty
-                    psychologist[key] = value
-                elif key in ['offer', 'target_groups', 'languages', 'billing', 'specialisations', 'fsp_titles']:
-                    # For array fields, merge them
-                    if isinstance(value, list) and isinstance(psychologist.get(key), list):
-                        combined = list(set(psychologist[key] + value))
-                        psychologist[key] = combined
-                    elif value and not psychologist.get(key):
-                        psychologist[key] = value
+            # Merge scraped data directly into the psychologist record, field by field
+            # No DataMerge row here: this mode only updates the snapshot file, never the Therapist row
+            merged, _ = merge_profile(psychologist, result)
+            psychologist.update(merged)
 
             successful += 1
-            print("  SUCCESS - Data merged directly into record")
+            telemetry.count(marker_canton(psychologist), 'merged')
+            log.info("  SUCCESS - Data merged directly into record", extra={'record_id': psych_id})
         else:
             failed += 1
-            print(f"  FAILED - Could not scrape {firstname} {lastname} (ID: {psych_id})")
+            telemetry.count(marker_canton(psychologist), 'errors')
+            log.warning("  FAILED - Could not scrape %s %s (ID: %s)", firstname, lastname, psych_id,
+                        extra={'record_id': psych_id})
 
             # Save failed URL construction for later analysis and fixing
             failed_url_file = 'data/failed_url_constructions.json'
-            constructed_url = f"https://www.psychologie.ch/en/psyfinder/{url_slug}"
+            constructed_url = profile_url(url_slug)
             error_reason = "Scraping failed - likely URL construction issue or page not found"
             save_failed_url_construction(
                 failed_url_file, psych_id, user.get('id'), firstname, lastname,
@@ -1552,7 +3699,7 @@ def scrape_and_merge_in_place():
 
         # Save periodically
         if (i + 1) % save_interval == 0:
-            print(f"  Saving progress... ({i+1}/{len(psychologists_to_process)} profiles processed)")
+            log.info("  Saving progress... (%d/%d profiles processed)", i + 1, len(psychologists_to_process))
             with open(json_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
 
@@ -1560,6 +3707,7 @@ def scrape_and_merge_in_place():
         time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
 
     # Final save
+    flush_logging()
     print("Saving final results...")
     with open(json_file, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
@@ -1579,15 +3727,678 @@ def scrape_and_merge_in_place():
     if SETTINGS['MAX_PROFILES_TO_SCRAPE'] and SETTINGS['MAX_PROFILES_TO_SCRAPE'] < 100:
         print("TIP: Set MAX_PROFILES_TO_SCRAPE = None for full database processing")
     print("=" * 50)
+    return {'successful': successful, 'failed': failed, 'skipped': skipped}
+
+# =============================================================================
+# RECRAWL SCHEDULING (CHANGE-RATE ESTIMATES)
+# =============================================================================
+
+# Revisit kinds, one request each: a full profile scrape (keyed by psychologie_ch_id)
+# or an availabilityText-only visit of a manual record (keyed by "Therapist".id)
+RECRAWL_KINDS = ('profile', 'availability')
+
+# One row per candidate: (kind, key, profile key, canton, changes, observed days, days since the last visit).
+# A full profile scrape (scraped_at, or a 'profile' visit) also refreshes the availability text, so it counts as an availability visit.
+RECRAWL_CANDIDATES_SQL = '''
+    WITH candidates AS (
+        SELECT 'profile' AS kind, psychologie_ch_id AS key, psychologie_ch_id AS profile_key,
+               canton, scraped_at AS fallback_visit
+        FROM "Therapist" WHERE psychologie_ch_id IS NOT NULL AND deleted_at IS NULL
+        UNION ALL
+        SELECT 'availability', id, psychologie_ch_id, canton, scraped_at
+        FROM "Therapist" WHERE "dataSource" = 'manual' AND deleted_at IS NULL
+    )
+    SELECT c.kind, c.key, c.profile_key, c.canton, COALESCE(h.changes, 0),
+           EXTRACT(EPOCH FROM h."lastVisitAt" - h."firstVisitAt") / 86400.0,
+           EXTRACT(EPOCH FROM LOCALTIMESTAMP - GREATEST(h."lastVisitAt", p."lastVisitAt", c.fallback_visit)) / 86400.0
+    FROM candidates c
+    LEFT JOIN "RecrawlHistory" h ON h.kind = c.kind AND h.key = c.key
+    LEFT JOIN "RecrawlHistory" p ON c.kind = 'availability' AND p.kind = 'profile' AND p.key = c.profile_key
+'''
+
+# The first visit of a key only inserts the baseline; later visits count a change when "lastChangeAt" is sent
+RECORD_RECRAWL_VISITS_SQL = '''
+    INSERT INTO "RecrawlHistory" AS h (kind, key, "lastChangeAt") VALUES %s
+    ON CONFLICT (kind, key) DO UPDATE SET
+        visits = h.visits + 1,
+        changes = h.changes + (EXCLUDED."lastChangeAt" IS NOT NULL)::int,
+        "lastVisitAt" = EXCLUDED."lastVisitAt",
+        "lastChangeAt" = COALESCE(EXCLUDED."lastChangeAt", h."lastChangeAt")
+'''
+
+def recrawl_change_rate(kind, changes, observed_days):
+    """Estimated changes per day of one key.
+
+    Posterior mean of a Poisson change rate under a Gamma prior worth one change
+    per RECRAWL_PRIOR_CHANGE_DAYS[kind]: a key without history gets the prior,
+    and the estimate moves towards changes / observed_days as visits accumulate.
+    A visit sees at most one change, so rarely visited keys are estimated low.
+    """
+    return (1 + changes) / (SETTINGS['RECRAWL_PRIOR_CHANGE_DAYS'][kind] + observed_days)
+
+def recrawl_gain(rate, days_since_visit, horizon_days):
+    """Expected fresh days a revisit now adds within the horizon.
+
+    The stored copy is stale with probability 1 - exp(-rate * days_since_visit)
+    (1 for a key never visited). A revisit keeps it fresh until its next change,
+    which leaves (1 - exp(-rate * horizon_days)) / rate fresh days on average.
+    """
+    stale = 1.0 if days_since_visit is None else -math.expm1(-rate * max(days_since_visit, 0.0))
+    return stale * -math.expm1(-rate * horizon_days) / rate
+
+def load_recrawl_candidates():
+    """Read every revisit candidate with its history (RECRAWL_CANDIDATES_SQL rows)"""
+    def read(conn):
+        ensure_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute(RECRAWL_CANDIDATES_SQL)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    return run_in_db_session(read)
+
+def plan_recrawl(budget=None, kinds=RECRAWL_KINDS, markers=None, exclude=()):
+    """Pick the revisits with the highest expected freshness gain within a request budget.
+
+    Kinds compete for the same budget, so availability texts that change weekly
+    are revisited far more often than profiles that almost never change. Profile
+    candidates follow the CANTONS and SHARD settings and, if given, are limited
+    to the psychologie.ch ids in markers (the current snapshot). A therapist
+    picked for a full revisit, or whose id is in exclude (fetched anyway), gets
+    no extra availability visit. Returns {'profile': [psychologie_ch_id, ...],
+    'availability': [Therapist id, ...], 'candidates': n, 'gain_days': total}.
+    """
+    budget = SETTINGS['RECRAWL_BUDGET'] if budget is None else budget
+    plan = {kind: [] for kind in RECRAWL_KINDS}
+    plan.update(candidates=0, gain_days=0.0)
+    if not budget:
+        return plan
+
+    cantons = {canton.upper() for canton in SETTINGS['CANTONS']} if SETTINGS['CANTONS'] else None
+    shard = parse_shard(SETTINGS['SHARD']) if SETTINGS['SHARD'] else None
+    horizon = SETTINGS['RECRAWL_HORIZON_DAYS']
+    exclude = {str(key) for key in exclude}
+    markers = None if markers is None else {str(key) for key in markers}
+
+    scored = []
+    for kind, key, profile_key, canton, changes, observed_days, days_since_visit in load_recrawl_candidates():
+        if kind not in kinds or (kind == 'profile' and key in exclude):
+            continue
+        if kind == 'profile' and ((markers is not None and key not in markers) or
+                                  (cantons and canton not in cantons) or
+                                  (shard and marker_shard(key, shard[1]) != shard[0])):
+            continue
+        rate = recrawl_change_rate(kind, changes, float(observed_days or 0))
+        days = None if days_since_visit is None else float(days_since_visit)
+        scored.append((recrawl_gain(rate, days, horizon), kind, key, profile_key))
+    scored.sort(key=lambda candidate: candidate[0], reverse=True)
+    plan['candidates'] = len(scored)
+
+    picked = {}  # (kind, key) -> gain, in pick order
+    full_revisits = set(exclude)
+    availability_keys = {}  # psychologie_ch_id -> picked availability key
+    for gain, kind, key, profile_key in scored:
+        if len(picked) >= budget:
+            break
+        if kind == 'profile':
+            full_revisits.add(key)
+            # Takes over the slot and the gain of its availability visit, picked earlier with a higher gain
+            gain += picked.pop(('availability', availability_keys.pop(key, None)), 0.0)
+        elif profile_key in full_revisits:
+            continue
+        elif profile_key:
+            availability_keys[profile_key] = key
+        picked[(kind, key)] = gain
+
+    for (kind, key), gain in picked.items():
+        plan[kind].append(key)
+        plan['gain_days'] += gain
+    return plan
+
+def record_recrawl_visits(visits):
+    """Add one run's visits ({(kind, key): changed}) to RecrawlHistory; failures are reported, never raised"""
+    if not visits:
+        return 0
+    rows = [(kind, str(key), changed) for (kind, key), changed in visits.items()]
+
+    def write(conn):
+        from psycopg2.extras import execute_values
+        ensure_migrations(conn)
+        cursor = conn.cursor()
+        execute_values(cursor, RECORD_RECRAWL_VISITS_SQL, rows,
+                       template='(%s, %s, CASE WHEN %s THEN CURRENT_TIMESTAMP END)',
+                       page_size=SETTINGS['DB_BATCH_SIZE'])
+        cursor.close()
+
+    try:
+        started = time.perf_counter()
+        run_in_db_session(write)
+        record_batch_time('recrawl_history', time.perf_counter() - started)
+        return len(rows)
+    except Exception as e:
+        print(f"[DB ERROR] Could not record recrawl history: {e}")
+        return 0
+
+def run_recrawl(json_file='data/psychologie.ch.json', index_file=None, dry_run=False):
+    """Spend RECRAWL_BUDGET on one joint plan: availability visits, then the incremental refresh with its full revisits"""
+    print("\n[RECRAWL] CHANGE-RATE SCHEDULED REVISITS")
+    print("="*40)
+    budget = SETTINGS['RECRAWL_BUDGET']
+    if not budget:
+        print("[ERROR] No request budget - set RECRAWL_BUDGET (or pass --budget)")
+        return None
+
+    psychologists = select_markers(extract_psychologists_from_json(json_file))
+    if not psychologists:
+        print(f"[ERROR] No psychologists found in {json_file}")
+        return None
+
+    plan = plan_recrawl(budget, markers=[psych['id'] for psych in psychologists])
+    print(f"[+] Budget: {budget} | Candidates: {plan['candidates']} | Full revisits: {len(plan['profile'])} | "
+          f"Availability visits: {len(plan['availability'])} | Expected fresh days gained: {plan['gain_days']:.1f}")
+    result = {'plan': {'budget': budget, 'candidates': plan['candidates'], 'profile': len(plan['profile']),
+                       'availability': len(plan['availability']), 'gain_days': round(plan['gain_days'], 2)}}
+    if dry_run:
+        return result
+
+    result['availability'] = update_availability_for_manual_records(plan['availability'])
+    if result['availability'] is None:
+        return None
+    # The snapshot diff is scraped as usual; planned revisits already in it are not fetched twice
+    result['incremental'] = run_incremental_refresh(json_file, index_file, revisit_ids=plan['profile'])
+    return result
+
+# =============================================================================
+# INCREMENTAL DISCOVERY (SNAPSHOT DIFF)
+# =============================================================================
+
+MARKER_INDEX_FILE = 'data/marker_index.json'
+
+def marker_index_file():
+    """The marker index of this run: one per shard, so parallel shard runs never share a file"""
+    if not SETTINGS['SHARD']:
+        return MARKER_INDEX_FILE
+    index, count = parse_shard(SETTINGS['SHARD'])
+    return MARKER_INDEX_FILE.replace('.json', f'.shard-{index}-of-{count}.json')
+
+def build_marker_index(psychologists):
+    """Build {id: updated_at} for a list of marker records"""
+    return {str(psych['id']): psych.get('updated_at') for psych in psychologists}
+
+def load_marker_index(index_file=MARKER_INDEX_FILE):
+    """Load the marker index of the last processed snapshot (None if there is none)"""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_marker_index(index, index_file=MARKER_INDEX_FILE):
+    """Persist the marker index atomically"""
+    os.makedirs(os.path.dirname(index_file) or '.', exist_ok=True)
+    tmp_file = f"{index_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_file, index_file)
+
+def diff_marker_snapshots(previous_index, psychologists):
+    """Compare a new snapshot against the previous index by id and updated_at.
+
+    Returns a dict with 'added' and 'changed' (lists of marker records) and
+    'removed' (list of psychologie.ch ids no longer present).
+    """
+    previous_index = previous_index or {}
+    added = []
+    changed = []
+    seen = set()
+
+    for psych in psychologists:
+        psych_id = str(psych['id'])
+        seen.add(psych_id)
+        if psych_id not in previous_index:
+            added.append(psych)
+        elif previous_index[psych_id] != psych.get('updated_at'):
+            changed.append(psych)
+
+    removed = [psych_id for psych_id in previous_index if psych_id not in seen]
+    return {'added': added, 'changed': changed, 'removed': removed}
+
+def soft_delete_removed_therapists(psych_ids):
+    """Mark therapists whose markers disappeared as deleted (one statement)"""
+    if not psych_ids:
+        return 0
+
+    def retire(conn):
+        ensure_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE "Therapist" SET deleted_at = NOW(), "updatedAt" = NOW() '
+            'WHERE psychologie_ch_id = ANY(%s) AND deleted_at IS NULL',
+            (list(psych_ids),)
+        )
+        deleted = cursor.rowcount
+        cursor.close()
+        return deleted
+
+    deleted = run_in_db_session(retire)
+    if deleted:
+        refresh_therapist_stats()
+    return deleted
+
+@recorded_run('incremental')
+def run_incremental_refresh(json_file='data/psychologie.ch.json', index_file=None, revisit_ids=None):
+    """Scrape only markers that are new or changed since the last snapshot and retire removed ones.
+
+    Unchanged markers are revisited too when listed in revisit_ids, or when
+    RECRAWL_BUDGET is set (planned with plan_recrawl over the profiles alone).
+    """
+    print("\n[INCREMENTAL] SNAPSHOT DIFF REFRESH")
+    print("="*40)
+    index_file = index_file or marker_index_file()
+
+    psychologists = extract_psychologists_from_json(json_file)
+    if not psychologists:
+        print(f"[ERROR] No psychologists found in {json_file}")
+        return None
+
+    previous_index = load_marker_index(index_file)
+    if previous_index is None:
+        print(f"[INFO] No previous marker index at {index_file} - every marker counts as new")
+
+    diff = diff_marker_snapshots(previous_index, psychologists)
+    queue = diff['added'] + diff['changed']
+    print(f"[+] Snapshot: {len(psychologists)} markers | Added: {len(diff['added'])} | "
+          f"Changed: {len(diff['changed'])} | Removed: {len(diff['removed'])}")
+
+    # Every queued marker that is not written below (other cantons/shards, over the limit,
+    # failed) keeps its previous index state, so a later run picks it up again
+    queued_ids = {str(psych['id']) for psych in queue}
+    queue = select_markers(queue)
+    if SETTINGS['MAX_PROFILES_TO_SCRAPE'] is not None and len(queue) > SETTINGS['MAX_PROFILES_TO_SCRAPE']:
+        print(f"Limiting to {SETTINGS['MAX_PROFILES_TO_SCRAPE']} profiles (the rest stays queued for the next run)")
+        queue = queue[:SETTINGS['MAX_PROFILES_TO_SCRAPE']]
+
+    # Scheduled revisits of unchanged markers, picked by estimated change rate
+    scraped_ids = {str(psych['id']) for psych in queue}
+    markers = {str(psych['id']): psych for psych in select_markers(psychologists)}
+    if revisit_ids is None and SETTINGS['RECRAWL_BUDGET']:
+        revisit_ids = plan_recrawl(kinds=('profile',), markers=markers, exclude=scraped_ids)['profile']
+    revisits = []
+    if revisit_ids:
+        revisits = [markers[psych_id] for psych_id in map(str, revisit_ids)
+                    if psych_id in markers and psych_id not in scraped_ids]
+        print(f"[+] Recrawl: {len(revisits)} scheduled revisits of unchanged markers")
+        queue = queue + revisits
+
+    new_index = build_marker_index(psychologists)
+    telemetry = ACTIVE_TELEMETRY
+    actions = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'error': 0}
+    failed = 0
+    pending_writes = []
+    pending_merges = {}  # psychologie_ch_id -> DataMerge values of the buffered profiles
+    visits = {}  # ('profile', psychologie_ch_id) -> content changed, for the recrawl history
+
+    sink = get_write_sink()
+
+    def record_batch(batch, outcome):
+        """Account for one batch written by the sink (called on the writer thread for the pipeline sink)"""
+        if 'error' in outcome:
+            # Connection-level failure: the whole batch stays queued for the next run
+            log.error("[DB ERROR] Batch upsert failed: %s", outcome['error'])
+            actions['error'] += len(batch)
+            for therapist in batch:
+                telemetry.count(marker_canton(therapist), 'errors')
+            return
+        counts, failures = outcome['counts'], outcome['failures']
+        telemetry.record_db_write(counts['inserted'] + counts['updated'], outcome['seconds'])
+        telemetry.record_cache(counts['unchanged'], len(batch) - counts['error'])
+        for key in actions:
+            actions[key] += counts.get(key, 0)
+        failed_ids = set()
+        for therapist, error in failures:
+            failed_ids.add(str(therapist['id']))
+            log.error("[DB ERROR] Failed to upsert %s %s: %s", therapist['firstname'], therapist['lastname'], error,
+                      extra={'record_id': therapist['id']})
+            save_failed_url_construction(
+                'data/failed_url_constructions.json', therapist['id'], therapist.get('user_id'),
+                therapist['firstname'], therapist['lastname'], therapist['url_slug'],
+                therapist['url'], f"Database upsert failed: {str(error)[:100]}"
+            )
+        written_ids = set(outcome['written_ids'])
+        for therapist in batch:
+            psych_id = str(therapist['id'])
+            if psych_id in failed_ids:
+                telemetry.count(marker_canton(therapist), 'errors')
+                continue
+            queued_ids.discard(psych_id)
+            telemetry.count(marker_canton(therapist), 'saved' if psych_id in written_ids else 'skipped')
+            if SETTINGS['SKIP_UNCHANGED_CONTENT']:
+                # Without the content-hash cache every profile is written, changed or not
+                visits[('profile', psych_id)] = psych_id in written_ids
+
+    def flush_writes():
+        """Hand the buffered profiles to the write sink as one batch"""
+        sink.submit(list(pending_writes), dict(pending_merges), record_batch)
+        pending_writes.clear()
+        pending_merges.clear()
+
+    try:
+        for i, psych in enumerate(queue):
+            if (i + 1) % 10 == 0:
+                log.info("Progress: %d/%d | Inserted: %d | Updated: %d | Unchanged: %d | Failed: %d",
+                         i + 1, len(queue), actions['inserted'], actions['updated'], actions['unchanged'],
+                         failed + actions['error'])
+
+            url_slug = psych['url_slug']
+            result = scrape_profile_page(psych['id'], psych['user_id'], psych['firstname'], psych['lastname'], url_slug)
+            telemetry.count(marker_canton(psych), 'fetched')
+
+            if result:
+                merged_data, merge_row = merge_profile(psych, result)
+                merged_data['scraped_at'] = time.time()
+                if merge_row:
+                    pending_merges[str(psych['id'])] = merge_row
+
+                pending_writes.append(merged_data)
+                if len(pending_writes) >= SETTINGS['DB_BATCH_SIZE']:
+                    flush_writes()
+            else:
+                failed += 1
+                telemetry.count(marker_canton(psych), 'errors')
+                log.warning("[SCRAPE FAILED] %s %s (ID: %s)", psych['firstname'], psych['lastname'], psych['id'],
+                            extra={'record_id': psych['id']})
+                save_failed_url_construction(
+                    'data/failed_url_constructions.json', psych['id'], psych.get('user_id'),
+                    psych['firstname'], psych['lastname'], url_slug,
+                    profile_url(url_slug),
+                    "Scraping failed - URL construction or page access issue"
+                )
+
+            time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
+
+        if pending_writes:
+            flush_writes()
+    finally:
+        # Interrupted runs still write what was scraped; the pipeline sink drains its queue here
+        sink.close()
+        record_recrawl_visits(visits)
+        flush_logging()
+
+    # Markers that failed or were not reached keep their previous state so the next diff picks them up again
+    previous_index = previous_index or {}
+    for psych_id in queued_ids:
+        if psych_id in previous_index:
+            new_index[psych_id] = previous_index[psych_id]
+        else:
+            new_index.pop(psych_id, None)
+
+    retired = 0
+    if diff['removed']:
+        try:
+            retired = soft_delete_removed_therapists(diff['removed'])
+        except Exception as e:
+            print(f"[ERROR] Soft delete of removed profiles failed: {e}")
+            # Keep them in the index so the removal is retried next run
+            for psych_id in diff['removed']:
+                new_index[psych_id] = previous_index[psych_id]
+
+    save_marker_index(new_index, index_file)
+
+    print("\n" + "="*60)
+    print("INCREMENTAL REFRESH - COMPLETED!")
+    print("="*60)
+    print(f"[+] Scraped: {len(queue)} of {len(psychologists)} markers ({len(revisits)} scheduled revisits)")
+    print(f"[+] Inserted: {actions['inserted']} | Updated: {actions['updated']} | Unchanged: {actions['unchanged']}")
+    print(f"[+] Failed scrapes: {failed} | Failed DB operations: {actions['error']}")
+    print(f"[+] Removed markers soft-deleted: {retired}")
+    print(f"[+] Marker index saved to {index_file}")
+
+    return {'diff': {key: len(value) for key, value in diff.items()}, 'revisits': len(revisits),
+            'actions': actions, 'failed_scrapes': failed, 'soft_deleted': retired}
+
+# =============================================================================
+# FULL REFRESH (COPY INTO STAGING + SET-BASED SWAP)
+# =============================================================================
+
+STAGING_TABLE = 'therapist_staging'
+STAGING_IDS_TABLE = 'therapist_staging_ids'
+# NOT NULL columns of "Therapist" without a default - one NULL would abort the whole COPY
+REQUIRED_THERAPIST_COLUMNS = ('url', 'firstName', 'lastName', 'city', 'citySearchValue', 'canton',
+                              'gender', 'specialization', 'updatedAt')
+COPY_NULL = '\\N'
+
+class CopyStream:
+    """File-like object that feeds COPY FROM STDIN as CSV from a row iterator, without buffering it all"""
+
+    def __init__(self, rows):
+        import csv
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+        self._pending = ''
+        self.rows_written = 0
+
+    def _encode(self, value):
+        if value is None:
+            return COPY_NULL
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        return value
+
+    def read(self, size=-1):
+        while self._rows is not None and (size < 0 or len(self._pending) < size):
+            row = next(self._rows, None)
+            if row is None:
+                self._rows = None
+                break
+            self._writer.writerow([self._encode(value) for value in row])
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self.rows_written += 1
+
+        if size < 0 or size >= len(self._pending):
+            chunk, self._pending = self._pending, ''
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+def _copy_rows(cursor, table, columns, rows):
+    """Stream rows into table with COPY FROM STDIN; returns the number of rows sent"""
+    stream = CopyStream(rows)
+    column_list = ', '.join(f'"{col}"' for col in columns)
+    cursor.copy_expert(
+        f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        stream, size=65536
+    )
+    return stream.rows_written
+
+def load_refresh_staging(conn, therapists):
+    """Load mapped rows into the unlogged staging table and every snapshot id into the id table.
+
+    Only scraped records are staged for insert/update; every id of the snapshot
+    is staged so unscraped markers are not retired. Returns (staged, present, skipped).
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}, {STAGING_IDS_TABLE}')
+    # Column types only - constraints are enforced when the rows reach "Therapist"
+    column_list = ', '.join(f'"{col}"' for col in THERAPIST_COLUMNS)
+    cursor.execute(f'CREATE UNLOGGED TABLE {STAGING_TABLE} AS SELECT {column_list} FROM "Therapist" WITH NO DATA')
+    cursor.execute(f'CREATE UNLOGGED TABLE {STAGING_IDS_TABLE} (psychologie_ch_id VARCHAR(50) PRIMARY KEY)')
+
+    present_ids = set()
+    skipped = []
+
+    required = [(column, THERAPIST_COLUMN_INDEX[column]) for column in REQUIRED_THERAPIST_COLUMNS]
+    batch_size = SETTINGS['DB_BATCH_SIZE']
+
+    def staged_rows():
+        scraped = []
+        for therapist in therapists:
+            present_ids.add(str(therapist.get('id', '')))
+            if therapist.get('scraped_at'):
+                scraped.append(therapist)
+        for start in range(0, len(scraped), batch_size):
+            batch = scraped[start:start + batch_size]
+            try:
+                mapped = list(zip(batch, map_therapists_to_rows(batch)))
+            except Exception:
+                # One malformed record fails its whole batch: map one by one and skip only the bad ones
+                mapped = []
+                for therapist in batch:
+                    try:
+                        mapped.append((therapist, map_therapists_to_rows([therapist])[0]))
+                    except Exception as e:
+                        skipped.append((therapist, f"could not map record: {e!r}"))
+            for therapist, row in mapped:
+                missing = [column for column, position in required if row[position] is None]
+                if missing:
+                    skipped.append((therapist, f"missing required columns: {', '.join(missing)}"))
+                    continue
+                yield row
+
+    staged = _copy_rows(cursor, STAGING_TABLE, THERAPIST_COLUMNS, staged_rows())
+    present = _copy_rows(cursor, STAGING_IDS_TABLE, ('psychologie_ch_id',), ((psych_id,) for psych_id in present_ids))
+    cursor.execute(f'ANALYZE {STAGING_TABLE}')
+    cursor.execute(f'ANALYZE {STAGING_IDS_TABLE}')
+    cursor.close()
+    return staged, present, skipped
+
+def reconcile_refresh_staging(conn, missing='retire'):
+    """Swap the staged rows into "Therapist" with set-based statements (caller owns the transaction).
+
+    missing='retire' soft-deletes psychologie.ch rows absent from the snapshot,
+    missing='delete' removes them. Returns per-statement row counts.
+    """
+    cursor = conn.cursor()
+    counts = {}
+    column_list = ', '.join(f'"{col}"' for col in THERAPIST_COLUMNS)
+    staged_columns = ', '.join(f's."{col}"' for col in THERAPIST_COLUMNS)
+    updates = ', '.join(f'"{col}" = s."{col}"' for col in THERAPIST_COLUMNS
+                        if col not in THERAPIST_INSERT_ONLY_COLUMNS)
+    returning = ('id',) + CHILD_SOURCE_COLUMNS
+    written = []  # rows whose TherapistLanguage / TherapistReason need a resync
+
+    # A snapshot can contain the same profile (or URL) twice - keep the last staged row
+    counts['duplicates_dropped'] = 0
+    for key in ('psychologie_ch_id', 'url'):
+        cursor.execute(f'''
+            DELETE FROM {STAGING_TABLE} s USING {STAGING_TABLE} d
+            WHERE s.{key} = d.{key} AND s.ctid < d.ctid
+        ''')
+        counts['duplicates_dropped'] += cursor.rowcount
+
+    # Same replace semantics as the overwrite mode: psychologie.ch wins URL conflicts with other sources
+    cursor.execute(f'''
+        DELETE FROM "Therapist" t USING {STAGING_TABLE} s
+        WHERE t.url = s.url AND t.psychologie_ch_id IS DISTINCT FROM s.psychologie_ch_id
+    ''')
+    counts['replaced'] = cursor.rowcount
+
+    cursor.execute(f'''
+        UPDATE "Therapist" t SET {updates}
+        FROM {STAGING_TABLE} s
+        WHERE t.psychologie_ch_id = s.psychologie_ch_id
+          AND (t.content_hash IS DISTINCT FROM s.content_hash OR t.deleted_at IS NOT NULL)
+        RETURNING {', '.join(f't.{col}' for col in returning)}
+    ''')
+    written.extend(cursor.fetchall())
+    counts['updated'] = cursor.rowcount
+
+    cursor.execute(f'''
+        INSERT INTO "Therapist" ({column_list})
+        SELECT {staged_columns} FROM {STAGING_TABLE} s
+        WHERE NOT EXISTS (SELECT 1 FROM "Therapist" t WHERE t.psychologie_ch_id = s.psychologie_ch_id)
+        RETURNING {', '.join(returning)}
+    ''')
+    written.extend(cursor.fetchall())
+    counts['inserted'] = cursor.rowcount
+
+    batch_size = SETTINGS['DB_BATCH_SIZE']
+    for start in range(0, len(written), batch_size):
+        sync_therapist_children(cursor, {row[0]: build_therapist_children(dict(zip(CHILD_SOURCE_COLUMNS, row[1:])))
+                                         for row in written[start:start + batch_size]})
+
+    absent = f'''
+        t.psychologie_ch_id IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM {STAGING_IDS_TABLE} p WHERE p.psychologie_ch_id = t.psychologie_ch_id)
+    '''
+    if missing == 'delete':
+        cursor.execute(f'DELETE FROM "Therapist" t WHERE {absent}')
+        counts['deleted'] = cursor.rowcount
+    else:
+        cursor.execute(f'''
+            UPDATE "Therapist" t SET deleted_at = NOW(), "updatedAt" = NOW()
+            WHERE t.deleted_at IS NULL AND {absent}
+        ''')
+        counts['retired'] = cursor.rowcount
+
+    cursor.close()
+    return counts
+
+def run_staging_refresh(json_file='data/psychologie.ch.json', missing='retire', confirm=True):
+    """Full refresh: COPY the scraped snapshot into staging, then reconcile in one transaction"""
+    print("\n" + "!"*70)
+    print("[REFRESH] FULL PSYCHOLOGIE.CH REFRESH VIA STAGING TABLE")
+    print("!"*70)
+    print("This will:")
+    print(f"1. Stream every scraped record of {json_file} into {STAGING_TABLE} (COPY)")
+    print("2. In ONE transaction: replace URL conflicts, update changed rows, insert new rows")
+    print(f"3. {'DELETE' if missing == 'delete' else 'Soft-delete'} psychologie.ch records missing from the snapshot")
+    print("!"*70)
+
+    if confirm and not confirm_operation("\nAre you SURE you want to continue? Type 'YES' to proceed: "):
+        print("[CANCELLED] Operation cancelled by user")
+        return None
+
+    started = time.time()
+    try:
+        with db_session() as conn:
+            ensure_migrations(conn)
+            # Bulk statements over 50k rows may exceed the pool's statement timeout
+            conn.cursor().execute('SET LOCAL statement_timeout = 0')
+            staged, present, skipped = load_refresh_staging(conn, iter_snapshot_therapists(json_file))
+            conn.commit()
+            loaded = time.time()
+            print(f"[+] Staged {staged} scraped records ({present} snapshot ids) in {loaded - started:.1f}s")
+            for therapist, reason in skipped:
+                print(f"[SKIPPED] {therapist.get('firstname')} {therapist.get('lastname')} (ID: {therapist.get('id')}): {reason}")
+
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM "Therapist" WHERE psychologie_ch_id IS NOT NULL AND deleted_at IS NULL')
+            active = cursor.fetchone()[0]
+            cursor.close()
+            # Guard against a truncated snapshot retiring most of the table
+            if present < active * SETTINGS['REFRESH_MIN_SNAPSHOT_RATIO']:
+                print(f"[ERROR] Snapshot has {present} ids but the database has {active} active records - "
+                      f"refusing to refresh (REFRESH_MIN_SNAPSHOT_RATIO={SETTINGS['REFRESH_MIN_SNAPSHOT_RATIO']})")
+                return None
+
+            conn.cursor().execute('SET LOCAL statement_timeout = 0')
+            counts = reconcile_refresh_staging(conn, missing)
+            conn.commit()
+            print(f"[+] Reconciled in {time.time() - loaded:.1f}s: {counts}")
+
+            conn.cursor().execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}, {STAGING_IDS_TABLE}')
+    except Exception as e:
+        print(f"[ERROR] Staging refresh failed (no changes were applied to \"Therapist\"): {e}")
+        return {'error': str(e)}
+
+    refresh_therapist_stats(force=True)
+    print(f"[OK] Full refresh finished in {time.time() - started:.1f}s")
+    counts.update({'staged': staged, 'snapshot_ids': present, 'skipped': len(skipped)})
+    return counts
 
 def scrape_availability_text(url):
     """Scrape availability text from a therapist's profile page"""
+    import requests
+    from bs4 import BeautifulSoup
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_session().get(url, timeout=10)
         response.raise_for_status()
 
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -1623,90 +4434,598 @@ def scrape_availability_text(url):
         print(f"[AVAILABILITY ERROR] Error scraping {url}: {e}")
         return None
 
-def update_availability_for_manual_records():
-    """Update availability text for all records with dataSource='manual'"""
+UPDATE_AVAILABILITY_SQL = """
+    UPDATE "Therapist" AS t
+    SET "availabilityText" = v.availability_text, "updatedAt" = NOW()
+    FROM (VALUES %s) AS v(id, availability_text)
+    WHERE t.id = v.id AND t."availabilityText" IS DISTINCT FROM v.availability_text
+"""
+
+def update_availability_batch(updates, conn=None):
+    """Write (record_id, availability_text) pairs with one UPDATE ... FROM (VALUES ...); returns rows changed.
+
+    With conn (a session the caller already holds) the batch is committed on
+    it and the stats snapshot is only marked stale: taking a second pool slot
+    here would deadlock a pool of one. The caller runs flush_therapist_stats()
+    once its session is released.
+    """
+    if not updates:
+        return 0
+
+    def write_batch(conn):
+        from psycopg2.extras import execute_values
+        cursor = conn.cursor()
+        execute_values(cursor, UPDATE_AVAILABILITY_SQL, updates, template='(%s::text, %s::text)',
+                       page_size=len(updates))
+        updated = cursor.rowcount
+        cursor.close()
+        return updated
+
+    started = time.perf_counter()
+    if conn is None:
+        updated = run_in_db_session(write_batch)
+    else:
+        updated = write_batch(conn)
+        conn.commit()
+    record_batch_time('db_availability', time.perf_counter() - started,
+                      {'updated': updated, 'unchanged': len(updates) - updated})
+    if updated and conn is None:
+        refresh_therapist_stats()
+    elif updated:
+        mark_therapist_stats_stale()
+    return updated
+
+def update_availability_for_manual_records(record_ids=None, progress=None):
+    """Update availability text for the records with dataSource='manual'.
+
+    Visits every record, or only record_ids; with RECRAWL_BUDGET set, only the
+    availability visits plan_recrawl picks for that budget. If given,
+    progress(processed, total, counts) is called after every record; returning
+    False stops the run early (texts scraped so far are still written).
+    """
     print("\n" + "="*70)
     print("[UPDATE AVAILABILITY] UPDATING AVAILABILITY TEXT FOR MANUAL RECORDS")
     print("="*70)
     print("This will:")
     print("1. Query all records where dataSource = 'manual'")
     print("2. Scrape each URL for availability information")
-    print("3. Update the availabilityText column in the database")
+    print("3. Update the availabilityText column in the database (in batches, unchanged text is skipped)")
     print("4. Log all extracted availability text to console")
     print("5. Show progress every 10 records")
     print("="*70)
 
-    confirm = input("\nAre you sure you want to continue? Type 'YES' to proceed: ").strip()
-    if confirm != 'YES':
+    if not confirm_operation("\nAre you sure you want to continue? Type 'YES' to proceed: "):
         print("[CANCELLED] Operation cancelled by user")
-        return
+        return None
 
     print("\n[+] Starting availability update process...")
+    if record_ids is None and SETTINGS['RECRAWL_BUDGET']:
+        record_ids = plan_recrawl(kinds=('availability',))['availability']
+        print(f"[+] Recrawl: {len(record_ids)} records scheduled by estimated change rate")
+    selection = '"dataSource" = \'manual\''
+    selection_params = ()
+    if record_ids is not None:
+        selection += ' AND id = ANY(%s)'
+        selection_params = (list(record_ids),)
+
+    successful_updates = 0
+    changed_availability = 0
+    unchanged_availability = 0
+    failed_scrapes = 0
+    no_availability_found = 0
+    processed = 0
+    pending = []  # (record_id, availability_text) waiting for the next batch
+    visits = {}  # ('availability', record_id) -> text changed, for the recrawl history
+    batch_started = time.time()
+
+    def flush_updates(conn):
+        """Write the buffered availability texts in one statement on the held session"""
+        nonlocal successful_updates, batch_started
+        if not pending:
+            return
+        successful_updates += update_availability_batch(pending, conn)
+        log.info("[+] Saved %d availability texts to database", len(pending))
+        pending.clear()
+        batch_started = time.time()
 
     try:
-        # Connect to database
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-
-        # Query all manual records
-        cursor.execute('SELECT id, "firstName", "lastName", url, "availabilityText" FROM "Therapist" WHERE "dataSource" = \'manual\' ORDER BY id')
-        manual_records = cursor.fetchall()
-
-        if not manual_records:
-            print("[INFO] No records found with dataSource='manual'")
+        with db_session() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT COUNT(*) FROM "Therapist" WHERE {selection}', selection_params)
+            total_records = cursor.fetchone()[0]
             cursor.close()
-            conn.close()
-            return
-
-        print(f"[+] Found {len(manual_records)} records with dataSource='manual'")
-        print("[+] Starting availability scraping...")
-
-        successful_updates = 0
-        failed_scrapes = 0
-        no_availability_found = 0
-
-        for i, (record_id, first_name, last_name, url, current_availability) in enumerate(manual_records):
-            if (i + 1) % 10 == 0:
-                print(f"[PROGRESS] Processed {i+1}/{len(manual_records)} | Updated: {successful_updates} | Failed: {failed_scrapes} | No data: {no_availability_found}")
 
-            print(f"[SCRAPING] {first_name} {last_name} (ID: {record_id})")
+            if not total_records:
+                print("[INFO] No records found with dataSource='manual'")
+                return {'processed': 0}
 
-            # Scrape availability text
-            availability_text = scrape_availability_text(url)
+            print(f"[+] Found {total_records} records with dataSource='manual'")
+            print("[+] Starting availability scraping...")
 
-            if availability_text:
-                # Update the database
-                cursor.execute(
-                    'UPDATE "Therapist" SET "availabilityText" = %s, "updatedAt" = NOW() WHERE id = %s',
-                    (availability_text, record_id)
-                )
-                conn.commit()
-
-                print(f"  [SUCCESS] availabilityText: '{availability_text}'")
-                successful_updates += 1
-            else:
-                print("  [NO DATA] No availability information found")
-                no_availability_found += 1
+            # Named (server-side) cursor streams the selection in chunks. WITH HOLD lets it
+            # outlive the commit below, so no transaction stays open between the scrapes.
+            records = conn.cursor(name='manual_availability', withhold=True)
+            records.itersize = SETTINGS['DB_BATCH_SIZE']
+            records.execute(f'SELECT id, "firstName", "lastName", url, "availabilityText" FROM "Therapist" '
+                            f'WHERE {selection} ORDER BY id', selection_params)
+            conn.commit()
 
-            # Rate limiting - be respectful to the website
-            time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
+            try:
+                for record_id, first_name, last_name, url, current_availability in records:
+                    processed += 1
+                    if processed % 10 == 0:
+                        log.info("[PROGRESS] Processed %d/%d | Updated: %d | Unchanged: %d | Failed: %d | No data: %d",
+                                 processed, total_records, successful_updates, unchanged_availability,
+                                 failed_scrapes, no_availability_found)
+
+                    log.info("[SCRAPING] %s %s (ID: %s)", first_name, last_name, record_id, extra={'record_id': record_id})
+
+                    # Scrape availability text
+                    availability_text = scrape_availability_text(url)
+
+                    if availability_text == current_availability and availability_text:
+                        log.info("  [UNCHANGED] availabilityText: '%s'", availability_text, extra={'record_id': record_id})
+                        unchanged_availability += 1
+                        visits[('availability', record_id)] = False
+                    elif availability_text:
+                        log.info("  [SUCCESS] availabilityText: '%s'", availability_text, extra={'record_id': record_id})
+                        pending.append((record_id, availability_text))
+                        visits[('availability', record_id)] = True
+                        changed_availability += 1
+                    else:
+                        log.info("  [NO DATA] No availability information found", extra={'record_id': record_id})
+                        no_availability_found += 1
+
+                    if len(pending) >= SETTINGS['DB_BATCH_SIZE'] or (
+                            pending and time.time() - batch_started >= SETTINGS['DB_FLUSH_INTERVAL_SECONDS']):
+                        flush_updates(conn)
+
+                    if progress is not None and progress(processed, total_records, {
+                            'changed': changed_availability, 'unchanged': unchanged_availability,
+                            'no_data': no_availability_found}) is False:
+                        log.info("[STOPPED] Stopped after %d/%d records", processed, total_records)
+                        break
+
+                    # Rate limiting - be respectful to the website
+                    time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
+            finally:
+                # Keep what was scraped so far even if the run is interrupted. Batches are
+                # committed on this session (the WITH HOLD cursor survives the commits).
+                flush_updates(conn)
+                records.close()
 
         # Final summary
         print("\n" + "="*60)
         print("UPDATE AVAILABILITY - COMPLETED!")
         print("="*60)
-        print(f"[+] Total records processed: {len(manual_records)}")
+        print(f"[+] Total records processed: {processed}")
         print(f"[+] Successfully updated: {successful_updates}")
+        print(f"[+] Already up to date: {unchanged_availability}")
         print(f"[+] Failed to scrape: {failed_scrapes}")
         print(f"[+] No availability found: {no_availability_found}")
-
-        cursor.close()
-        conn.close()
+        return {'processed': processed, 'updated': successful_updates, 'unchanged': unchanged_availability,
+                'no_data': no_availability_found, 'errors': failed_scrapes}
 
     except Exception as e:
         print(f"[ERROR] Availability update failed: {e}")
         import traceback
         traceback.print_exc()
+        return {'processed': processed, 'updated': successful_updates, 'error': str(e)}
+    finally:
+        # These write through their own sessions, so they run once the cursor's is released
+        record_recrawl_visits(visits)
+        flush_therapist_stats()
+        flush_logging()
+
+# =============================================================================
+# ANALYTICS EXPORT (PARQUET)
+# =============================================================================
+
+# THERAPIST_COLUMNS exported for analytics, with their Arrow types.
+# 'id', 'createdAt'/'updatedAt' (generated per call) and 'raw_data' are left out;
+# 'canton' becomes the hive partition directory (canton=ZH/...).
+EXPORT_COLUMN_TYPES = {
+    'psychologie_ch_id': 'string',
+    'psychologie_ch_user_id': 'string',
+    'externalId': 'string',
+    'firstName': 'string',
+    'lastName': 'string',
+    'gender': 'string',
+    'role': 'string',
+    'practiceName': 'string',
+    'specialization': 'string',
+    'professionalTitle1': 'string',
+    'professionalTitle2': 'string',
+    'street': 'string',
+    'zip': 'string',
+    'city': 'string',
+    'citySearchValue': 'string',
+    'lat': 'float64',
+    'lng': 'float64',
+    'phone': 'string',
+    'mobile': 'string',
+    'email': 'string',
+    'website': 'string',
+    'hasPicture': 'bool',
+    'pictureUrl': 'string',
+    'languages_spoken': 'list',
+    'specializations': 'list',
+    'services_offered': 'list',
+    'target_groups_json': 'list',
+    'billing_options': 'list',
+    'about_me': 'string',
+    'online_availability': 'string',
+    'offersOnlineTherapy': 'bool',
+    'offersVideoCall': 'bool',
+    'offersPhoneCall': 'bool',
+    'showPhone': 'bool',
+    'showMobile': 'bool',
+    'insuranceBasic': 'bool',
+    'insuranceSelf': 'bool',
+    'insuranceSupplementary': 'bool',
+    'dataQualityScore': 'int32',
+    'profileCompleteness': 'int32',
+    'dataCompleteness': 'float64',
+    'contactDataQuality': 'string',
+    'trafficLight': 'int32',
+    'dataSource': 'string',
+    'url': 'string',
+    'scraped_at': 'timestamp',
+    'content_hash': 'string',
+}
+
+EXPORT_COLUMN_POSITIONS = tuple((THERAPIST_COLUMN_INDEX[column], column, kind)
+                                for column, kind in EXPORT_COLUMN_TYPES.items())
+
+def _import_pyarrow():
+    """Import pyarrow (optional dependency, only needed for the Parquet export)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        print("[ERROR] pyarrow is required for the Parquet export: pip install pyarrow")
+        return None
+    return pyarrow
+
+def build_export_schema(pa):
+    """Arrow schema for the exported therapist columns"""
+    type_map = {
+        'string': pa.string(),
+        'float64': pa.float64(),
+        'int32': pa.int32(),
+        'bool': pa.bool_(),
+        'list': pa.list_(pa.string()),
+        'timestamp': pa.timestamp('us'),
+    }
+    return pa.schema([(column, type_map[kind]) for column, kind in EXPORT_COLUMN_TYPES.items()])
+
+def therapists_to_export_rows(therapists):
+    """Map a batch of therapist records to export rows with native list columns; returns [(canton, row)]"""
+    canton_position = THERAPIST_COLUMN_INDEX['canton']
+    export_rows = []
+    for db_row in map_therapists_to_rows(therapists, encode_json=False):
+        row = {}
+        for position, column, kind in EXPORT_COLUMN_POSITIONS:
+            value = db_row[position]
+            if kind == 'list':
+                value = [str(v) for v in value or []]
+            elif kind == 'string' and value is not None and not isinstance(value, str):
+                value = str(value)
+            row[column] = value
+        export_rows.append((db_row[canton_position], row))
+    return export_rows
+
+def iter_snapshot_therapists(json_file_path='data/psychologie.ch.json'):
+    """Yield every named marker of a (scraped) snapshot as a flat therapist dict"""
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    for marker in iter_display_markers(data):
+        user = marker.get('user') or {}
+        if not (user.get('firstname') and user.get('lastname')):
+            continue
+        therapist = dict(marker)
+        therapist.setdefault('firstname', user.get('firstname'))
+        therapist.setdefault('lastname', user.get('lastname'))
+        therapist.setdefault('user_id', user.get('id'))
+        yield therapist
+
+def export_to_parquet(therapists, output_dir='data/export/therapists', batch_size=5000):
+    """Write therapists to Parquet partitioned by canton, one record batch at a time"""
+    pa = _import_pyarrow()
+    if pa is None:
+        return None
+    import pyarrow.parquet as pq
+
+    schema = build_export_schema(pa)
+    writers = {}
+    pending = {}
+    rows_written = 0
+
+    def flush():
+        nonlocal rows_written
+        for canton, rows in pending.items():
+            if not rows:
+                continue
+            if canton not in writers:
+                partition_dir = os.path.join(output_dir, f"canton={canton}")
+                os.makedirs(partition_dir, exist_ok=True)
+                writers[canton] = pq.ParquetWriter(os.path.join(partition_dir, 'part-00000.parquet'),
+                                                   schema, compression='zstd')
+            # Each flush becomes one row group per canton file
+            writers[canton].write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            rows_written += len(rows)
+        pending.clear()
+
+    therapists = iter(therapists)
+    try:
+        while True:
+            batch = list(itertools.islice(therapists, batch_size))
+            if not batch:
+                break
+            for canton, row in therapists_to_export_rows(batch):
+                pending.setdefault(canton, []).append(row)
+            flush()
+            log.info("  Exported %d records...", rows_written)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        flush_logging()
+
+    print(f"[OK] Exported {rows_written} records in {len(writers)} canton partitions to {output_dir}")
+    return rows_written
+
+def run_parquet_export(json_file_path='data/psychologie.ch.json', output_dir='data/export/therapists'):
+    """Export the scraped snapshot to partitioned Parquet for analytics"""
+    print("\n[EXPORT] PARQUET EXPORT")
+    print("="*40)
+    print(f"Source: {json_file_path}")
+    print(f"Target: {output_dir}/canton=XX/part-00000.parquet")
+
+    import shutil
+    # Export next to the previous one and swap it in only once it is complete, so a
+    # missing pyarrow or an unreadable snapshot leaves the previous export in place
+    staging_dir = f"{output_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    try:
+        rows_written = export_to_parquet(iter_snapshot_therapists(json_file_path), staging_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    if rows_written is None:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return None
+
+    # Replace the previous export as a whole so stale partitions don't linger
+    previous_dir = f"{output_dir.rstrip(os.sep)}.old-{os.getpid()}"
+    if os.path.isdir(output_dir):
+        os.replace(output_dir, previous_dir)
+    os.makedirs(os.path.dirname(output_dir.rstrip(os.sep)) or '.', exist_ok=True)
+    os.replace(staging_dir, output_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    print(f"[OK] Replaced the export in {output_dir}")
+    return rows_written
+
+# =============================================================================
+# PROFILING (cProfile + tracemalloc + sampled stacks)
+# =============================================================================
+
+# Seconds between stack samples for the collapsed-stack (flamegraph) file
+PROFILE_SAMPLE_INTERVAL = 0.002
+# Rows per table in the hotspot report
+PROFILE_REPORT_LIMIT = 40
+# pstats restriction matching the regex engine entry points, broken down by caller in the report
+PROFILE_REGEX_FUNCTIONS = r"of 're\.Pattern' objects|re/__init__\.py.*\((search|findall|sub|match|compile|split)\)"
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts.
+
+    The output ("frame;frame;frame count" per line) feeds flamegraph.pl,
+    speedscope or inferno directly. Frames are "function (file:line)" with
+    the line being executed, so parse_profile_html's time is attributed to
+    the individual PROFILE_EXTRACTORS functions it calls.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                stack = ';'.join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+def archived_page_path(psych_id):
+    """Where the archived profile page of a psychologie.ch id is kept"""
+    return os.path.join(SETTINGS['PAGE_ARCHIVE_DIR'], f"{psych_id}.html")
+
+def archive_profile_page(psych_id, content):
+    """Keep a fetched profile page in PAGE_ARCHIVE_DIR (replacing an older copy atomically)"""
+    os.makedirs(SETTINGS['PAGE_ARCHIVE_DIR'], exist_ok=True)
+    path = archived_page_path(psych_id)
+    with open(f"{path}.tmp", 'wb') as f:
+        f.write(content)
+    os.replace(f"{path}.tmp", path)
+
+def load_archived_pages(psychologists):
+    """Return [(record, url, html)] from PAGE_ARCHIVE_DIR, fetching and archiving the missing pages"""
+    import requests
+    pages = []
+    fetched = 0
+    for psych in psychologists:
+        url = profile_url(psych['url_slug'])
+        path = archived_page_path(psych['id'])
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                pages.append((psych, url, f.read()))
+            continue
+        try:
+            content = fetch_profile_page(url)
+        except requests.RequestException as e:
+            print(f"[WARN] Could not fetch {url}: {e}")
+            continue
+        archive_profile_page(psych['id'], content)
+        pages.append((psych, url, content))
+        fetched += 1
+        time.sleep(SETTINGS['RATE_LIMIT_SECONDS'])
+    return pages, fetched
+
+def run_profiled_pipeline(pages, fetch=False):
+    """The scrape path minus the database: (fetch,) parse, merge and map every page"""
+    import requests
+    merged_profiles = []
+    for psych, url, content in pages:
+        if fetch:
+            try:
+                content = fetch_profile_page(url)
+            except requests.RequestException:
+                continue
+        result = parse_profile_html(content, psych['id'], psych['user_id'], psych['firstname'], psych['lastname'], url)
+        merged_data, _ = merge_profile(psych, result)
+        merged_data['scraped_at'] = time.time()
+        merged_profiles.append(merged_data)
+    return map_therapists_to_rows(merged_profiles)
+
+def write_profile_report(path, profiler, snapshot, peak_bytes, page_count, seconds):
+    """Hotspots by own time and cumulative time, regex callers, extractor timings and allocation sites"""
+    import pstats
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"Profiled {page_count} pages in {seconds:.2f}s ({seconds / max(page_count, 1) * 1000:.1f} ms/page, "
+                f"profiler overhead included)\n\n")
+        stats = pstats.Stats(profiler, stream=f)
+        stats.strip_dirs()
+        for order in ('tottime', 'cumulative'):
+            f.write(f"=== Top {PROFILE_REPORT_LIMIT} functions by {order} ===\n")
+            stats.sort_stats(order).print_stats(PROFILE_REPORT_LIMIT)
+        f.write("=== Regex calls by caller ===\n")
+        stats.sort_stats('tottime').print_callers(PROFILE_REGEX_FUNCTIONS)
+
+        f.write("=== Extraction sections (scraper_extractor_seconds) ===\n")
+        sections = [(name, summary) for name, summary in METRICS.summary()['histograms'].items()
+                    if name.startswith('scraper_extractor_seconds')]
+        for name, summary in sorted(sections, key=lambda item: -item[1]['sum']):
+            f.write(f"{name:<60} total {summary['sum']:>8.3f}s | p50 {summary['p50'] * 1000:>7.3f} ms | "
+                    f"p99 {summary['p99'] * 1000:>7.3f} ms\n")
+
+        f.write("\n=== Extractors ranked by cost per kept field ===\n")
+        f.write(extractor_report() + "\n")
+
+        f.write(f"\n=== Top {PROFILE_REPORT_LIMIT} allocation sites (peak traced {peak_bytes / (1024 * 1024):.1f} MB) ===\n")
+        for statistic in snapshot.statistics('lineno')[:PROFILE_REPORT_LIMIT]:
+            f.write(f"{statistic}\n")
+
+def run_profile(json_file_path='data/psychologie.ch.json', count=50, fetch=False):
+    """Profile the scrape/parse/map path over a sample of profiles.
+
+    Pages come from the page archive (missing ones are fetched once, outside
+    the profiler) unless fetch is set, in which case every page is fetched
+    under the profiler too. Writes profile.pstats, hotspots.txt and
+    stacks.collapsed to a new directory under PROFILE_OUTPUT_DIR.
+    """
+    import cProfile
+    import tracemalloc
+
+    print("\n[PROFILE] PROFILING SCRAPE/PARSE/MAP")
+    print("="*40)
+    psychologists = extract_psychologists_from_json(json_file_path)
+    if not psychologists:
+        print(f"[ERROR] No psychologists found in {json_file_path}")
+        return None
+    # Fixed seed: repeated runs profile the same pages, so reports can be compared
+    sample = random.Random(0).sample(psychologists, min(int(count), len(psychologists)))
+
+    if fetch:
+        pages = [(psych, profile_url(psych['url_slug']), None) for psych in sample]
+    else:
+        pages, fetched = load_archived_pages(sample)
+        print(f"[+] {len(pages)} pages from {SETTINGS['PAGE_ARCHIVE_DIR']} ({fetched} fetched now)")
+    if not pages:
+        print("[ERROR] No pages to profile")
+        return None
+
+    output_dir = os.path.join(SETTINGS['PROFILE_OUTPUT_DIR'], datetime.now().strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(output_dir, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    tracemalloc.start()
+    sampler.start()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        rows = run_profiled_pipeline(pages, fetch)
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - started
+        sampler.stop()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ])
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    profiler.dump_stats(os.path.join(output_dir, 'profile.pstats'))
+    write_profile_report(os.path.join(output_dir, 'hotspots.txt'), profiler, snapshot, peak_bytes, len(pages), seconds)
+    sampler.write(os.path.join(output_dir, 'stacks.collapsed'))
+
+    print(f"[OK] Profiled {len(pages)} pages ({len(rows)} rows mapped) in {seconds:.2f}s")
+    print(f"[OK] Hotspot report: {os.path.join(output_dir, 'hotspots.txt')}")
+    print(f"[OK] Collapsed stacks: {os.path.join(output_dir, 'stacks.collapsed')} (flamegraph.pl / speedscope)")
+    print(f"[OK] Raw profile: {os.path.join(output_dir, 'profile.pstats')} (python -m pstats / snakeviz)")
+    return output_dir
+
+def run_extractor_report(json_file_path='data/psychologie.ch.json', count=200):
+    """Parse a sample of archived pages and rank the profile extractors by cost per kept field"""
+    print("\n[EXTRACTORS] PROFILE EXTRACTOR REPORT")
+    print("="*40)
+    psychologists = extract_psychologists_from_json(json_file_path)
+    if not psychologists:
+        print(f"[ERROR] No psychologists found in {json_file_path}")
+        return None
+    sample = random.Random(0).sample(psychologists, min(int(count), len(psychologists)))
+    pages, fetched = load_archived_pages(sample)
+    print(f"[+] {len(pages)} pages from {SETTINGS['PAGE_ARCHIVE_DIR']} ({fetched} fetched now)")
+    if not pages:
+        print("[ERROR] No pages to parse")
+        return None
+
+    for psych, url, content in pages:
+        parse_profile_html(content, psych['id'], psych['user_id'], psych['firstname'], psych['lastname'], url)
+
+    stats = extractor_stats()
+    print(extractor_report(stats))
+    print("\nkept = value survived into the profile, overwr = replaced by a later extractor,")
+    print("discard = collected items all filtered out; 'never' ranks first as pure cost")
+    os.makedirs(SETTINGS['PROFILE_OUTPUT_DIR'], exist_ok=True)
+    report_file = os.path.join(SETTINGS['PROFILE_OUTPUT_DIR'], 'extractors.json')
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump({'pages': len(pages), 'extractors': stats}, f, indent=2)
+    print(f"[OK] Extractor statistics saved to {report_file}")
+    return stats
 
 def analyze_failed_url_constructions(failed_url_file='data/failed_url_constructions.json'):
     """Analyze failed URL constructions to identify patterns and suggest fixes"""
@@ -1766,7 +5085,7 @@ def analyze_failed_url_constructions(failed_url_file='data/failed_url_constructi
 
     # Suggest fixes
     print(f"\nSUGGESTED FIXES:")
-    print(f"1. For special character names: Update the character mapping in normalize_for_url() function")
+    print(f"1. For special character names: Update URL_SLUG_CHAR_MAP used by normalize_for_url()")
     print(f"2. For hyphenated names: Consider truncating at first hyphen (already implemented)")
     print(f"3. For empty names: Check data integrity in source JSON")
     print(f"4. For long names: May indicate encoding issues - check UTF-8 handling")
@@ -1789,11 +5108,14 @@ def show_main_menu():
         print("4. [CONFIG]    Settings & Configuration")
         print("5. [ANALYZE]   Analyze Failed URLs")
         print("6. [DB]        Database Status & Info")
+        print("7. [EXPORT]    Export Parquet for Analytics")
+        print("8. [INCREMENTAL] Scrape New/Changed Markers Only (Snapshot Diff)")
+        print("9. [REFRESH]   Full Refresh from Scraped Snapshot (COPY + Swap)")
         print("0. [EXIT]      Exit")
         print("="*70)
 
         try:
-            choice = input("Enter your choice (0-6): ").strip()
+            choice = input("Enter your choice (0-9): ").strip()
 
             if choice == "0":
                 print("\n[BYE] Goodbye!")
@@ -1810,6 +5132,12 @@ def show_main_menu():
                 analyze_failed_url_constructions()
             elif choice == "6":
                 show_database_info()
+            elif choice == "7":
+                run_parquet_export()
+            elif choice == "8":
+                run_incremental_refresh()
+            elif choice == "9":
+                run_staging_refresh()
             else:
                 print("\n[ERROR] Invalid choice. Please try again.")
 
@@ -1837,11 +5165,10 @@ def run_scrape_and_merge():
     print(f"• Save interval: Every {SETTINGS['SAVE_INTERVAL']} profiles")
     print()
 
-    confirm = input("Start scraping? (y/N): ").strip().lower()
-    if confirm == 'y':
-        scrape_and_merge_in_place()
-    else:
-        print("[CANCELLED] Operation cancelled")
+    if confirm_operation("Start scraping? (y/N): ", expected='y'):
+        return scrape_and_merge_in_place()
+    print("[CANCELLED] Operation cancelled")
+    return None
 
 def show_settings_menu():
     """Show settings management menu"""
@@ -1869,49 +5196,38 @@ def show_settings_menu():
         elif choice == "4":
             global SETTINGS
             SETTINGS = DEFAULT_SETTINGS.copy()
+            close_db_pool()
             print("[OK] Settings reset to defaults")
             save_settings()
         else:
             print("[ERROR] Invalid choice")
 
-def show_database_info():
-    """Show database information and statistics"""
+def show_database_info(pause=True):
+    """Show database information and statistics (returns the statistics row, None on errors)"""
     print("\n[DB] DATABASE INFORMATION")
     print("="*40)
 
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-
-        # Total records
-        cursor.execute('SELECT COUNT(*) FROM "Therapist"')
-        total = cursor.fetchone()[0]
-        print(f"[STATS] Total therapists in database: {total}")
+        # One cached row instead of scanning "Therapist" (kept current by the scraper's write batches)
+        stats = load_therapist_stats()
+        if stats is None:
+            raise RuntimeError("statistics snapshot could not be computed")
 
-        # By data source
-        cursor.execute('SELECT "dataSource", COUNT(*) FROM "Therapist" GROUP BY "dataSource"')
-        sources = cursor.fetchall()
+        print(f"[STATS] Total therapists in database: {stats['totalCount']}")
         print("[SOURCES] Records by data source:")
-        for source, count in sources:
-            print(f"  * {source or 'Unknown'}: {count}")
-
-        # Psychologie.ch specific stats
-        cursor.execute('SELECT COUNT(*) FROM "Therapist" WHERE psychologie_ch_id IS NOT NULL')
-        psych_count = cursor.fetchone()[0]
-        print(f"[PSYCH] Psychologie.ch records: {psych_count}")
-
-        # Recent updates
-        cursor.execute('SELECT COUNT(*) FROM "Therapist" WHERE "updatedAt" > NOW() - INTERVAL \'24 hours\'')
-        recent = cursor.fetchone()[0]
-        print(f"[RECENT] Updated in last 24h: {recent}")
-
-        # Database size info
-        cursor.execute('SELECT pg_size_pretty(pg_database_size(current_database()))')
-        db_size = cursor.fetchone()[0]
-        print(f"[SIZE] Database size: {db_size}")
-
-        cursor.close()
-        conn.close()
+        for source, count in sorted(stats['bySource'].items(), key=lambda item: -item[1]):
+            print(f"  * {source}: {count}")
+        print(f"[PSYCH] Psychologie.ch records: {stats['psychologieChCount']} ({stats['deletedCount']} soft-deleted)")
+        print("[CANTONS] Records by canton:")
+        for canton, count in sorted(stats['byCanton'].items(), key=lambda item: -item[1]):
+            print(f"  * {canton}: {count}")
+        print("[QUALITY] Records by dataQualityScore:")
+        for score, count in sorted(stats['byQuality'].items(), key=lambda item: -item[1]):
+            print(f"  * {score}: {count}")
+        print(f"[CHECKS] Invalid zip: {stats['invalidZipCount']}, invalid canton: {stats['invalidCantonCount']}")
+        print(f"[RECENT] Updated in last 24h: {stats['recentlyUpdatedCount']}")
+        print(f"[SIZE] Database size: {stats['databaseSizeBytes'] / (1024 * 1024):.0f} MB")
+        print(f"[INFO] Statistics as of {stats['refreshedAt']:%Y-%m-%d %H:%M:%S}")
 
         print("\n[INFO] Database Table: 'Therapist'")
         print("   Key columns for psychologie.ch data:")
@@ -1926,36 +5242,246 @@ def show_database_info():
     except Exception as e:
         print(f"[ERROR] Error connecting to database: {e}")
         print("[TIP] Make sure database credentials in settings are correct")
+        stats = None
 
-    input("\nPress Enter to continue...")
-
-def main():
-    """Main entry point"""
-    print("PSYCHOLOGIE.CH SCRAPER & DATABASE MANAGER")
-    print("=" * 50)
+    if pause:
+        input("\nPress Enter to continue...")
+    return stats
 
-    # Load settings
-    load_settings()
+# =============================================================================
+# COMMAND LINE (headless runs for cron / Kubernetes Jobs)
+# =============================================================================
 
-    # Handle command line arguments
-    import sys
-    if len(sys.argv) > 1:
-        if sys.argv[1] == 'analyze':
-            analyze_failed_url_constructions()
-            return
-        elif sys.argv[1] == 'scrape':
-            run_scrape_and_merge()
-            return
-        elif sys.argv[1] == 'availability':
-            update_availability_for_manual_records()
-            return
-        else:
-            print(f"Unknown argument: {sys.argv[1]}")
-            print("Usage: python scraper.py [analyze|scrape|availability]")
-            return
+ASSUME_YES = False  # --yes: answer every confirmation prompt with yes
+
+# Exit codes of the command line (argparse itself exits with 2 on usage errors)
+EXIT_OK = 0
+EXIT_FAILED = 1  # the run raised or recorded status 'failed'
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3  # the run completed but some pages or rows failed
+EXIT_NOT_RUN = 4  # nothing ran: prompt declined, no input or a safety check refused
+EXIT_INTERRUPTED = 130
+
+# Commands whose None result means the run did not start
+CLI_RUN_COMMANDS = ('scrape', 'replace', 'availability', 'incremental', 'recrawl', 'refresh', 'dedup-ids')
+
+def confirm_operation(prompt, expected='YES'):
+    """Ask before a destructive or long run; --yes answers for the operator"""
+    if ASSUME_YES:
+        print(f"{prompt}{expected} (--yes)")
+        return True
+    answer = input(prompt).strip()
+    return answer.lower() == expected if expected == 'y' else answer == expected
+
+def parse_setting_value(value):
+    """--set values are JSON (numbers, true/false/null, lists) or plain strings"""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def build_cli_parser():
+    """The argparse parser of `python scraper.py`; no command opens the interactive menu"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-y', '--yes', action='store_true', help='answer confirmation prompts with yes (headless runs)')
+    common.add_argument('--json', action='store_true',
+                        help='print only the JSON result on stdout (progress and log output go to stderr)')
+    common.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='override any setting for this run (value parsed as JSON when possible)')
+    common.add_argument('--log-level', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'))
+    common.add_argument('--log-format', choices=('text', 'json'))
+
+    run_options = argparse.ArgumentParser(add_help=False)
+    run_options.add_argument('--limit', type=int, help='scrape at most N profiles (0 for no limit)')
+    run_options.add_argument('--rate', type=float, metavar='SECONDS', help='pause between profile requests')
+    run_options.add_argument('--shard', metavar='I/N', help='only scrape the I-th (0-based) of N disjoint id shards')
+    run_options.add_argument('--canton', action='append', metavar='ZH[,BE...]', help='only scrape markers of these cantons')
+    run_options.add_argument('--no-cache', action='store_true',
+                             help='write every scraped profile, even when its content hash is unchanged')
+    run_options.add_argument('--sink', choices=('psycopg2', 'pipeline'), help='database write sink')
+    run_options.add_argument('--concurrency', type=int, metavar='N',
+                             help='database side only: pooled connections (at least 2) and in-flight pipeline '
+                                  'batches; profile fetching stays sequential (--rate)')
+
+    parser = argparse.ArgumentParser(
+        prog='scraper.py', description='psychologie.ch scraper & database manager (no command: interactive menu)',
+        epilog=f'exit codes: {EXIT_OK} ok, {EXIT_FAILED} failed, {EXIT_USAGE} usage, {EXIT_PARTIAL} completed with '
+               f'errors, {EXIT_NOT_RUN} not run, {EXIT_INTERRUPTED} interrupted. `python -m scraper` starts faster '
+               f'than `python scraper.py`: it uses the cached bytecode instead of recompiling this file.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    def add_command(name, description, run=False):
+        return commands.add_parser(name, help=description, parents=[common, run_options] if run else [common])
+
+    add_command('scrape', 'scrape profiles and merge them into the snapshot file', run=True)
+    add_command('replace', 'scrape every profile and replace conflicting psychologie.ch rows', run=True)
+    availability = add_command('availability', 'refresh availabilityText of the manual records', run=True)
+    incremental = add_command('incremental', 'scrape new/changed markers only (snapshot diff)', run=True)
+    incremental.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    incremental.add_argument('--index-file', help='marker index (default: one per shard)')
+    recrawl = add_command('recrawl', 'spend a request budget on the revisits most likely to find changes', run=True)
+    recrawl.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    recrawl.add_argument('--index-file', help='marker index (default: one per shard)')
+    recrawl.add_argument('--dry-run', action='store_true', help='print the plan without fetching anything')
+    for command in (availability, incremental, recrawl):
+        command.add_argument('--budget', type=int, metavar='N',
+                             help='revisit requests scheduled by estimated change rate (0 turns scheduling off)')
+    refresh = add_command('refresh', 'full refresh from a scraped snapshot (COPY + reconcile)')
+    refresh.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    refresh.add_argument('--missing', choices=('retire', 'delete'), default='retire',
+                         help='soft-delete (retire) or delete records missing from the snapshot')
+    add_command('children', 'backfill the normalized child tables')
+    dedup_ids = add_command('dedup-ids', 'soft-delete older Therapist rows sharing a psychologie_ch_id (migration 0003)')
+    dedup_ids.add_argument('--dry-run', action='store_true', help='list the duplicates without changing anything')
+    dedup_command = add_command('dedup', 'score duplicate candidates')
+    dedup_command.add_argument('--full', action='store_true', help='rescore every pair instead of new records only')
+    export = add_command('export', 'export the snapshot as partitioned Parquet')
+    export.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    export.add_argument('output_dir', nargs='?', default='data/export/therapists')
+    add_command('analyze', 'analyze failed URL constructions')
+    add_command('db-info', 'print the cached database statistics')
+    memory = add_command('memory', 'measure snapshot extraction memory')
+    memory.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    profile = add_command('profile', 'profile the scrape/parse/map path (cProfile, tracemalloc, stacks)')
+    profile.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    profile.add_argument('count', nargs='?', type=int, default=50)
+    profile.add_argument('--fetch', action='store_true', help='fetch every page under the profiler')
+    extractors = add_command('extractors', 'rank the profile extractors by cost per kept field')
+    extractors.add_argument('snapshot', nargs='?', default='data/psychologie.ch.json')
+    extractors.add_argument('count', nargs='?', type=int, default=200)
+    return parser
+
+def apply_cli_options(parser, args):
+    """Fold the command line flags into SETTINGS (after the settings file, so flags win)"""
+    global ASSUME_YES
+    ASSUME_YES = args.yes
+    for item in args.set:
+        key, separator, value = item.partition('=')
+        if not separator or key not in DEFAULT_SETTINGS:
+            parser.error(f"--set expects KEY=VALUE with a known setting, got '{item}'")
+        SETTINGS[key] = parse_setting_value(value)
+    if args.log_level:
+        SETTINGS['LOG_LEVEL'] = args.log_level
+    if args.log_format:
+        SETTINGS['LOG_FORMAT'] = args.log_format
+
+    if getattr(args, 'limit', None) is not None:
+        SETTINGS['MAX_PROFILES_TO_SCRAPE'] = args.limit or None
+    if getattr(args, 'rate', None) is not None:
+        SETTINGS['RATE_LIMIT_SECONDS'] = args.rate
+    if getattr(args, 'shard', None):
+        if args.command == 'scrape':
+            parser.error("--shard is not supported by scrape (it rewrites the snapshot file in place)")
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        SETTINGS['SHARD'] = args.shard
+    if getattr(args, 'canton', None):
+        SETTINGS['CANTONS'] = [canton.strip().upper() for value in args.canton for canton in value.split(',') if canton.strip()]
+    if getattr(args, 'no_cache', False):
+        SETTINGS['SKIP_UNCHANGED_CONTENT'] = False
+    if getattr(args, 'sink', None):
+        SETTINGS['DB_WRITE_SINK'] = args.sink
+    if getattr(args, 'budget', None) is not None:
+        SETTINGS['RECRAWL_BUDGET'] = args.budget or None
+    if getattr(args, 'concurrency', None):
+        # Never a single connection: a command holding a session may still need a second one
+        SETTINGS['DB_POOL_SIZE'] = max(2, args.concurrency)
+        SETTINGS['PIPELINE_MAX_IN_FLIGHT'] = max(1, args.concurrency)
+
+def run_cli_command(args):
+    """Run one command; returns (JSON-serializable result, exit code)"""
+    command = args.command
+    started = time.time()
+    result = None
+    status = None
+    error = None
+    try:
+        if command == 'scrape':
+            result = run_scrape_and_merge()
+        elif command == 'replace':
+            result = scrape_and_overwrite_database()
+        elif command == 'availability':
+            result = update_availability_for_manual_records()
+        elif command == 'incremental':
+            result = run_incremental_refresh(args.snapshot, args.index_file)
+        elif command == 'recrawl':
+            result = run_recrawl(args.snapshot, args.index_file, dry_run=args.dry_run)
+        elif command == 'refresh':
+            result = run_staging_refresh(args.snapshot, args.missing)
+        elif command == 'children':
+            result = backfill_therapist_children()
+        elif command == 'dedup-ids':
+            result = resolve_psychologie_ch_id_duplicates(dry_run=args.dry_run)
+        elif command == 'dedup':
+            import dedup
+            result = dedup.run_dedup(full=args.full)
+        elif command == 'export':
+            result = run_parquet_export(args.snapshot, args.output_dir)
+        elif command == 'analyze':
+            result = analyze_failed_url_constructions()
+        elif command == 'db-info':
+            result = show_database_info(pause=False)
+            if result is None:
+                status, error = 'failed', 'database statistics unavailable'
+        elif command == 'memory':
+            result = measure_extraction_memory(args.snapshot)
+        elif command == 'profile':
+            result = run_profile(args.snapshot, args.count, fetch=args.fetch)
+        elif command == 'extractors':
+            result = run_extractor_report(args.snapshot, args.count)
+    except KeyboardInterrupt:
+        status, error = 'interrupted', 'interrupted'
+    except Exception as e:
+        status, error = 'failed', str(e)
+        import traceback
+        traceback.print_exc()
 
-    # Show main menu
-    show_main_menu()
+    run = LAST_RUN if LAST_RUN is not None and command in CLI_RUN_COMMANDS else None
+    if status is None and run is not None:
+        status, error = run['status'], run['error']
+        if status == 'completed' and run['totals']['errors']:
+            status = 'partial'
+    elif status is None and isinstance(result, dict) and result.get('error'):
+        status, error = 'failed', result['error']
+    elif status is None and result is None and command in CLI_RUN_COMMANDS:
+        status = 'not_run'
+    elif status is None and isinstance(result, dict) and result.get('errors'):
+        status = 'partial'
+    status = status or 'completed'
+
+    exit_code = {'completed': EXIT_OK, 'partial': EXIT_PARTIAL, 'not_run': EXIT_NOT_RUN,
+                 'interrupted': EXIT_INTERRUPTED}.get(status, EXIT_FAILED)
+    return {'command': command, 'status': status, 'exit_code': exit_code, 'error': error,
+            'seconds': round(time.time() - started, 3), 'result': result, 'run': run}, exit_code
+
+def main(argv=None):
+    """Main entry point: `python scraper.py <command> [options]`, or the interactive menu without a command"""
+    parser = build_cli_parser()
+    args = parser.parse_args(argv)
+    json_output = getattr(args, 'json', False)
+
+    # With --json stdout carries nothing but the result object
+    with contextlib.redirect_stdout(sys.stderr if json_output else sys.stdout):
+        load_settings()
+        if args.command is None:
+            start_metrics_exporter()
+            setup_logging()
+            show_main_menu()
+            return EXIT_OK
+
+        apply_cli_options(parser, args)
+        start_metrics_exporter()
+        setup_logging()
+        result, exit_code = run_cli_command(args)
+        flush_logging()
+
+    output = json.dumps(result, default=str, ensure_ascii=False)
+    print(output if json_output else f"[RESULT] {output}", flush=True)
+    return exit_code
 
 if __name__ == "__main__":
-    main()
+    # dedup.py / benchmarks.py `import scraper`: let that be this module, not a second copy with default SETTINGS
+    sys.modules.setdefault('scraper', sys.modules[__name__])
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Local stand-in for the psychologie.ch profile pages, for offline benchmarks.
+
+Usage:
+    python standin_server.py [--port 8765] [--latency-ms 80] [--jitter-ms 20]
+                             [--error-rate 0.0] [--rate-429 0.0] [--retry-after 1]
+
+Every GET /en/psyfinder/<slug> is answered with one of the fixture pages in
+fixtures/profiles/ (picked by a hash of the slug, so a slug always gets the
+same page) after --latency-ms +/- --jitter-ms. A share of the requests can be
+answered with 500 (--error-rate) or 429 with a Retry-After header
+(--rate-429). Point the scraper at it with
+
+    "BASE_URL": "http://127.0.0.1:8765/en/psyfinder/"
+
+in data/scraper_settings.json. benchmarks.py e2e starts it in-process.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'profiles')
+PROFILE_PATH_PREFIX = '/en/psyfinder/'
+
+def load_fixture_pages(fixture_dir=FIXTURE_DIR):
+    """Return (layout, [body templates]) from the fixture directory"""
+    with open(os.path.join(fixture_dir, 'layout.html'), encoding='utf-8') as f:
+        layout = Template(f.read())
+    bodies = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.endswith('.html') and name != 'layout.html':
+            with open(os.path.join(fixture_dir, name), encoding='utf-8') as f:
+                bodies.append(Template(f.read()))
+    return layout, bodies
+
+def render_profile(layout, bodies, slug):
+    """Render the fixture page for a slug, with a name derived from it"""
+    parts = slug.split('-', 1)
+    firstname = parts[0].title()
+    lastname = parts[1].replace('-', ' ').title() if len(parts) > 1 else 'Muster'
+    values = {'slug': slug, 'firstname': firstname, 'lastname': lastname}
+    body = bodies[zlib.crc32(slug.encode('utf-8')) % len(bodies)].safe_substitute(values)
+    return layout.safe_substitute(values, body=body).encode('utf-8')
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real site
+
+    def do_GET(self):
+        server = self.server
+        if server.latency > 0:
+            time.sleep(max(0.0, random.gauss(server.latency, server.jitter)))
+
+        roll = random.random()
+        if not self.path.startswith(PROFILE_PATH_PREFIX):
+            status, body, headers = 404, b'Not found', {}
+        elif roll < server.rate_429:
+            status, body, headers = 429, b'Too Many Requests', {'Retry-After': str(server.retry_after)}
+        elif roll < server.rate_429 + server.error_rate:
+            status, body, headers = 500, b'Internal Server Error', {}
+        else:
+            slug = self.path[len(PROFILE_PATH_PREFIX):].split('?', 1)[0].strip('/')
+            status, body, headers = 200, render_profile(server.layout, server.bodies, slug), {}
+        server.count(status)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200 if self.path.startswith(PROFILE_PATH_PREFIX) else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class StandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fault-injection knobs and per-status request counts"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=80, jitter_ms=20, error_rate=0.0, rate_429=0.0, retry_after=1):
+        super().__init__(address, StandinHandler)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.layout, self.bodies = load_fixture_pages()
+        self.status_counts = {}
+        self._lock = threading.Lock()
+
+    def count(self, status):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PROFILE_PATH_PREFIX}"
+
+def start_standin_server(host='127.0.0.1', port=0, **options):
+    """Start a stand-in server on a background thread (port 0 picks a free port)"""
+    server = StandinServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='standin-server', daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 500')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with a 429')
+    args = parser.parse_args()
+
+    server = StandinServer((args.host, args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           error_rate=args.error_rate, rate_429=args.rate_429, retry_after=args.retry_after)
+    print(f"[OK] Serving {len(server.bodies)} fixture profiles at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[INFO] Requests by status: {server.status_counts}")
+
+if __name__ == "__main__":
+    main()
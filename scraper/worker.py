@@ -0,0 +1,556 @@
+"""Long-running scraper worker fed by a local SQLite job queue.
+
+Usage:
+    python worker.py serve [--queue data/worker_jobs.sqlite3] [--snapshot data/psychologie.ch.json]
+                           [--poll-seconds 1] [--idle-exit SECONDS]
+    python worker.py submit scrape ID [ID ...] [--priority N] [--wait]
+    python worker.py submit availability [ID ...] [--budget N] [--wait]
+    python worker.py submit reextract [ID ...] [--wait]
+    python worker.py run KIND [ID ...] [--budget N]
+    python worker.py status [JOB_ID] [--limit 20] [--json]
+    python worker.py cancel JOB_ID
+
+Small jobs (a few re-scrapes, an availability check) used to pay a full cold
+start each: settings, the snapshot JSON, imports, HTTP and database
+connections. `serve` pays it once and keeps it warm: settings, the marker
+index of the snapshot (reloaded when the file changes), the parser modules,
+the per-thread HTTP session and the database pool. Jobs wait in a SQLite
+file, so they can be queued while no worker runs and survive restarts.
+
+Job kinds:
+  * scrape        - fetch, parse and upsert psychologie.ch ids from the snapshot
+                    (pages are archived for re-extraction)
+  * availability  - refresh availabilityText of these Therapist ids; without ids,
+                    the --budget revisits picked by plan_recrawl (or every record)
+  * reextract     - run the extractors again over archived pages (no fetch); without
+                    ids, every archived page of the snapshot
+
+Each job reports progress (done/total and counts) into the queue while it runs
+and stores its result as JSON. `submit --wait` exits with the command line's
+codes (0 completed, 3 partial, 1 failed). SIGTERM lets the current job finish
+and then stops the worker, and SIGHUP reloads the settings between jobs.
+`run` executes one job in this process without the queue (the cold path).
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import time
+
+import scraper
+
+WORKER_QUEUE_FILE = 'data/worker_jobs.sqlite3'
+DEFAULT_POLL_SECONDS = 1.0
+WAIT_POLL_SECONDS = 0.2  # submit --wait checks the job this often
+PROGRESS_WRITE_SECONDS = 1.0  # Write job progress to the queue at most this often
+JOB_STALE_SECONDS = 600  # Running jobs without progress for this long are requeued when a worker starts
+
+FINISHED_STATUSES = ('completed', 'partial', 'failed', 'cancelled')
+JOB_EXIT_CODES = {'completed': scraper.EXIT_OK, 'partial': scraper.EXIT_PARTIAL, 'failed': scraper.EXIT_FAILED,
+                  'cancelled': scraper.EXIT_INTERRUPTED}
+
+QUEUE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        args TEXT NOT NULL DEFAULT '{}',
+        priority INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'queued',
+        progress TEXT,
+        result TEXT,
+        error TEXT,
+        worker TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        heartbeat_at REAL,
+        finished_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS jobs_next ON jobs (status, priority DESC, id);
+'''
+JOB_COLUMNS = ('id', 'kind', 'args', 'priority', 'status', 'progress', 'result', 'error', 'worker', 'attempts',
+               'cancel_requested', 'created_at', 'started_at', 'heartbeat_at', 'finished_at')
+JSON_COLUMNS = ('args', 'progress', 'result')
+
+# =============================================================================
+# JOB QUEUE (SQLite)
+# =============================================================================
+
+def open_queue(queue_file=WORKER_QUEUE_FILE):
+    """Open (and create) the job queue; WAL lets status readers and submitters run next to the worker"""
+    os.makedirs(os.path.dirname(queue_file) or '.', exist_ok=True)
+    conn = sqlite3.connect(queue_file, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(QUEUE_SCHEMA)
+    return conn
+
+def job_from_row(row):
+    """A jobs row as a dict with its JSON columns decoded"""
+    job = dict(zip(JOB_COLUMNS, row))
+    for column in JSON_COLUMNS:
+        if job[column] is not None:
+            job[column] = json.loads(job[column])
+    return job
+
+def submit_job(conn, kind, args=None, priority=0):
+    """Queue a job and return its id"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"unknown job kind '{kind}' (choose from {', '.join(JOB_HANDLERS)})")
+    cursor = conn.execute('INSERT INTO jobs (kind, args, priority, created_at) VALUES (?, ?, ?, ?)',
+                          (kind, json.dumps(args or {}), priority, time.time()))
+    return cursor.lastrowid
+
+def claim_job(conn, worker):
+    """Mark the next queued job (highest priority, then oldest) as running and return it, or None"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE status = 'queued' "
+                           f"ORDER BY priority DESC, id LIMIT 1").fetchone()
+        if row is not None:
+            now = time.time()
+            conn.execute("UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?, "
+                         "attempts = attempts + 1, progress = NULL WHERE id = ?", (worker, now, now, row[0]))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return job_from_row(row) if row is not None else None
+
+def requeue_stale_jobs(conn, stale_seconds=JOB_STALE_SECONDS):
+    """Put running jobs back in the queue whose worker stopped reporting (it crashed or was killed)"""
+    cursor = conn.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' "
+                          "AND heartbeat_at < ?", (time.time() - stale_seconds,))
+    return cursor.rowcount
+
+def finish_job(conn, job_id, status, result=None, error=None):
+    """Record the outcome of a job"""
+    conn.execute('UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, heartbeat_at = ? WHERE id = ?',
+                 (status, json.dumps(result, default=str), error, time.time(), time.time(), job_id))
+
+def cancel_job(conn, job_id):
+    """Cancel a queued job right away, or ask the worker to stop a running one; returns the new status"""
+    conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                 (time.time(), job_id))
+    conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+    job = get_job(conn, job_id)
+    return job and job['status']
+
+def get_job(conn, job_id):
+    """One job as a dict, or None"""
+    row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return job_from_row(row) if row is not None else None
+
+def list_jobs(conn, limit=20):
+    """The most recent jobs, newest first"""
+    rows = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    return [job_from_row(row) for row in rows]
+
+def wait_for_job(conn, job_id, poll_seconds=WAIT_POLL_SECONDS):
+    """Block until a job has finished and return it"""
+    while True:
+        job = get_job(conn, job_id)
+        if job is None or job['status'] in FINISHED_STATUSES:
+            return job
+        time.sleep(poll_seconds)
+
+class JobProgress:
+    """Progress reporter handed to the job handlers; doubles as the worker's heartbeat.
+
+    report() writes at most every PROGRESS_WRITE_SECONDS (and always for the
+    last item) and returns False once the job was cancelled, which tells the
+    handler to stop after the current item.
+    """
+
+    def __init__(self, conn, job_id):
+        self.conn = conn
+        self.job_id = job_id
+        self.cancelled = False
+        self._written_at = 0.0
+
+    def report(self, done, total, counts=None):
+        if self.conn is None or (time.time() - self._written_at < PROGRESS_WRITE_SECONDS and done < total):
+            return not self.cancelled
+        self._written_at = time.time()
+        progress = dict(counts or {}, done=done, total=total)
+        self.conn.execute('UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ?',
+                          (json.dumps(progress), self._written_at, self.job_id))
+        row = self.conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (self.job_id,)).fetchone()
+        self.cancelled = bool(row and row[0])
+        return not self.cancelled
+
+# =============================================================================
+# WARM STATE
+# =============================================================================
+
+class WarmState:
+    """What a cold run rebuilds every time: the snapshot's marker index, parsers, HTTP session and DB pool"""
+
+    def __init__(self, snapshot_file):
+        self.snapshot_file = snapshot_file
+        self._markers = {}
+        self._snapshot_mtime = None
+
+    def warm_up(self):
+        """Import the parser/HTTP/database stacks, open the pool and apply migrations before the first job"""
+        import bs4  # noqa: F401 - imported here so the first job does not pay for it
+        scraper.http_session()
+        scraper.run_in_db_session(scraper.ensure_migrations)
+        self.markers()
+
+    def markers(self):
+        """{psychologie.ch id: marker record} of the snapshot, re-read only when the file changed"""
+        try:
+            mtime = os.path.getmtime(self.snapshot_file)
+        except OSError:
+            return self._markers
+        if mtime != self._snapshot_mtime:
+            psychologists = scraper.extract_psychologists_from_json(self.snapshot_file)
+            self._markers = {str(psych['id']): psych for psych in psychologists}
+            self._snapshot_mtime = mtime
+            print(f"[OK] Marker index: {len(self._markers)} markers from {self.snapshot_file}")
+        return self._markers
+
+    def reload_settings(self):
+        """Re-read data/scraper_settings.json (load_settings reconnects the pool on next use)"""
+        scraper.load_settings()
+
+# =============================================================================
+# JOB HANDLERS
+# =============================================================================
+
+def write_profiles(therapists, merge_rows, record_visits=True):
+    """Upsert scraped/re-extracted profiles and account for them in the run telemetry.
+
+    record_visits adds them to the recrawl history; only a real fetch is a
+    visit (re-extracting an archived page says nothing about the live one).
+    """
+    if not therapists:
+        return {}, []
+    telemetry = scraper.ACTIVE_TELEMETRY
+    started = time.perf_counter()
+    written_ids = []
+    counts, failures = scraper.bulk_upsert_therapists(therapists, written_ids=written_ids, merge_rows=merge_rows)
+    telemetry.record_db_write(counts['inserted'] + counts['updated'], time.perf_counter() - started)
+    telemetry.record_cache(counts['unchanged'], len(therapists) - len(failures))
+
+    failed_ids = {str(therapist['id']) for therapist, _ in failures}
+    written = set(map(str, written_ids))
+    visits = {}
+    for therapist in therapists:
+        psych_id = str(therapist['id'])
+        if psych_id in failed_ids:
+            telemetry.count(scraper.marker_canton(therapist), 'errors')
+            continue
+        telemetry.count(scraper.marker_canton(therapist), 'saved' if psych_id in written else 'skipped')
+        visits[('profile', psych_id)] = psych_id in written
+    if record_visits and scraper.SETTINGS['SKIP_UNCHANGED_CONTENT']:
+        # Without the content-hash cache every profile is written, changed or not
+        scraper.record_recrawl_visits(visits)
+    return counts, [{'id': str(therapist['id']), 'error': str(error)[:200]} for therapist, error in failures]
+
+def process_profiles(state, progress, ids, load_page, fetches=False):
+    """Shared loop of scrape and reextract: page -> merged profile -> batched upsert, with progress.
+
+    scraped_at comes from the page result: the fetch time for scrape, the
+    archive file's mtime for reextract (fetches=False), so re-extracted
+    profiles don't look freshly scraped to plan_recrawl.
+    """
+    markers = state.markers()
+    telemetry = scraper.ACTIVE_TELEMETRY
+    pending = []
+    merge_rows = {}
+    actions = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    failed = []
+
+    def flush():
+        counts, failures = write_profiles(pending, merge_rows, record_visits=fetches)
+        for key in actions:
+            actions[key] += counts.get(key, 0)
+        failed.extend(failures)
+        pending.clear()
+        merge_rows.clear()
+
+    done = 0
+    try:
+        for done, psych_id in enumerate(map(str, ids), 1):
+            psych = markers.get(psych_id)
+            if psych is None:
+                failed.append({'id': psych_id, 'error': 'not in the snapshot'})
+            else:
+                result = load_page(psych)
+                if fetches:
+                    telemetry.count(scraper.marker_canton(psych), 'fetched')
+                if result is None:
+                    telemetry.count(scraper.marker_canton(psych), 'errors')
+                    failed.append({'id': psych_id, 'error': 'page not fetched' if fetches else 'no archived page'})
+                else:
+                    merged_data, merge_row = scraper.merge_profile(psych, result)
+                    merged_data['scraped_at'] = result.get('scraped_at') or time.time()
+                    if merge_row:
+                        merge_rows[psych_id] = merge_row
+                    pending.append(merged_data)
+                    if len(pending) >= scraper.SETTINGS['DB_BATCH_SIZE']:
+                        flush()
+            if not progress.report(done, len(ids), dict(actions, pending=len(pending), failed=len(failed))):
+                break
+    finally:
+        # A cancelled or failing job still writes what it scraped
+        flush()
+    return {'requested': len(ids), 'processed': done, 'actions': actions, 'errors': len(failed), 'failed': failed}
+
+def run_scrape_job(state, progress, ids):
+    """Fetch, parse and upsert the given psychologie.ch ids (archiving the pages)"""
+    def load_page(psych):
+        result = scraper.scrape_profile_page(psych['id'], psych['user_id'], psych['firstname'], psych['lastname'],
+                                             psych['url_slug'], archive=True)
+        time.sleep(scraper.SETTINGS['RATE_LIMIT_SECONDS'])
+        return result
+
+    return process_profiles(state, progress, ids, load_page, fetches=True)
+
+def run_reextract_job(state, progress, ids=None):
+    """Run the extractors again over archived pages and upsert what changed (nothing is fetched)"""
+    archive_dir = scraper.SETTINGS['PAGE_ARCHIVE_DIR']
+    if ids is None:
+        archived = {name[:-len('.html')] for name in os.listdir(archive_dir) if name.endswith('.html')} \
+            if os.path.isdir(archive_dir) else set()
+        ids = [psych_id for psych_id in state.markers() if psych_id in archived]
+
+    def load_page(psych):
+        try:
+            with open(scraper.archived_page_path(psych['id']), 'rb') as f:
+                content = f.read()
+                fetched_at = os.fstat(f.fileno()).st_mtime
+        except FileNotFoundError:
+            return None
+        result = scraper.parse_profile_html(content, psych['id'], psych['user_id'], psych['firstname'],
+                                            psych['lastname'], scraper.profile_url(psych['url_slug']))
+        # The page is as old as its fetch (archive_profile_page writes it right after)
+        result['scraped_at'] = fetched_at
+        return result
+
+    return process_profiles(state, progress, ids, load_page)
+
+def run_availability_job(state, progress, ids=None, budget=None):
+    """Refresh availabilityText of Therapist ids, of a recrawl budget's picks, or of every manual record"""
+    if ids is None and budget:
+        ids = scraper.plan_recrawl(budget, kinds=('availability',))['availability']
+    result = scraper.update_availability_for_manual_records(ids, progress=progress.report)
+    return result if result is not None else {'processed': 0}
+
+# kind -> handler(state, progress, **args); args come from the queued job
+JOB_HANDLERS = {
+    'scrape': run_scrape_job,
+    'availability': run_availability_job,
+    'reextract': run_reextract_job,
+}
+
+# Jobs that write profiles are recorded in SyncLog / SyncRunMetrics like the command line runs
+JOB_TELEMETRY_MODES = {'scrape': 'worker_scrape', 'reextract': 'worker_reextract'}
+
+def job_status(result, progress):
+    """completed / partial / failed / cancelled from a handler result"""
+    if progress.cancelled:
+        return 'cancelled'
+    if isinstance(result, dict) and result.get('error'):
+        return 'failed'
+    if isinstance(result, dict) and result.get('errors'):
+        return 'partial'
+    return 'completed'
+
+def execute_job(state, job, conn=None):
+    """Run one job; returns (status, result, error). Without conn, progress is not persisted (run command)."""
+    progress = JobProgress(conn, job['id'])
+    mode = JOB_TELEMETRY_MODES.get(job['kind'])
+    if mode:
+        scraper.start_run_telemetry(mode)
+    try:
+        result = JOB_HANDLERS[job['kind']](state, progress, **job['args'])
+    except Exception as e:
+        if mode:
+            scraper.finish_run_telemetry('failed', str(e)[:500])
+        scraper.log.exception("[JOB %s] %s failed", job['id'], job['kind'])
+        return 'failed', None, str(e)[:500]
+    status = job_status(result, progress)
+    if mode:
+        scraper.finish_run_telemetry('interrupted' if status == 'cancelled' else 'completed')
+    return status, result, result.get('error') if isinstance(result, dict) else None
+
+# =============================================================================
+# WORKER LOOP
+# =============================================================================
+
+_stop_requested = False
+_reload_requested = False
+
+def _request_stop(signum, frame):
+    global _stop_requested
+    if _stop_requested:
+        raise KeyboardInterrupt  # second signal: stop the current job too
+    _stop_requested = True
+    print("[INFO] Stopping after the current job (signal again to interrupt it)")
+
+def _request_reload(signum, frame):
+    global _reload_requested
+    _reload_requested = True
+
+def serve(queue_file=WORKER_QUEUE_FILE, snapshot_file='data/psychologie.ch.json', poll_seconds=DEFAULT_POLL_SECONDS,
+          idle_exit=None):
+    """Claim and run queued jobs until stopped (or idle for idle_exit seconds); returns the number of jobs run"""
+    global _reload_requested
+    scraper.ASSUME_YES = True  # queued jobs were approved when they were submitted
+    signal.signal(signal.SIGTERM, _request_stop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, _request_reload)
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    conn = open_queue(queue_file)
+    requeued = requeue_stale_jobs(conn)
+    if requeued:
+        print(f"[INFO] Requeued {requeued} jobs of a worker that stopped reporting")
+
+    state = WarmState(snapshot_file)
+    started = time.perf_counter()
+    state.warm_up()
+    print(f"[OK] Worker {worker} warm after {time.perf_counter() - started:.2f}s, polling {queue_file}")
+
+    jobs_run = 0
+    idle_since = time.time()
+    while not _stop_requested:
+        if _reload_requested:
+            _reload_requested = False
+            state.reload_settings()
+        job = claim_job(conn, worker)
+        if job is None:
+            if idle_exit is not None and time.time() - idle_since >= idle_exit:
+                print(f"[INFO] Idle for {idle_exit}s - exiting")
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"[JOB {job['id']}] {job['kind']} {json.dumps(job['args'])[:200]}")
+        job_started = time.perf_counter()
+        try:
+            status, result, error = execute_job(state, job, conn)
+        except KeyboardInterrupt:
+            # Interrupted mid-job: hand it back to the queue for the next worker
+            conn.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE id = ?", (job['id'],))
+            scraper.flush_logging()
+            print(f"[INFO] Job {job['id']} interrupted and requeued")
+            break
+        finish_job(conn, job['id'], status, result, error)
+        scraper.flush_logging()
+        jobs_run += 1
+        idle_since = time.time()
+        print(f"[JOB {job['id']}] {status} in {time.perf_counter() - job_started:.2f}s")
+
+    conn.close()
+    print(f"[OK] Worker stopped after {jobs_run} jobs")
+    return jobs_run
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def job_args(kind, ids, budget):
+    """The queued args of a job from the command line"""
+    args = {}
+    if ids:
+        args['ids'] = ids
+    if budget is not None:
+        if kind != 'availability':
+            raise ValueError("--budget only applies to availability jobs")
+        args['budget'] = budget
+    if kind == 'scrape' and not ids:
+        raise ValueError("scrape jobs need at least one psychologie.ch id")
+    return args
+
+def print_job(job):
+    progress = job['progress'] or {}
+    done = f"{progress.get('done', 0)}/{progress.get('total', '?')}" if progress else '-'
+    print(f"  #{job['id']:<6} {job['kind']:<13} {job['status']:<10} {done:>11}  "
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(job['created_at']))}"
+          f"{'  ' + job['error'] if job['error'] else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queue', default=WORKER_QUEUE_FILE, help='SQLite job queue file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_command = commands.add_parser('serve', help='run queued jobs with warm state until stopped')
+    serve_command.add_argument('--snapshot', default='data/psychologie.ch.json')
+    serve_command.add_argument('--poll-seconds', type=float, default=DEFAULT_POLL_SECONDS)
+    serve_command.add_argument('--idle-exit', type=float, metavar='SECONDS', help='exit after being idle this long')
+
+    for name, description in (('submit', 'queue a job'), ('run', 'run one job now in this process (cold)')):
+        command = commands.add_parser(name, help=description)
+        command.add_argument('kind', choices=tuple(JOB_HANDLERS))
+        command.add_argument('ids', nargs='*', help='psychologie.ch ids (scrape, reextract) or Therapist ids (availability)')
+        command.add_argument('--budget', type=int, help='availability without ids: revisits planned by change rate')
+        if name == 'submit':
+            command.add_argument('--priority', type=int, default=0, help='higher runs first')
+            command.add_argument('--wait', action='store_true', help='wait for the job and exit with its status')
+        else:
+            command.add_argument('--snapshot', default='data/psychologie.ch.json')
+
+    status_command = commands.add_parser('status', help='show recent jobs, or one job as JSON')
+    status_command.add_argument('job_id', nargs='?', type=int)
+    status_command.add_argument('--limit', type=int, default=20)
+    status_command.add_argument('--json', action='store_true')
+
+    cancel_command = commands.add_parser('cancel', help='cancel a queued job or stop a running one')
+    cancel_command.add_argument('job_id', type=int)
+    args = parser.parse_args()
+
+    if args.command in ('submit', 'run'):
+        try:
+            queued_args = job_args(args.kind, args.ids, args.budget)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.command == 'serve':
+        scraper.load_settings()
+        scraper.start_metrics_exporter()
+        scraper.setup_logging()
+        serve(args.queue, args.snapshot, args.poll_seconds, args.idle_exit)
+        return scraper.EXIT_OK
+
+    if args.command == 'run':
+        scraper.load_settings()
+        scraper.setup_logging()
+        scraper.ASSUME_YES = True
+        status, result, error = execute_job(WarmState(args.snapshot), {'id': None, 'kind': args.kind, 'args': queued_args})
+        scraper.flush_logging()
+        print(f"[RESULT] {json.dumps({'status': status, 'error': error, 'result': result}, default=str)}")
+        return JOB_EXIT_CODES[status]
+
+    conn = open_queue(args.queue)
+    if args.command == 'submit':
+        job_id = submit_job(conn, args.kind, queued_args, args.priority)
+        print(f"[OK] Queued job {job_id} ({args.kind})")
+        if not args.wait:
+            return scraper.EXIT_OK
+        job = wait_for_job(conn, job_id)
+        print(json.dumps(job, default=str))
+        return JOB_EXIT_CODES.get(job['status'], scraper.EXIT_FAILED)
+
+    if args.command == 'status':
+        if args.job_id is not None or args.json:
+            jobs = [get_job(conn, args.job_id)] if args.job_id is not None else list_jobs(conn, args.limit)
+            print(json.dumps(jobs[0] if args.job_id is not None else jobs, default=str, indent=2))
+        else:
+            for job in list_jobs(conn, args.limit):
+                print_job(job)
+        return scraper.EXIT_OK
+
+    if args.command == 'cancel':
+        status = cancel_job(conn, args.job_id)
+        print(f"[OK] Job {args.job_id}: {status or 'not found'}")
+        return scraper.EXIT_OK if status else scraper.EXIT_USAGE
+
+if __name__ == "__main__":
+    sys.exit(main())